@@ -27,4 +27,7 @@ class SiteAdmin(admin.ModelAdmin):
 admin.site.register(ProductionMetric)
 admin.site.register(EnvironmentalMetric)
 admin.site.register(License)
-admin.site.register(Alert)
+@admin.register(Alert)
+class AlertAdmin(admin.ModelAdmin):
+    list_display = ("site","level","rule","created_at")
+    list_filter = ("level","rule")
@@ -1,6 +1,8 @@
-
 from django.apps import AppConfig
 
 class GeoecoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'geoeco'
+
+    def ready(self):
+        from geoeco import signals  # noqa: F401  تسجيل مستقبلات الإشارات
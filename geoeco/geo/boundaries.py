@@ -0,0 +1,320 @@
+# geoeco/geo/boundaries.py
+# حدود جغرافية متعددة الدقة:
+#   - تحميل مضلعات من GeoJSON محلي (Polygon/MultiPolygon مع الثقوب) أو من المضلعات المدمجة.
+#   - تبسيط Douglas–Peucker مسبق لكل مستوى تكبير (التسامح ≈ بكسل واحد عند ذلك المستوى).
+#   - طبقات GeoJSON مضغوطة gzip جاهزة للإرسال، تُبنى مرة لكل عملية.
+#   - EdgeIndex: أضلاع المضلعات موزعة على شرائح خطوط طول، فاختبار نقطة-داخل-مضلع
+#     يمر على أضلاع شريحتها فقط (نفس قاعدة ray casting في oman_polygon.point_in_poly).
+# كل نقطة = (lat, lon) داخليًا؛ GeoJSON يستخدم [lon, lat].
+import gzip
+import hashlib
+import json
+import math
+import threading
+
+ZOOMS = tuple(range(4, 13))
+PIXEL_TOLERANCE = 1.0  # أقصى انحراف مسموح بالبكسل
+
+
+def zoom_tolerance(zoom):
+    """درجات لكل بكسل عند مستوى التكبير (بلاطات 256 بكسل)."""
+    return PIXEL_TOLERANCE * 360.0 / (256 * 2 ** zoom)
+
+
+# ======= التحميل =======
+
+class Region:
+    """منطقة مسماة: قائمة مضلعات، كل مضلع = [حلقة خارجية، ثقوب...]، كل حلقة = [(lat, lon), ...]."""
+
+    def __init__(self, name, polygons, properties=None):
+        self.name = name
+        self.polygons = polygons
+        self.properties = properties or {}
+        lats = [p[0] for poly in polygons for p in poly[0]]
+        lons = [p[1] for poly in polygons for p in poly[0]]
+        self.bbox = (min(lats), min(lons), max(lats), max(lons))  # min_lat, min_lon, max_lat, max_lon
+
+    def vertices(self):
+        return sum(len(ring) for poly in self.polygons for ring in poly)
+
+    def contains(self, lat, lon):
+        return self.index().contains(lat, lon)
+
+    def index(self):
+        if not hasattr(self, "_index"):
+            self._index = EdgeIndex(self.polygons)
+        return self._index
+
+
+def _ring(coords):
+    return [(float(lat), float(lon)) for lon, lat, *_ in coords]
+
+
+def load_geojson(path, name_field="name"):
+    """Regions من ملف GeoJSON (FeatureCollection أو Feature أو هندسة مفردة)."""
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    features = data.get("features") or [data if data.get("type") == "Feature" else {"geometry": data}]
+    regions = []
+    for i, f in enumerate(features):
+        geom = f.get("geometry") or {}
+        props = f.get("properties") or {}
+        if geom.get("type") == "Polygon":
+            polygons = [[_ring(r) for r in geom["coordinates"]]]
+        elif geom.get("type") == "MultiPolygon":
+            polygons = [[_ring(r) for r in poly] for poly in geom["coordinates"]]
+        else:
+            continue
+        regions.append(Region(str(props.get(name_field) or props.get("name") or f"region_{i}"), polygons, props))
+    return regions
+
+
+# ======= التبسيط =======
+
+def _segment_distances(ys, xs, first, last):
+    """مسافات النقاط بين first و last (حصريًا) عن القطعة بينهما (بالدرجات، مستوية)."""
+    import numpy as np
+
+    y, x = ys[first + 1:last], xs[first + 1:last]
+    y1, x1, y2, x2 = ys[first], xs[first], ys[last], xs[last]
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return np.hypot(x - x1, y - y1)
+    t = np.clip(((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy), 0.0, 1.0)
+    return np.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+
+def dp_significance(points):
+    """
+    أهمية كل نقطة في Douglas–Peucker: أكبر تسامح تبقى عنده النقطة (الطرفان inf).
+    شجرة التقسيم لا تعتمد على التسامح، فتمريرة واحدة تكفي لكل المستويات:
+    douglas_peucker(points, t) = النقاط ذات الأهمية > t.
+    """
+    import numpy as np
+
+    n = len(points)
+    sig = [0.0] * n
+    if n:
+        sig[0] = sig[-1] = math.inf
+    ys = np.fromiter((p[0] for p in points), dtype=float, count=n)
+    xs = np.fromiter((p[1] for p in points), dtype=float, count=n)
+    stack = [(0, n - 1, math.inf)]
+    while stack:
+        first, last, parent = stack.pop()
+        if last - first < 2:
+            continue
+        d = _segment_distances(ys, xs, first, last)
+        j = int(d.argmax())  # أول أكبر مسافة، كما في الصيغة التكرارية
+        far = first + 1 + j
+        # لا تتجاوز أهمية النقطة أهمية النقطة التي قسمت قطعتها
+        sig[far] = min(float(d[j]), parent)
+        stack.append((first, far, sig[far]))
+        stack.append((far, last, sig[far]))
+    return sig
+
+
+def douglas_peucker(points, tolerance):
+    """خط مفتوح مبسط (الطرفان محفوظان)."""
+    return [p for p, s in zip(points, dp_significance(points)) if s > tolerance]
+
+
+class RingSimplifier:
+    """حلقة مغلقة مع أهمية نقاطها؛ at(tolerance) تعيد الحلقة المبسطة أو None."""
+
+    def __init__(self, ring):
+        pts = ring[:-1] if len(ring) > 1 and ring[0] == ring[-1] else list(ring)
+        self.pts = pts
+        if len(pts) < 3:
+            self.sig = None
+            return
+        lats = [p[0] for p in pts]
+        lons = [p[1] for p in pts]
+        self.extent = max(max(lats) - min(lats), max(lons) - min(lons))
+        # قسمة الحلقة عند أبعد نقطة عن البداية حتى لا يكون الخط المفتوح مغلقًا على نفسه
+        far = max(range(len(pts)), key=lambda i: (pts[i][0] - pts[0][0]) ** 2 + (pts[i][1] - pts[0][1]) ** 2)
+        self.sig = dp_significance(pts[:far + 1])[:-1] + dp_significance(pts[far:] + [pts[0]])[:-1]
+
+    def at(self, tolerance):
+        """None إن صارت الحلقة أصغر من التسامح (جزيرة/ثقب صغير) أو أقل من مثلث."""
+        if self.sig is None or self.extent < tolerance:
+            return None
+        out = [p for p, s in zip(self.pts, self.sig) if s > tolerance]
+        return out if len(out) >= 3 else None
+
+
+def simplify_ring(ring, tolerance):
+    return RingSimplifier(ring).at(tolerance)
+
+
+def simplify_polygons(polygons, tolerance, simplifiers=None):
+    """simplifiers: [[RingSimplifier لكل حلقة] لكل مضلع] محسوبة مسبقًا لتكرار التبسيط بتسامحات مختلفة."""
+    simplifiers = simplifiers or [[RingSimplifier(r) for r in poly] for poly in polygons]
+    out = []
+    for poly in simplifiers:
+        outer = poly[0].at(tolerance)
+        if outer is None:
+            continue
+        holes = [h for h in (r.at(tolerance) for r in poly[1:]) if h is not None]
+        out.append([outer] + holes)
+    return out
+
+
+# ======= فهرس الأضلاع =======
+
+class EdgeIndex:
+    """
+    أضلاع مجموعة مضلعات موزعة على شرائح خطوط طول متساوية. الضلع يُسجَّل في كل شريحة
+    يمسها مداه؛ الشعاع عند lon يقطع فقط أضلاع شريحته. contains = زوجية التقاطعات لكل مضلع
+    (الثقوب ضمن مضلعها)، ثم أي مضلع فردي.
+    """
+
+    def __init__(self, polygons, buckets=None):
+        edges = []
+        for pid, poly in enumerate(polygons):
+            for ring in poly:
+                n = len(ring)
+                for i in range(n):
+                    (y1, x1), (y2, x2) = ring[i], ring[(i + 1) % n]
+                    if x1 != x2:  # الأضلاع الرأسية لا تغيّر الزوجية
+                        edges.append((y1, x1, y2, x2, pid))
+        self.edges = len(edges)
+        self.bbox = (
+            min((min(e[0], e[2]) for e in edges), default=0.0), min((min(e[1], e[3]) for e in edges), default=0.0),
+            max((max(e[0], e[2]) for e in edges), default=0.0), max((max(e[1], e[3]) for e in edges), default=0.0),
+        )
+        self.nb = buckets or max(1, int(math.sqrt(len(edges))))
+        self.x0 = self.bbox[1]
+        self.width = (self.bbox[3] - self.x0) / self.nb or 1.0
+        self.buckets = [[] for _ in range(self.nb)]
+        for e in edges:
+            lo, hi = sorted((e[1], e[3]))
+            for b in range(self._bucket(lo), self._bucket(hi) + 1):
+                self.buckets[b].append(e)
+
+    def _bucket(self, lon):
+        return min(self.nb - 1, max(0, int((lon - self.x0) / self.width)))
+
+    def polygons_containing(self, lat, lon):
+        """مؤشرات المضلعات التي تحوي النقطة."""
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return set()
+        odd = set()
+        for y1, x1, y2, x2, pid in self.buckets[self._bucket(lon)]:
+            if (x1 > lon) != (x2 > lon):
+                if (y2 - y1) * (lon - x1) / (x2 - x1 + 1e-12) + y1 > lat:
+                    odd ^= {pid}
+        return odd
+
+    def contains(self, lat, lon):
+        return bool(self.polygons_containing(lat, lon))
+
+
+# ======= الطبقات =======
+
+def _builtin_oman():
+    from geoeco.geo.oman_polygon import OMAN_MAINLAND, OMAN_MUSANDAM
+    return [Region("Oman", [[OMAN_MAINLAND], [OMAN_MUSANDAM]])]
+
+
+def oman_regions():
+    """حدود عمان: settings.OMAN_BOUNDARY_FILE إن ضُبط، وإلا المضلعات التقريبية المدمجة."""
+    from django.conf import settings
+
+    path = getattr(settings, "OMAN_BOUNDARY_FILE", "")
+    return load_geojson(path) if path else _builtin_oman()
+
+
+def hotspot_regions():
+    from geoeco.geo.oman_hotspots import HOTSPOT_POLYGONS
+    return [Region(key, [[h["poly"]]], {"minerals": h["minerals"], "weight": h["weight"]})
+            for key, h in HOTSPOT_POLYGONS.items()]
+
+
+def wilaya_regions():
+    from geoeco.geo.wilayat import wilaya_index
+    index = wilaya_index()
+    return index.regions if index is not None else []
+
+
+LAYER_SOURCES = {
+    "oman": oman_regions,
+    "hotspots": hotspot_regions,
+    "wilayat": wilaya_regions,
+}
+
+
+def _feature(region, polygons, precision):
+    coords = [[[[round(lon, precision), round(lat, precision)] for lat, lon in ring + ring[:1]]
+               for ring in poly] for poly in polygons]
+    return {
+        "type": "Feature",
+        "properties": {"name": region.name, **region.properties},
+        "geometry": {"type": "MultiPolygon", "coordinates": coords},
+    }
+
+
+class Layer:
+    """طبقة مبسطة مسبقًا لكل مستوى في ZOOMS: GeoJSON مضغوط gzip + ETag."""
+
+    def __init__(self, name, regions):
+        self.name = name
+        self.regions = regions
+        self.gz, self.etags, self.vertices = {}, {}, {}
+        simplifiers = [[[RingSimplifier(ring) for ring in poly] for poly in r.polygons] for r in regions]
+        for z in ZOOMS:
+            tol = zoom_tolerance(z)
+            precision = max(3, min(6, math.ceil(-math.log10(tol)) + 1))
+            features, count = [], 0
+            for r, simp in zip(regions, simplifiers):
+                polys = simplify_polygons(r.polygons, tol, simp)
+                if polys:
+                    features.append(_feature(r, polys, precision))
+                    count += sum(len(ring) for poly in polys for ring in poly)
+            body = json.dumps({"type": "FeatureCollection", "name": name, "zoom": z, "features": features},
+                              separators=(",", ":")).encode("utf-8")
+            self.gz[z] = gzip.compress(body, compresslevel=9, mtime=0)
+            self.etags[z] = '"%s"' % hashlib.sha1(self.gz[z]).hexdigest()[:20]
+            self.vertices[z] = count
+
+    @staticmethod
+    def nearest_zoom(zoom):
+        return min(ZOOMS, key=lambda z: abs(z - zoom))
+
+    def gzipped(self, zoom):
+        return self.gz[self.nearest_zoom(zoom)]
+
+    def geojson(self, zoom):
+        return json.loads(gzip.decompress(self.gzipped(zoom)))
+
+
+_lock = threading.Lock()
+_layers = {}
+
+
+def get_layer(name):
+    """الطبقة المبنية (مرة لكل عملية). KeyError لاسم غير معروف."""
+    layer = _layers.get(name)
+    if layer is None:
+        source = LAYER_SOURCES[name]
+        with _lock:
+            layer = _layers.get(name)
+            if layer is None:
+                layer = _layers[name] = Layer(name, source())
+    return layer
+
+
+# ======= حدود عمان للتحقق =======
+
+_oman = {"index": None}
+
+
+def oman_index():
+    """EdgeIndex لحدود عمان بالدقة الكاملة (يُبنى مرة لكل عملية)."""
+    index = _oman["index"]
+    if index is None:
+        with _lock:
+            index = _oman["index"]
+            if index is None:
+                index = _oman["index"] = EdgeIndex([p for r in oman_regions() for p in r.polygons])
+    return index
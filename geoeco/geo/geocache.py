@@ -0,0 +1,217 @@
+# geoeco/geo/geocache.py
+# تخزين مؤقت لدوال الجغرافيا النقطية (point_in_oman، إسناد الولاية، point_in_poly):
+#   - LRU محدود في الذاكرة، المفتاح = الإحداثيات مقرّبة إلى GEO_CACHE_PRECISION منزلة كأعداد صحيحة
+#     (الدالة تُحسب على القيم المقرّبة نفسها فتبقى النتيجة حتمية).
+#   - اختياريًا ملف SQLite دائم (GEO_CACHE_PATH): يُحمَّل في الذاكرة عند أول استخدام
+#     وتُكتب الإدخالات الجديدة على دفعات، فإعادة استيراد نفس المواقع لا تحسب هندسة إطلاقًا.
+#   - مساحة أسماء لكل دالة تشمل "إصدار" مصدرها (مسار ملف الحدود وتاريخ تعديله) فلا تُقرأ نتائج قديمة.
+#   - عدّادات hits/misses/evictions لكل دالة: cache_stats() و /api/geo/cache/.
+import atexit
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+DEFAULT_SIZE = 100_000
+DEFAULT_PRECISION = 6
+FLUSH_EVERY = 1000  # إدخالات جديدة قبل الكتابة على القرص
+DISK_MAX_FACTOR = 10  # أقصى صفوف لكل دالة على القرص = الحجم × هذا
+
+_registry = {}
+_fingerprints = {}
+
+
+def _setting(name, default):
+    from django.conf import settings
+    return getattr(settings, name, default)
+
+
+def file_version(setting_name):
+    """إصدار لمصدر بيانات ملفّه في الإعدادات: المسار + تاريخ التعديل ("builtin" بلا ملف)."""
+    def version():
+        path = _setting(setting_name, "")
+        if not path:
+            return "builtin"
+        try:
+            return f"{path}@{os.path.getmtime(path):.0f}"
+        except OSError:
+            return path
+    return version
+
+
+def poly_fingerprint(poly):
+    """مفتاح ثابت لمضلع (قائمة نقاط) يصلح عبر العمليات؛ يُحسب مرة لكل كائن."""
+    entry = _fingerprints.get(id(poly))
+    if entry is None or entry[0] is not poly:
+        digest = hashlib.sha1(repr([tuple(p) for p in poly]).encode()).hexdigest()[:16]
+        entry = _fingerprints[id(poly)] = (poly, digest)  # المرجع يمنع إعادة استخدام id
+    return entry[1]
+
+
+def _format_key(key):
+    return ",".join(map(str, key))
+
+
+def _parse_key(text):
+    parts = text.split(",")
+    return (int(parts[0]), int(parts[1]), *parts[2:])
+
+
+class GeoCache:
+    def __init__(self, name, maxsize=None, precision=None, version=None, decode=None):
+        self.name = name
+        self.decode = decode or (lambda v: v)
+        self._maxsize = maxsize
+        self._precision = precision
+        self._version = version
+        self.lock = threading.Lock()
+        self.data = OrderedDict()
+        self.pending = {}
+        self.ready = False
+        self.hits = self.misses = self.evictions = 0
+        self.disk_loaded = self.disk_written = 0
+        self.disk_rows = 0  # تقدير صفوف هذه الدالة على القرص (للتقليم)
+
+    # ----- إعداد كسول (الإعدادات غير متاحة عند الاستيراد) -----
+    def _setup(self):
+        self.maxsize = self._maxsize or _setting("GEO_CACHE_SIZE", DEFAULT_SIZE)
+        self.precision = self._precision if self._precision is not None else \
+            _setting("GEO_CACHE_PRECISION", DEFAULT_PRECISION)
+        self.scale = 10 ** self.precision
+        self.namespace = f"{self.name}:{self._version() if self._version else 'v1'}"
+        self.path = _setting("GEO_CACHE_PATH", "")
+        if self.path:
+            self._load()
+        self.ready = True
+
+    # ----- القرص -----
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("CREATE TABLE IF NOT EXISTS geo_cache ("
+                     "ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, used REAL NOT NULL, "
+                     "PRIMARY KEY (ns, key))")
+        return conn
+
+    def _load(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT key, value FROM geo_cache WHERE ns = ? ORDER BY used DESC LIMIT ?",
+                                (self.namespace, self.maxsize)).fetchall()
+            self.disk_rows = conn.execute("SELECT COUNT(*) FROM geo_cache WHERE ns = ?",
+                                          (self.namespace,)).fetchone()[0]
+        for key, value in reversed(rows):  # الأحدث استخدامًا في آخر LRU
+            self.data[_parse_key(key)] = self.decode(json.loads(value))
+        self.disk_loaded = len(rows)
+
+    def flush(self):
+        """اكتب الإدخالات الجديدة إلى القرص وقلّم الأقدم استخدامًا."""
+        with self.lock:
+            if not (self.ready and self.path and self.pending):
+                return 0
+            pending, self.pending = self.pending, {}
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO geo_cache (ns, key, value, used) VALUES (?, ?, ?, ?)",
+                             [(self.namespace, _format_key(k), json.dumps(v), now) for k, v in pending.items()])
+            self.disk_rows += len(pending)
+            limit = self.maxsize * DISK_MAX_FACTOR
+            if self.disk_rows > limit:  # التقليم فقط عند تجاوز الحد (ترتيب كامل للجدول)
+                conn.execute("DELETE FROM geo_cache WHERE ns = ? AND key NOT IN ("
+                             "SELECT key FROM geo_cache WHERE ns = ? ORDER BY used DESC LIMIT ?)",
+                             (self.namespace, self.namespace, limit))
+                self.disk_rows = limit
+        self.disk_written += len(pending)
+        return len(pending)
+
+    # ----- LRU -----
+    def lookup(self, key, compute):
+        with self.lock:
+            if key in self.data:
+                self.data.move_to_end(key)
+                self.hits += 1
+                return self.data[key]
+            self.misses += 1
+        value = compute()
+        with self.lock:
+            self.data[key] = value
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+            if self.path:
+                self.pending[key] = value
+                flush = len(self.pending) >= FLUSH_EVERY
+            else:
+                flush = False
+        if flush:
+            self.flush()
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.pending.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "size": len(self.data), "maxsize": getattr(self, "maxsize", None),
+            "disk_loaded": self.disk_loaded, "disk_written": self.disk_written,
+            "namespace": getattr(self, "namespace", None),
+        }
+
+
+def geo_cached(name, version=None, maxsize=None, precision=None, key_args=None, decode=None):
+    """
+    ديكور لدالة f(lat, lon, *rest): النتيجة (قابلة لـ JSON) تُخزَّن بمفتاح الإحداثيات المقرّبة.
+    key_args(*rest) -> نص يميّز بقية الوسائط (مثل poly_fingerprint).
+    decode: يعيد نوع القيمة المقروءة من القرص (مثل tuple)؛ version: دالة تعيد إصدار المصدر.
+    الدالة الأصلية متاحة في .uncached، والذاكرة في .cache.
+    """
+    def decorate(func):
+        cache = _registry[name] = GeoCache(name, maxsize, precision, version, decode)
+
+        @functools.wraps(func)
+        def wrapper(lat, lon, *rest):
+            if lat is None or lon is None:
+                return func(lat, lon, *rest)
+            if not cache.ready:
+                with cache.lock:
+                    if not cache.ready:
+                        cache._setup()
+            scale = cache.scale
+            ila, ilo = round(lat * scale), round(lon * scale)  # round(x) أسرع كثيرًا من round(x, n)
+            key = (ila, ilo, key_args(*rest)) if rest else (ila, ilo)
+            return cache.lookup(key, lambda: func(ila / scale, ilo / scale, *rest))
+
+        wrapper.cache = cache
+        wrapper.uncached = func
+        return wrapper
+    return decorate
+
+
+def cache_stats():
+    return {name: c.stats() for name, c in _registry.items()}
+
+
+def flush_all():
+    return sum(c.flush() for c in _registry.values())
+
+
+def clear_all(disk=False):
+    """امسح الذاكرة (وملف القرص إن disk=True) لكل الدوال."""
+    for c in _registry.values():
+        c.clear()
+    path = _setting("GEO_CACHE_PATH", "")
+    if disk and path and os.path.exists(path):
+        with closing(sqlite3.connect(path)) as conn, conn:
+            conn.execute("DROP TABLE IF EXISTS geo_cache")
+
+
+atexit.register(flush_all)
@@ -3,6 +3,8 @@
 # الهدف: إسناد (محافظة/ولاية) لأية نقطة عبر أقرب مركز.
 import math
 
+from geoeco.geo.geocache import geo_cached, poly_fingerprint
+
 WILAYA_CENTROIDS = [
     # Muscat Governorate
     ("Muscat", "Muscat",      23.588, 58.407),
@@ -82,6 +84,7 @@ def haversine_km(lat1, lon1, lat2, lon2):
     a = math.sin(dphi/2)**2 + math.cos(p1)*math.cos(p2)*math.sin(dlbd/2)**2
     return 2 * R * math.asin(math.sqrt(a))
 
+@geo_cached("assign_wilaya_from_point", version=lambda: poly_fingerprint(WILAYA_CENTROIDS), decode=tuple)
 def assign_wilaya_from_point(lat, lon):
     """أقرب ولاية (ومحافظتها) بناءً على الإحداثيات."""
     best = None
@@ -4,6 +4,9 @@
 
 import random
 
+from geoeco.geo.geocache import geo_cached, poly_fingerprint
+
+@geo_cached("oman_hotspots.point_in_poly", key_args=poly_fingerprint)
 def point_in_poly(lat, lon, poly):
     inside = False
     n = len(poly)
@@ -25,7 +28,7 @@ def random_point_in_polygon(poly, max_tries=4000):
     for _ in range(max_tries):
         la = round(random.uniform(la1, la2), 6)
         lo = round(random.uniform(lo1, lo2), 6)
-        if point_in_poly(la, lo, poly):
+        if point_in_poly.uncached(la, lo, poly):  # نقاط عشوائية لا تتكرر: بلا تخزين
             return la, lo
     raise RuntimeError("Failed to sample point in polygon")
 
@@ -156,7 +159,7 @@ def cluster_point_in_polygon(poly, centers=None, spread_km=15.0):
     for _ in range(200):
         la = round(c_lat + random.uniform(-delta, delta), 6)
         lo = round(c_lon + random.uniform(-delta, delta), 6)
-        if point_in_poly(la, lo, poly):
+        if point_in_poly.uncached(la, lo, poly):  # نقاط عشوائية لا تتكرر: بلا تخزين
             return la, lo
     # fallback
     return random_point_in_polygon(poly)
@@ -3,6 +3,9 @@
 
 from random import uniform
 
+from geoeco.geo.boundaries import oman_index
+from geoeco.geo.geocache import file_version, geo_cached, poly_fingerprint
+
 # كل نقطة = (lat, lon)
 OMAN_MAINLAND = [
     (26.0, 56.05), (25.6, 56.50), (25.0, 56.65), (24.4, 56.35), (23.9, 55.9),
@@ -22,6 +25,7 @@ OMAN_MUSANDAM = [
 
 OMAN_POLYGONS = [OMAN_MAINLAND, OMAN_MUSANDAM]
 
+@geo_cached("oman_polygon.point_in_poly", key_args=poly_fingerprint)
 def point_in_poly(lat, lon, poly):
     """Ray-casting algorithm: True if (lat, lon) inside polygon."""
     inside = False
@@ -37,8 +41,10 @@ def point_in_poly(lat, lon, poly):
                 inside = not inside
     return inside
 
+@geo_cached("point_in_oman", version=file_version("OMAN_BOUNDARY_FILE"))
 def point_in_oman(lat, lon):
-    return any(point_in_poly(lat, lon, poly) for poly in OMAN_POLYGONS)
+    # فهرس أضلاع (boundaries.EdgeIndex) فوق OMAN_BOUNDARY_FILE أو المضلعات أعلاه
+    return oman_index().contains(lat, lon)
 
 def bbox_of(poly):
     lats = [p[0] for p in poly]
@@ -52,7 +58,7 @@ def random_point_in_polygon(poly, max_tries=5000):
     for _ in range(max_tries):
         la = round(uniform(min_la, max_la), 6)
         lo = round(uniform(min_lo, max_lo), 6)
-        if point_in_poly(la, lo, poly):
+        if point_in_poly.uncached(la, lo, poly):  # نقاط عشوائية لا تتكرر: بلا تخزين
             return la, lo
     raise RuntimeError("Failed to sample point inside polygon")
 
@@ -0,0 +1,18 @@
+# geoeco/geo/oman_targets.py
+# أهداف الإنتاج الوطنية السنوية التقريبية لكل معدن: يُعاير عليها reset_and_generate_oman المجاميع،
+# ويقارن بها مكعب التقارير (report_cube). ثوابت فقط: تُستورد من الويب دون أمر التوليد.
+
+# أهداف وطنية تقريبية سنوية (بالطن) لمعادلة المجاميع
+DEFAULT_TARGETS_TONNES = {
+    "Limestone": 25_000_000,
+    "Gypsum":    10_000_000,
+    "Silica":     1_000_000,
+    "Dolomite":     800_000,
+    "Manganese":    150_000,
+    "Chromite":     900_000,
+    "Copper":       200_000,
+}
+# الذهب بالكيلوغرام
+DEFAULT_TARGETS_KG = {
+    "Gold": 1_500,  # 1.5 طن ≈ 1500 كغ
+}
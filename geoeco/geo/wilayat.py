@@ -0,0 +1,101 @@
+# geoeco/geo/wilayat.py
+# إسناد (المحافظة، الولاية) لنقطة من مضلعات الولايات (GeoJSON محلي: WILAYA_BOUNDARY_FILE):
+#   - شبكة خلايا فوق صناديق المضلعات: كل خلية تحمل الولايات التي يمس صندوقها الخلية،
+#     فالنقطة تُختبر مقابل مرشحين قليلين فقط، ثم EdgeIndex للمضلع الدقيق.
+#   - نقطة خارج كل المضلعات (أو بلا ملف) -> أقرب مركز (oman_admin.assign_wilaya_from_point).
+import math
+import threading
+
+from geoeco.geo.boundaries import load_geojson
+from geoeco.geo.geocache import file_version, geo_cached
+from geoeco.geo.oman_admin import WILAYA_CENTROIDS, assign_wilaya_from_point
+
+GRID_DEG = 0.25
+# أسماء الخصائص المقبولة في GeoJSON (الأول الموجود)؛ NAME_1/NAME_2 كما في ملفات GADM
+GOVERNORATE_FIELDS = ("governorate", "NAME_1", "gov")
+WILAYA_FIELDS = ("wilaya", "NAME_2", "name")
+
+
+def _prop(props, fields):
+    for f in fields:
+        if props.get(f):
+            return str(props[f])
+    return ""
+
+
+class WilayaIndex:
+    def __init__(self, regions, grid_deg=GRID_DEG):
+        self.regions = regions
+        self.labels = [(_prop(r.properties, GOVERNORATE_FIELDS), _prop(r.properties, WILAYA_FIELDS) or r.name)
+                       for r in regions]
+        self.grid = grid_deg
+        self.cells = {}
+        for i, r in enumerate(regions):
+            min_lat, min_lon, max_lat, max_lon = r.bbox
+            for row in range(self._cell(min_lat), self._cell(max_lat) + 1):
+                for col in range(self._cell(min_lon), self._cell(max_lon) + 1):
+                    self.cells.setdefault((row, col), []).append(i)
+
+    def _cell(self, v):
+        return math.floor(v / self.grid)
+
+    def candidates(self, lat, lon):
+        return self.cells.get((self._cell(lat), self._cell(lon)), ())
+
+    def lookup(self, lat, lon):
+        """(governorate, wilaya) للمضلع الذي يحوي النقطة، أو None."""
+        for i in self.candidates(lat, lon):
+            min_lat, min_lon, max_lat, max_lon = self.regions[i].bbox
+            if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon and self.regions[i].contains(lat, lon):
+                return self.labels[i]
+        return None
+
+
+_lock = threading.Lock()
+_cache = {"index": None, "path": None}
+
+
+def wilaya_index():
+    """فهرس settings.WILAYA_BOUNDARY_FILE (يُبنى مرة لكل عملية)، أو None إن لم يُضبط."""
+    from django.conf import settings
+
+    path = getattr(settings, "WILAYA_BOUNDARY_FILE", "")
+    if not path:
+        return None
+    if _cache["path"] != path:
+        with _lock:
+            if _cache["path"] != path:
+                _cache["index"] = WilayaIndex(load_geojson(path))
+                _cache["path"] = path
+    return _cache["index"]
+
+
+@geo_cached("assign_governorate", version=file_version("WILAYA_BOUNDARY_FILE"), decode=tuple)
+def assign_governorate(lat, lon):
+    """(governorate, wilaya): المضلع الذي يحوي النقطة، وإلا أقرب مركز ولاية."""
+    index = wilaya_index()
+    found = index.lookup(lat, lon) if index is not None else None
+    return found or assign_wilaya_from_point(lat, lon)
+
+
+def assign_many(points):
+    """
+    [(lat, lon)] -> [(governorate, wilaya)] مع عدد النقاط التي أُسندت بالمضلعات.
+    الرجوع لأقرب مركز يُحسب متجهًا (NumPy) دفعة واحدة لكل النقاط المتبقية.
+    """
+    import numpy as np
+
+    index = wilaya_index()
+    out = [index.lookup(la, lo) for la, lo in points] if index is not None else [None] * len(points)
+    matched = sum(1 for r in out if r is not None)
+    missing = [i for i, r in enumerate(out) if r is None]
+    if missing:
+        lat = np.radians([points[i][0] for i in missing])[:, None]
+        lon = np.radians([points[i][1] for i in missing])[:, None]
+        c_lat = np.radians([c[2] for c in WILAYA_CENTROIDS])[None, :]
+        c_lon = np.radians([c[3] for c in WILAYA_CENTROIDS])[None, :]
+        # haversine: الترتيب وحده يكفي (نفس نتيجة haversine_km)
+        a = np.sin((c_lat - lat) / 2) ** 2 + np.cos(lat) * np.cos(c_lat) * np.sin((c_lon - lon) / 2) ** 2
+        for i, j in zip(missing, a.argmin(axis=1)):
+            out[i] = tuple(WILAYA_CENTROIDS[j][:2])
+    return out, matched
@@ -0,0 +1,73 @@
+# geoeco/management/base.py
+# أساس مشترك لأوامر geoeco: خيار --profile [DIR] يقيس التنفيذ (geoeco/services/profiling.py)
+# ويكتب تقرير JSON + .pstats + .collapsed في DIR (الافتراضي profiles/).
+# كل سطر مخرجات ينتهي بـ "…" يبدأ مرحلة جديدة؛ self.phase(name) للمراحل بلا رسالة.
+from django.core.management.base import BaseCommand, OutputWrapper
+
+
+class _PhaseOutput:
+    """يمرّر الكتابة إلى OutputWrapper ويعلّم المراحل في المقياس."""
+
+    def __init__(self, out, profiler):
+        self._out = out
+        self._profiler = profiler
+
+    def write(self, msg="", style_func=None, ending=None):
+        self._profiler.mark(msg)
+        self._out.write(msg, style_func, ending)
+
+    def __getattr__(self, name):
+        return getattr(self._out, name)
+
+
+class ProfiledCommand(BaseCommand):
+    profiler = None
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        group = parser.add_argument_group("profiling")
+        group.add_argument("--profile", nargs="?", const="profiles", default=None, metavar="DIR",
+                           help="Write a JSON report, .pstats and flamegraph .collapsed stacks to DIR")
+        group.add_argument("--profile_interval", type=float, default=5.0, help="Stack sampling interval (ms)")
+        group.add_argument("--profile_top", type=int, default=30, help="Functions listed in the JSON report")
+        group.add_argument("--profile_no_memory", action="store_true",
+                           help="Skip tracemalloc (much lower overhead; only max RSS is reported)")
+        return parser
+
+    def phase(self, name):
+        """ابدأ مرحلة مسماة في تقرير --profile (لا شيء بدونه)."""
+        if self.profiler is not None:
+            self.profiler.phase(name)
+
+    def execute(self, *args, **options):
+        if not options.get("profile"):
+            return super().execute(*args, **options)
+        from geoeco.services.profiling import CommandProfiler
+
+        if options.get("stdout"):
+            self.stdout = OutputWrapper(options.pop("stdout"))
+        name = self.__module__.rsplit(".", 1)[-1]
+        out = self.stdout
+        self.profiler = CommandProfiler(name, interval=options["profile_interval"] / 1000, top=options["profile_top"],
+                                        memory=not options["profile_no_memory"])
+        self.stdout = _PhaseOutput(out, self.profiler)
+        try:
+            with self.profiler:
+                return super().execute(*args, **options)
+        finally:
+            self.stdout = out
+            report, paths = self.profiler.write(options["profile"])
+            self.profiler = None
+            self._write_profile_summary(report, paths)
+
+    def _write_profile_summary(self, report, paths):
+        def mib(n):
+            return "-" if n is None else f"{n / 2**20:.1f} MiB"
+
+        self.stdout.write(f"\nProfile: wall {report['wall_s']:.2f}s  cpu {report['cpu_s']:.2f}s  "
+                          f"peak {mib(report['peak_memory_bytes'])}  rss {mib(report['max_rss_bytes'])}  "
+                          f"sql {report['sql_queries']} ({report['sql_time_s']:.2f}s)")
+        for p in report["phases"]:
+            self.stdout.write(f"  {p['wall_s']:9.3f}s  sql={p['sql_queries']:<7} "
+                              f"peak={mib(p['peak_memory_bytes']):>11}  {p['name']}")
+        self.stdout.write(f"Profile written to {paths['json']} (+ .pstats, .collapsed)")
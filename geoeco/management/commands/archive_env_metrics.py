@@ -0,0 +1,23 @@
+# geoeco/management/commands/archive_env_metrics.py
+from geoeco.management.base import ProfiledCommand
+from geoeco.models import EnvArchive, EnvironmentalMetric
+from geoeco.services.env_partitions import maintain
+
+
+class Command(ProfiledCommand):
+    help = "Maintain yearly partitions of environmental readings and archive years past retention into compressed rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep_years", type=int, default=0, help="الافتراضي settings.ENV_RETENTION_YEARS")
+        parser.add_argument("--setup", action="store_true",
+                            help="حوّل الجدول إلى مقسّم حسب السنة (PostgreSQL/MySQL) — مرة واحدة")
+        parser.add_argument("--dry_run", action="store_true")
+
+    def handle(self, *args, **o):
+        self.stdout.write("Maintaining environmental partitions…")
+        done = maintain(keep_years=o["keep_years"] or None, setup=o["setup"],
+                        dry_run=o["dry_run"], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"Done ✅  years={len(done)}  readings={sum(n for _, _, n in done):,}  "
+            f"raw={EnvironmentalMetric.objects.count():,}  archives={EnvArchive.objects.count():,}"
+        ))
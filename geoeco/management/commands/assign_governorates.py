@@ -0,0 +1,37 @@
+import time
+
+from geoeco.geo.wilayat import assign_many, wilaya_index
+from geoeco.management.base import ProfiledCommand
+from geoeco.models import Site
+from geoeco.services.report_cube import refresh_cube
+from geoeco.services.env_rollups import refresh_env_rollups
+from geoeco.services.site_registry import bump_registry_version
+
+
+class Command(ProfiledCommand):
+    help = "Re-assign Site.governorate from wilaya polygons (WILAYA_BOUNDARY_FILE), nearest wilaya centroid as fallback."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry_run", action="store_true", help="report changes without saving")
+        parser.add_argument("--batch_size", type=int, default=2000)
+
+    def handle(self, *args, **o):
+        if wilaya_index() is None:
+            self.stdout.write(self.style.WARNING("WILAYA_BOUNDARY_FILE not set — using nearest centroids only."))
+        rows = list(Site.objects.values_list("id", "lat", "lon", "governorate"))
+        t0 = time.monotonic()
+        labels, matched = assign_many([(lat, lon) for _, lat, lon, _ in rows])
+        self.stdout.write(f"Assigned {len(rows)} site(s) in {time.monotonic() - t0:.2f}s "
+                          f"(polygons={matched}, centroid fallback={len(rows) - matched})")
+
+        changed = [Site(id=sid, governorate=gov) for (sid, _, _, old), (gov, _) in zip(rows, labels) if gov != old]
+        if o["dry_run"] or not changed:
+            self.stdout.write(self.style.SUCCESS(f"Done ✅  changed={len(changed)}{' (dry run)' if o['dry_run'] else ''}"))
+            return
+
+        Site.objects.bulk_update(changed, ["governorate"], batch_size=o["batch_size"])
+        bump_registry_version()  # bulk_update لا يُطلق إشارات
+        # المحافظة بُعد في المكعب والتجميعات: أعد بنائهما
+        refresh_cube()
+        refresh_env_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Done ✅  changed={len(changed)}"))
@@ -0,0 +1,79 @@
+# geoeco/management/commands/db_loadtest.py
+# اختبار حمل بسيط لكلفة الاتصال لكل طلب: يمرّر الطلبات عبر WSGIHandler الحقيقي
+# (بإشارات request_started/finished التي تغلق الاتصالات القديمة) ويعدّ الاتصالات الفعلية.
+import statistics
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.wsgi import WSGIHandler
+from geoeco.management.base import ProfiledCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+def _run(handler, urls, n):
+    opened = []
+
+    def on_created(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection_created.connect(on_created)
+    pool_cls = type(connections["default"])
+    pool_before = getattr(pool_cls, "pool_counters", dict)()
+    latencies = []
+    try:
+        for i in range(n):
+            environ = {"PATH_INFO": urls[i % len(urls)], "HTTP_HOST": "localhost", "REQUEST_METHOD": "GET"}
+            setup_testing_defaults(environ)
+            t0 = time.perf_counter()
+            response = handler(environ, lambda status, headers: None)
+            b"".join(response)
+            response.close()  # request_finished -> close_old_connections
+            latencies.append((time.perf_counter() - t0) * 1000)
+    finally:
+        connection_created.disconnect(on_created)
+        connections.close_all()
+
+    pool_after = getattr(pool_cls, "pool_counters", dict)()
+    physical = pool_after.get("created", 0) - pool_before.get("created", 0) if pool_after else len(opened)
+    latencies.sort()
+    return {
+        "requests": n,
+        "connects": len(opened),
+        "physical_connections": physical,
+        "per_request": physical / n if n else 0,
+        "mean_ms": statistics.fmean(latencies) if latencies else 0,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0,
+    }
+
+
+class Command(ProfiledCommand):
+    help = "Measure per-request DB connection overhead (reconnect-per-request vs. configured persistence/pooling)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--url", action="append", default=[], help="يمكن تكراره (الافتراضي: /dashboard/ و /api/cube/)")
+        parser.add_argument("--compare", action="store_true", help="قارن مع CONN_MAX_AGE=0 (اتصال جديد لكل طلب)")
+
+    def handle(self, *args, **o):
+        urls = o["url"] or ["/dashboard/", "/api/cube/"]
+        handler = WSGIHandler()
+        settings_dict = connections["default"].settings_dict
+        configured = settings_dict["CONN_MAX_AGE"]
+
+        modes = []
+        if o["compare"]:
+            modes.append(("reconnect (CONN_MAX_AGE=0)", 0))
+        modes.append((f"configured (CONN_MAX_AGE={configured}, ENGINE={settings_dict['ENGINE']})", configured))
+
+        for label, max_age in modes:
+            settings_dict["CONN_MAX_AGE"] = max_age
+            connections.close_all()
+            r = _run(handler, urls, o["requests"])
+            self.stdout.write(
+                f"{label}\n"
+                f"  requests={r['requests']}  physical connections={r['physical_connections']} "
+                f"({r['per_request']:.3f}/request)  connects={r['connects']}\n"
+                f"  latency mean={r['mean_ms']:.2f} ms  p95={r['p95_ms']:.2f} ms"
+            )
+        settings_dict["CONN_MAX_AGE"] = configured
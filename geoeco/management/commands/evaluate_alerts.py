@@ -0,0 +1,28 @@
+# geoeco/management/commands/evaluate_alerts.py
+from geoeco.management.base import ProfiledCommand
+from geoeco.services.alert_rules import ALERT_RULES, evaluate_alert_rules
+
+
+class Command(ProfiledCommand):
+    help = "Evaluate threshold/trend/license alert rules over all sites in one pass and create deduplicated alerts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rules", type=str, default="", help="رموز القواعد مفصولة بفواصل (الافتراضي: الكل)")
+        parser.add_argument("--dedup_days", type=int, default=7)
+        parser.add_argument("--dry_run", action="store_true")
+
+    def handle(self, *args, **o):
+        rules = ALERT_RULES
+        if o["rules"]:
+            codes = {c.strip() for c in o["rules"].split(",") if c.strip()}
+            rules = [r for r in ALERT_RULES if r["code"] in codes]
+
+        created = evaluate_alert_rules(rules, dedup_days=o["dedup_days"], dry_run=o["dry_run"])
+
+        by_rule = {}
+        for a in created:
+            by_rule[a.rule] = by_rule.get(a.rule, 0) + 1
+        for code, n in sorted(by_rule.items()):
+            self.stdout.write(f"  {code}: {n}")
+        verb = "Would create" if o["dry_run"] else "Created"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(created)} alert(s) ✅"))
@@ -1,10 +1,14 @@
 # geoeco/management/commands/generate_bulk_data.py
 import random
 from datetime import date, datetime, timedelta
-from django.core.management.base import BaseCommand
+from geoeco.management.base import ProfiledCommand
 from django.utils import timezone
 from django.db import transaction
-from geoeco.models import Company, Mineral, Site, ProductionMetric, EnvironmentalMetric, License, Alert
+from geoeco.models import Company, Mineral, Site, ProductionMetric, EnvironmentalMetric, License, Alert, EnvRollup, CubeCell, HotspotStat, ForecastRun
+from geoeco.services.bulk_reset import BulkResetter
+from geoeco.services.change_capture import mark_sites_dirty
+from geoeco.services.env_partitions import partitions
+from geoeco.services.site_registry import bump_registry_version
 
 GOVS = [
     "Muscat", "Dhofar", "Al Wusta", "Al Buraimi", "Al Dhahirah",
@@ -24,7 +28,7 @@ def rand_coord(governorate: str):
     lon = random.uniform(52.0, 59.9)
     return round(lat, 6), round(lon, 6)
 
-class Command(BaseCommand):
+class Command(ProfiledCommand):
     help = "Generate a large synthetic dataset for GeoEco Tracker"
 
     def add_arguments(self, parser):
@@ -35,26 +39,31 @@ class Command(BaseCommand):
         parser.add_argument("--alerts_per_site", type=int, default=2)
         parser.add_argument("--seed", type=int, default=2025)
         parser.add_argument("--wipe", action="store_true", help="delete ALL existing demo data first")
+        parser.add_argument("--delete_chunk", type=int, default=50_000, help="id-range size per DELETE when wiping")
+        parser.add_argument("--no_truncate", action="store_true", help="never use TRUNCATE, even on Postgres/MySQL")
 
-    @transaction.atomic
     def handle(self, *args, **opts):
+        if opts["wipe"]:
+            # المسح خارج معاملة التوليد: نطاقات id محدودة أو TRUNCATE
+            self.stdout.write(self.style.WARNING("Wiping existing demo data..."))
+            BulkResetter(
+                chunk_size=opts["delete_chunk"],
+                use_truncate=not opts["no_truncate"],
+                log=self.stdout.write,
+            ).reset([Site, Company, Mineral, ForecastRun], extra_models=[EnvRollup, CubeCell, HotspotStat])
+            partitions().reset()  # جداول الظل (SQLite) خارج ORM
+            bump_registry_version()  # المسح الخام لا يُطلق إشارات
+
+        self.generate(opts)
+
+    @transaction.atomic
+    def generate(self, opts):
         random.seed(opts["seed"])
         companies_n = opts["companies"]
         sites_n = opts["sites"]
         years_n = opts["years"]
         monthly_n = opts["monthly_readings"]
         alerts_n = opts["alerts_per_site"]
-        wipe = opts["wipe"]
-
-        if wipe:
-            self.stdout.write(self.style.WARNING("Wiping existing demo data..."))
-            Alert.objects.all().delete()
-            EnvironmentalMetric.objects.all().delete()
-            ProductionMetric.objects.all().delete()
-            License.objects.all().delete()
-            Site.objects.all().delete()
-            Company.objects.all().delete()
-            Mineral.objects.all().delete()
 
         # Minerals
         minerals = {}
@@ -104,39 +113,34 @@ class Command(BaseCommand):
                 expires_on=expires,
             )
 
-        # Production per year
-        self.stdout.write("Creating production metrics...")
+        # Production per year + environmental metrics: مصفوفات NumPy (مواقع × سنوات/أشهر) دفعة واحدة
+        from geoeco.services import synthetic  # NumPy عند الحاجة فقط
+
+        self.stdout.write("Creating production + environmental metrics...")
         current_year = date.today().year
+        bases = []
         for s in all_sites:
             base = random.uniform(200, 1_500_000)  # tons or kg depending on mineral
             # أبقِ الذهب أصغر حجمًا
             if s.mineral.unit == "kg":
                 base = random.uniform(5, 2_000)
-
-            for k in range(years_n):
-                y = current_year - k
-                # نمو/انكماش طفيف
-                q = max(0, random.gauss(base * (1 - k * 0.02), base * 0.1))
-                ProductionMetric.objects.update_or_create(
-                    site=s, year=y, defaults={"quantity": round(q, 2)}
-                )
-
-        # Environmental metrics (monthly_n أحدث قراءات شهرية تقريبًا لكل موقع)
-        self.stdout.write("Creating environmental metrics...")
-        for s in all_sites:
-            start_dt = timezone.now() - timedelta(days=30 * monthly_n)
-            for m in range(monthly_n):
-                dt = start_dt + timedelta(days=30 * m + random.randint(0, 5))
-                aqi = max(20, min(120, random.gauss(55 if s.sustainability_band == "green" else (70 if s.sustainability_band == "yellow" else 85), 10)))
-                tds = max(300, min(1600, random.gauss(550 if s.sustainability_band == "green" else (800 if s.sustainability_band == "yellow" else 1050), 120)))
-                rehab = max(0, min(100, random.gauss(60 if s.status == "active" else 30, 20)))
-                EnvironmentalMetric.objects.create(
-                    site=s,
-                    date=dt.date(),
-                    air_quality_index=round(aqi, 1),
-                    water_tds=round(tds, 1),
-                    rehabilitation_progress=round(rehab, 1),
-                )
+            bases.append(base)
+
+        aqi_base, tds_base, rehab_base = synthetic.bulk_env_baselines(
+            [s.sustainability_band for s in all_sites], [s.status for s in all_sites],
+        )
+        start_date = (timezone.now() - timedelta(days=30 * monthly_n)).date()
+        series = synthetic.site_series(
+            synthetic.np.random.default_rng(opts["seed"]),
+            [s.id for s in all_sites], bases, aqi_base, tds_base, rehab_base,
+            years_n=years_n, current_year=current_year,
+            monthly_n=monthly_n, start_ordinal=start_date.toordinal(),
+            production_spec=synthetic.BULK_PRODUCTION_SPEC, env_spec=synthetic.BULK_ENV_SPEC,
+        )
+        synthetic.store_series(series)
+        # التحميل الجماعي لا يُطلق إشارات post_save
+        site_ids = [s.id for s in all_sites]
+        mark_sites_dirty(site_ids, env_since=dict.fromkeys(site_ids, start_date))
 
         # Alerts
         self.stdout.write("Creating alerts...")
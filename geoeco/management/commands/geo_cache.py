@@ -0,0 +1,31 @@
+import sqlite3
+from contextlib import closing
+
+from django.conf import settings
+from geoeco.geo.geocache import clear_all
+from geoeco.management.base import ProfiledCommand
+
+
+class Command(ProfiledCommand):
+    help = "Show or clear the persistent geo lookup cache (GEO_CACHE_PATH)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="drop all cached geo results on disk")
+
+    def handle(self, *args, **o):
+        path = settings.GEO_CACHE_PATH
+        if not path:
+            self.stdout.write("GEO_CACHE_PATH not set — geo results are cached in memory only.")
+            return
+        if o["clear"]:
+            clear_all(disk=True)
+            self.stdout.write(self.style.SUCCESS(f"Done ✅  cleared {path}"))
+            return
+        try:
+            with closing(sqlite3.connect(path)) as conn:
+                rows = conn.execute("SELECT ns, COUNT(*) FROM geo_cache GROUP BY ns ORDER BY ns").fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        for ns, n in rows:
+            self.stdout.write(f"{ns:<60} {n}")
+        self.stdout.write(self.style.SUCCESS(f"Done ✅  namespaces={len(rows)}  entries={sum(n for _, n in rows)}"))
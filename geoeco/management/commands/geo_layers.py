@@ -0,0 +1,32 @@
+import os
+
+from django.core.management.base import CommandError
+
+from geoeco.geo.boundaries import LAYER_SOURCES, ZOOMS, get_layer
+from geoeco.management.base import ProfiledCommand
+
+
+class Command(ProfiledCommand):
+    help = "Build the simplified boundary layers and report vertices/bytes per zoom (optionally write .geojson.gz files)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--layer", action="append", help=f"one of {', '.join(LAYER_SOURCES)} (default: all)")
+        parser.add_argument("--out", default="", help="directory for <layer>_z<zoom>.geojson.gz files")
+
+    def handle(self, *args, **o):
+        names = o["layer"] or list(LAYER_SOURCES)
+        unknown = [n for n in names if n not in LAYER_SOURCES]
+        if unknown:
+            raise CommandError(f"Unknown layer(s): {', '.join(unknown)}")
+        if o["out"]:
+            os.makedirs(o["out"], exist_ok=True)
+        for name in names:
+            layer = get_layer(name)
+            full = sum(r.vertices() for r in layer.regions)
+            self.stdout.write(f"{name}: {len(layer.regions)} region(s), {full} vertices")
+            for z in ZOOMS:
+                self.stdout.write(f"  z{z:<2} vertices={layer.vertices[z]:<8} gzip={len(layer.gz[z])} B")
+                if o["out"]:
+                    with open(os.path.join(o["out"], f"{name}_z{z}.geojson.gz"), "wb") as fh:
+                        fh.write(layer.gz[z])
+        self.stdout.write(self.style.SUCCESS("Done ✅"))
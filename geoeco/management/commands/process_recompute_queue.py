@@ -0,0 +1,43 @@
+# geoeco/management/commands/process_recompute_queue.py
+import time
+
+from geoeco.management.base import ProfiledCommand
+from geoeco.services.recompute import drain_queue
+
+
+class Command(ProfiledCommand):
+    help = "Recompute forecasts & band only for sites whose metrics changed (micro-batches from the recompute queue)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--years_ahead", type=int, default=3)
+        parser.add_argument("--months_ahead", type=int, default=6)
+        parser.add_argument("--batch_size", type=int, default=200)
+        parser.add_argument("--debounce", type=float, default=5.0, help="ثوانٍ من الهدوء قبل معالجة الموقع")
+        parser.add_argument("--max_wait", type=float, default=60.0, help="أقصى انتظار لموقع تتوالى كتاباته")
+        parser.add_argument("--no_alerts", action="store_true", help="لا تُقيّم قواعد التنبيه بعد كل دفعة")
+        parser.add_argument("--loop", action="store_true", help="استمر بالعمل كعامل (worker)")
+        parser.add_argument("--interval", type=float, default=2.0, help="فترة الاستطلاع في وضع --loop")
+
+    def handle(self, *args, **o):
+        kwargs = dict(
+            batch_size=o["batch_size"],
+            debounce_seconds=o["debounce"],
+            max_wait_seconds=o["max_wait"],
+            years_ahead=o["years_ahead"],
+            months_ahead=o["months_ahead"],
+            alerts=not o["no_alerts"],
+        )
+        if not o["loop"]:
+            n = drain_queue(**kwargs)
+            self.stdout.write(self.style.SUCCESS(f"Recomputed {n} site(s) ✅"))
+            return
+
+        self.stdout.write("Watching recompute queue… (Ctrl+C to stop)")
+        try:
+            while True:
+                n = drain_queue(**kwargs)
+                if n:
+                    self.stdout.write(f"Recomputed {n} site(s)")
+                time.sleep(o["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("Stopped."))
@@ -0,0 +1,92 @@
+# geoeco/management/commands/profile_startup.py
+# قياس زمن الاستيراد لكل وحدة عند إقلاع نقطة دخول الويب (python -X importtime)
+# في عملية منفصلة نظيفة، حتى لا تؤثر الوحدات المحمّلة في هذه العملية على النتيجة.
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from geoeco.management.base import ProfiledCommand
+
+# وحدات يجب ألا تظهر في إقلاع عامل الويب
+HEAVY_PACKAGES = ("numpy", "statsmodels", "scipy", "pandas")
+
+
+def parse_importtime(stderr):
+    """أسطر -X importtime -> قائمة (module, self_us, cumulative_us, depth)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cum_us), depth))
+    return rows
+
+
+class Command(ProfiledCommand):
+    help = "Report per-module import time for the web entry point (default: geoecotracker.wsgi)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", type=str, default="geoecotracker.wsgi")
+        parser.add_argument("--no_urls", action="store_true",
+                            help="لا تستورد ROOT_URLCONF (تُحمَّل عادةً مع أول طلب ومعها كل views)")
+        parser.add_argument("--top", type=int, default=25)
+        parser.add_argument("--json", type=str, default="", help="اكتب التقرير الكامل إلى ملف JSON")
+
+    def handle(self, *args, **o):
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", "geoecotracker.settings")
+        code = f"import {o['module']}"
+        if not o["no_urls"]:
+            code += f"; import {settings.ROOT_URLCONF}"
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True,
+        )
+        wall_ms = (time.perf_counter() - t0) * 1000
+        rows = parse_importtime(proc.stderr)
+        if proc.returncode != 0:
+            raise CommandError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+
+        total_us = sum(cum for _, _, cum, depth in rows if depth == 0)
+        by_package = defaultdict(int)
+        for name, self_us, _, _ in rows:
+            by_package[name.split(".")[0]] += self_us
+        heavy = sorted({name.split(".")[0] for name, _, _, _ in rows} & set(HEAVY_PACKAGES))
+
+        self.stdout.write(f"{o['module']}: {len(rows)} modules, import {total_us / 1000:.1f} ms "
+                          f"(process wall {wall_ms:.1f} ms)")
+        self.stdout.write(f"\nTop {o['top']} by cumulative time:")
+        for name, self_us, cum_us, _ in sorted(rows, key=lambda r: -r[2])[:o["top"]]:
+            self.stdout.write(f"  {cum_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f})  {name}")
+        self.stdout.write(f"\nTop {o['top']} packages by self time:")
+        for pkg, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:o["top"]]:
+            self.stdout.write(f"  {us / 1000:9.1f} ms  {pkg}")
+
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"\nHeavy packages loaded at startup: {', '.join(heavy)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nNo heavy numeric packages at startup ✅"))
+
+        if o["json"]:
+            report = {
+                "module": o["module"],
+                "total_ms": total_us / 1000,
+                "wall_ms": wall_ms,
+                "heavy_packages": heavy,
+                "modules": [{"name": n, "self_us": s, "cumulative_us": c, "depth": d} for n, s, c, d in rows],
+                "packages": dict(sorted(by_package.items(), key=lambda kv: -kv[1])),
+            }
+            with open(o["json"], "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Report written to {o['json']}")
@@ -0,0 +1,12 @@
+# geoeco/management/commands/rebuild_cube.py
+from geoeco.management.base import ProfiledCommand
+from geoeco.services.report_cube import refresh_cube
+
+
+class Command(ProfiledCommand):
+    help = "Rebuild the governorate × mineral × year × band reporting cube."
+
+    def handle(self, *args, **o):
+        self.stdout.write("Rebuilding reporting cube…")
+        n = refresh_cube()
+        self.stdout.write(self.style.SUCCESS(f"Done ✅  cells={n}"))
@@ -0,0 +1,21 @@
+# geoeco/management/commands/rebuild_env_rollups.py
+import datetime
+
+from geoeco.management.base import ProfiledCommand
+from geoeco.models import EnvRollup
+from geoeco.services.env_rollups import refresh_env_rollups
+
+
+class Command(ProfiledCommand):
+    help = "Rebuild monthly/quarterly environmental rollups (site, governorate, mineral)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=str, default="", help="YYYY-MM-DD: أعد بناء الفترات ابتداءً من هذا التاريخ فقط")
+
+    def handle(self, *args, **o):
+        since = datetime.date.fromisoformat(o["since"]) if o["since"] else None
+        self.stdout.write("Rebuilding environmental rollups…")
+        written = refresh_env_rollups(since=since)
+        self.stdout.write(self.style.SUCCESS(
+            f"Done ✅  written={written}  total={EnvRollup.objects.count()}"
+        ))
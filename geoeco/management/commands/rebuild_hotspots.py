@@ -0,0 +1,11 @@
+from geoeco.management.base import ProfiledCommand
+from geoeco.services.hotspots import rebuild_hotspots
+
+
+class Command(ProfiledCommand):
+    help = "Rebuild hotspot membership (vectorized point-in-polygon) and per-hotspot statistics."
+
+    def handle(self, *args, **o):
+        self.stdout.write("Rebuilding hotspot membership & statistics…")
+        members, cells = rebuild_hotspots()
+        self.stdout.write(self.style.SUCCESS(f"Done ✅  memberships={members}  cells={cells}"))
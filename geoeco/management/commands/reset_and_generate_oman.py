@@ -2,17 +2,23 @@
 import math
 import json
 import random
+import tempfile
 from collections import defaultdict
 from datetime import date, timedelta
 
-from django.core.management.base import BaseCommand
+from geoeco.management.base import ProfiledCommand
 from django.utils import timezone
 from django.db import transaction
 
 from geoeco.models import (
     Company, Mineral, Site,
-    ProductionMetric, EnvironmentalMetric, License, Alert
+    ProductionMetric, EnvironmentalMetric, License, Alert,
+    EnvRollup, CubeCell, HotspotStat, ForecastRun,
 )
+from geoeco.services.bulk_reset import BulkResetter
+from geoeco.services.change_capture import mark_sites_dirty
+from geoeco.services.env_partitions import partitions
+from geoeco.services.site_registry import bump_registry_version
 
 # مضلعات المناطق الواعدة + مولّد نقطة داخل المضلع
 from geoeco.geo.oman_hotspots import (
@@ -24,7 +30,10 @@ from geoeco.geo.oman_hotspots import (
 from geoeco.geo.oman_polygon import point_in_oman
 
 # إسناد المحافظة/الولاية من الإحداثيات (أقرب سنترُويد لولاية)
-from geoeco.geo.oman_admin import assign_wilaya_from_point
+from geoeco.geo.wilayat import assign_governorate
+from geoeco.geo.geocache import cache_stats
+# أهداف الإنتاج الوطنية التي تُعايَر عليها المجاميع (مشتركة مع مكعب التقارير)
+from geoeco.geo.oman_targets import DEFAULT_TARGETS_TONNES, DEFAULT_TARGETS_KG
 
 
 # أسماء المحافظات (للاستخدام العام عند الحاجة)
@@ -47,21 +56,6 @@ GLOBAL_MINERAL_WEIGHTS = {
     "Limestone": 1.60, "Silica": 1.00, "Dolomite": 0.85, "Manganese": 0.55,
 }
 
-# أهداف وطنية تقريبية سنوية (بالطن) لمعادلة المجاميع
-DEFAULT_TARGETS_TONNES = {
-    "Limestone": 25_000_000,
-    "Gypsum":    10_000_000,
-    "Silica":     1_000_000,
-    "Dolomite":     800_000,
-    "Manganese":    150_000,
-    "Chromite":     900_000,
-    "Copper":       200_000,
-}
-# الذهب بالكيلوغرام
-DEFAULT_TARGETS_KG = {
-    "Gold": 1_500,  # 1.5 طن ≈ 1500 كغ
-}
-
 # حدود مبدئية لإنتاج الموقع الواحد قبل التسوية (لكل سنة أحدث)
 INITIAL_PER_SITE_RANGES = {
     "Limestone": (80_000, 450_000),
@@ -75,6 +69,10 @@ INITIAL_PER_SITE_RANGES = {
 }
 
 
+# جداول مشتقة بلا FK إلى Site: تُمسح مع البيانات حتى لا تبقى ملخصات قديمة
+DERIVED_MODELS = [EnvRollup, CubeCell, HotspotStat]
+
+
 # ======= أدوات مساعدة =======
 
 def haversine_km(lat1, lon1, lat2, lon2):
@@ -97,7 +95,7 @@ def place_points_spread(poly, target_n, min_km, max_tries=8000):
         tries += 1
         la, lo = random_point_in_polygon(poly)
         # لا بحر ولا خارج الحدود
-        if not point_in_oman(la, lo):
+        if not point_in_oman.uncached(la, lo):  # مرشحات عشوائية: بلا تخزين مؤقت
             continue
         # شرط التباعد الأدنى
         if all(haversine_km(la, lo, a, b) >= min_km for (a, b) in pts):
@@ -112,7 +110,7 @@ def rand_range(a, b):
 
 # ======= أمر الإدارة =======
 
-class Command(BaseCommand):
+class Command(ProfiledCommand):
     help = "Regenerate realistic Oman sites (land only), spaced-out, wilaya-mapped, and production calibrated to national targets."
 
     def add_arguments(self, parser):
@@ -126,14 +124,13 @@ class Command(BaseCommand):
         parser.add_argument("--min_km", type=float, default=10.0, help="أقل مسافة بين موقعين داخل نفس المضلع (كم)")
         parser.add_argument("--per_poly_floor", type=int, default=12, help="حد أدنى للمواقع لكل مضلع Hotspot")
         parser.add_argument("--targets-json", type=str, default="", help="JSON لتخصيص الأهداف الوطنية (tonnes/kg)")
+        parser.add_argument("--delete_chunk", type=int, default=50_000, help="حجم نطاق id لكل DELETE عند المسح")
+        parser.add_argument("--no_truncate", action="store_true", help="لا تستخدم TRUNCATE حتى على Postgres/MySQL")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="توليد السلاسل في N عمليات (بذور مشتقة من --seed)؛ 1 = داخل العملية نفسها")
+        parser.add_argument("--batch_size", type=int, default=5000, help="حجم دفعة التحميل الجماعي للقياسات (executemany)")
 
-    @transaction.atomic
     def handle(self, *args, **o):
-        random.seed(o["seed"])
-        sites_n = o["sites"]; companies_n = o["companies"]
-        years_n = o["years"]; monthly_n = o["monthly"]; alerts_n = o["alerts"]
-        min_km = o["min_km"]; per_poly_floor = o["per_poly_floor"]
-
         # تحميل أهداف وطنية مخصّصة إن وُجدت
         targets_tonnes = DEFAULT_TARGETS_TONNES.copy()
         targets_kg = DEFAULT_TARGETS_KG.copy()
@@ -145,18 +142,28 @@ class Command(BaseCommand):
             except Exception:
                 self.stdout.write(self.style.WARNING("لم يُفك ترميز --targets-json؛ سيتم استخدام القيم الافتراضية."))
 
-        # مسح البيانات القديمة
+        # مسح البيانات القديمة: خارج معاملة التوليد، بنطاقات محدودة أو TRUNCATE
         self.stdout.write(self.style.WARNING("Deleting ALL sites & related data…"))
-        Alert.objects.all().delete()
-        EnvironmentalMetric.objects.all().delete()
-        ProductionMetric.objects.all().delete()
-        License.objects.all().delete()
-        Site.objects.all().delete()
-
+        roots = [Site, ForecastRun]  # دفعات التوقع تُمسح مع صفوفها
         # اختيارياً مسح الشركات/المعادن
         if o["wipe_companies"]:
-            Company.objects.all().delete()
-            Mineral.objects.all().delete()
+            roots += [Company, Mineral]
+        BulkResetter(
+            chunk_size=o["delete_chunk"],
+            use_truncate=not o["no_truncate"],
+            log=self.stdout.write,
+        ).reset(roots, extra_models=DERIVED_MODELS)
+        partitions().reset()  # جداول الظل (SQLite) خارج ORM
+        bump_registry_version()  # المسح الخام لا يُطلق إشارات
+
+        self.generate(o, targets_tonnes, targets_kg)
+
+    @transaction.atomic
+    def generate(self, o, targets_tonnes, targets_kg):
+        random.seed(o["seed"])
+        sites_n = o["sites"]; companies_n = o["companies"]
+        alerts_n = o["alerts"]
+        min_km = o["min_km"]; per_poly_floor = o["per_poly_floor"]
 
         # معادن/شركات
         minerals = {}
@@ -228,7 +235,7 @@ class Command(BaseCommand):
                 mineral = minerals[mineral_name]
 
                 # ⬅️ إسناد المحافظة/الولاية من الإحداثيات
-                governorate, wilaya = assign_wilaya_from_point(lat, lon)
+                governorate, wilaya = assign_governorate(lat, lon)
 
                 # حالة واستدامة
                 status = random.choices(["active","proposed","closed"], weights=[0.64, 0.31, 0.05])[0]
@@ -291,60 +298,8 @@ class Command(BaseCommand):
                 target = float(targets_tonnes.get(mname, total_latest))
             factor_by_mineral[mname] = max(0.1, target / total_latest)
 
-        # إنشاء السلاسل الزمنية السنوية بعد التسوية (انحدار بسيط للخلف + ضجيج خفيف)
-        for s in created_sites:
-            mname = s.mineral.name
-            f = factor_by_mineral[mname]
-            base_latest = site_latest_values[s.id] * f
-
-            for k in range(years_n):
-                y = current_year - k
-                drift = (1 - 0.012 * k)             # تناقص طفيف كل سنة
-                noise = random.gauss(1.0, 0.08)      # ضجيج بسيط
-                val = max(0, base_latest * drift * noise)
-                ProductionMetric.objects.create(
-                    site=s, year=y,
-                    quantity=round(val, 2)
-                )
-
-        # قياسات بيئية شهرية واقعية بحسب الخام وشريحة الاستدامة
-        self.stdout.write("Generating environmental metrics…")
-        for s in created_sites:
-            start = timezone.now() - timedelta(days=30 * monthly_n)
-
-            # أساسات حسب نوع الخام
-            if s.mineral.name in ("Limestone","Gypsum","Silica","Dolomite"):
-                aqi_base0 = 55
-                tds_base0 = 560
-            elif s.mineral.name in ("Copper","Chromite","Manganese"):
-                aqi_base0 = 65
-                tds_base0 = 760
-            else:  # Gold
-                aqi_base0 = 60
-                tds_base0 = 700
-
-            # تعديل حسب شريحة الاستدامة
-            if s.sustainability_band == "green":
-                aqi_base = aqi_base0 - 5
-                tds_base = tds_base0 - 40
-            elif s.sustainability_band == "yellow":
-                aqi_base = aqi_base0 + 5
-                tds_base = tds_base0 + 60
-            else:  # red
-                aqi_base = aqi_base0 + 15
-                tds_base = tds_base0 + 160
-
-            rehab = 68 if s.status == "active" else 35
-
-            for m in range(monthly_n):
-                dt = start + timedelta(days=30 * m + random.randint(0, 5))
-                EnvironmentalMetric.objects.create(
-                    site=s,
-                    date=dt.date(),
-                    air_quality_index=round(max(20, min(135, random.gauss(aqi_base, 8))), 1),
-                    water_tds=round(max(300, min(1700, random.gauss(tds_base, 100))), 1),
-                    rehabilitation_progress=round(max(0, min(100, random.gauss(rehab, 16))), 1),
-                )
+        # السلاسل الزمنية بعد التسوية: مصفوفات NumPy (انحدار بسيط للخلف + ضجيج، قياسات شهرية مقصوصة)
+        self.generate_series(o, created_sites, site_latest_values, factor_by_mineral, current_year)
 
         # تنبيهات بسيطة
         self.stdout.write("Generating alerts…")
@@ -370,3 +325,40 @@ class Command(BaseCommand):
             f"Env={EnvironmentalMetric.objects.count()}  "
             f"Alerts={Alert.objects.count()}"
         ))
+        for name, st in cache_stats().items():
+            if st["hits"] or st["misses"]:
+                self.stdout.write(f"  geo cache {name}: hits={st['hits']} misses={st['misses']} "
+                                  f"evictions={st['evictions']} disk_loaded={st['disk_loaded']}")
+
+    def generate_series(self, o, created_sites, site_latest_values, factor_by_mineral, current_year):
+        """الإنتاج والقياسات البيئية في --workers شرائح، ثم تحميل جماعي بترتيب الشرائح."""
+        # NumPy يُستورد هنا فقط
+        from geoeco.services import synthetic
+
+        years_n = o["years"]; monthly_n = o["monthly"]
+        workers = max(1, o["workers"])
+        aqi_base, tds_base, rehab_base = synthetic.oman_env_baselines(
+            [s.mineral.name for s in created_sites],
+            [s.sustainability_band for s in created_sites],
+            [s.status for s in created_sites],
+        )
+        start_date = (timezone.now() - timedelta(days=30 * monthly_n)).date()
+
+        self.stdout.write(f"Generating production + environmental series in {workers} shard(s)…")
+        with tempfile.TemporaryDirectory(prefix="geoeco_shards_") as out_dir:
+            tasks = synthetic.build_tasks(
+                seed=o["seed"], workers=workers,
+                site_ids=[s.id for s in created_sites],
+                base_latest=[site_latest_values[s.id] * factor_by_mineral[s.mineral.name] for s in created_sites],
+                aqi_base=aqi_base, tds_base=tds_base, rehab_base=rehab_base,
+                years_n=years_n, current_year=current_year,
+                monthly_n=monthly_n, start_ordinal=start_date.toordinal(),
+                out_dir=out_dir,
+            )
+            for path in synthetic.run_shards(tasks, workers):
+                with synthetic.np.load(path) as d:
+                    synthetic.store_series(dict(d), batch_size=o["batch_size"])
+
+        # التحميل الجماعي لا يُطلق إشارات post_save: سجّل المواقع لإعادة الحساب يدويًا
+        site_ids = [s.id for s in created_sites]
+        mark_sites_dirty(site_ids, env_since=dict.fromkeys(site_ids, start_date))
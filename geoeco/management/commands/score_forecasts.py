@@ -0,0 +1,21 @@
+# geoeco/management/commands/score_forecasts.py
+from geoeco.management.base import ProfiledCommand
+from geoeco.services.forecast_accuracy import ACCURACY_CHUNK, accuracy_summary, refresh_accuracy, reset_accuracy
+
+
+class Command(ProfiledCommand):
+    help = "Score past forecast runs against the actuals that have arrived since the last scoring."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Drop stored accuracy and rescore from scratch")
+        parser.add_argument("--chunk_size", type=int, default=ACCURACY_CHUNK, help="Sites per scoring batch")
+
+    def handle(self, *args, **o):
+        if o["rebuild"]:
+            self.stdout.write(f"Dropped {reset_accuracy()} accuracy rows")
+        n = refresh_accuracy(chunk_size=o["chunk_size"])
+        self.stdout.write(f"Scored {n} new forecast points")
+        for r in accuracy_summary(("target", "model")):
+            self.stdout.write(f"  {r['target']:<10} {r['model'] or '-':<15} points={r['points']:<8} "
+                              f"mape={r['mape']} wape={r['wape']} cov80={r['coverage80']} cov95={r['coverage95']}")
+        self.stdout.write(self.style.SUCCESS("Forecast accuracy updated ✅"))
@@ -1,10 +1,10 @@
 
-from django.core.management.base import BaseCommand
+from geoeco.management.base import ProfiledCommand
 from django.core.management import call_command
 from django.conf import settings
 from pathlib import Path
 
-class Command(BaseCommand):
+class Command(ProfiledCommand):
     help = "Load demo dataset for GeoEco Tracker"
 
     def handle(self, *args, **options):
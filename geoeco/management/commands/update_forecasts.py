@@ -1,45 +1,50 @@
 # geoeco/management/commands/update_forecasts.py
-from django.core.management.base import BaseCommand
-from geoeco.models import Site
-from geoeco.services.ai_forecast import run_site_forecasts
-from geoeco.services.band_logic import band_from_env
-from geoeco.models import EnvironmentalMetric
+from geoeco.management.base import ProfiledCommand
+from geoeco.services.ai_forecast import FORECAST_CHUNK, current_run_id, run_forecasts
+from geoeco.services.forecast_accuracy import refresh_accuracy
+from geoeco.services.hotspots import refresh_hotspot_stats
+from geoeco.services.recompute import recalc_all_bands
+from geoeco.services.report_cube import refresh_cube
 
 class BaseBandException(Exception):
     pass
 
-class Command(BaseCommand):
+class Command(ProfiledCommand):
     help = "Update AI forecasts (production & environment) and recalc sustainability band."
 
     def add_arguments(self, parser):
         parser.add_argument("--years_ahead", type=int, default=3)
         parser.add_argument("--months_ahead", type=int, default=6)
         parser.add_argument("--recalc_band", action="store_true", help="Recalculate band from latest env metrics")
+        parser.add_argument("--chunk_size", type=int, default=FORECAST_CHUNK, help="Sites per backtest batch")
+        parser.add_argument("--workers", type=int, default=1, help="Processes for model-selection backtests")
 
     def handle(self, *args, **o):
         years_ahead = o["years_ahead"]
         months_ahead = o["months_ahead"]
         recalc_band = o["recalc_band"]
 
-        sites = Site.objects.all()
-        for s in sites:
-            run_site_forecasts(s, years_ahead=years_ahead, months_ahead=months_ahead)
-
-            if recalc_band:
-                latest = (EnvironmentalMetric.objects
-                          .filter(site=s)
-                          .order_by('-date')
-                          .values('air_quality_index','water_tds','rehabilitation_progress')
-                          .first())
-                if latest:
-                    score, band = band_from_env(
-                        latest["air_quality_index"],
-                        latest["water_tds"],
-                        latest["rehabilitation_progress"],
-                        s.status
-                    )
-                    if s.sustainability_band != band:
-                        s.sustainability_band = band
-                        s.save(update_fields=["sustainability_band"])
+        # القيم الفعلية الجديدة تُقاس على الدفعات السابقة قبل أن يقلّم النشر أقدمها
+        self.phase("Scoring past forecasts")
+        self.stdout.write(f"Scored {refresh_accuracy()} new forecast points")
+
+        self.phase("Selecting models and forecasting")
+        # اختيار النموذج بالاختبار الرجعي لكل المواقع على دفعات متجهة، تحت دفعة (ForecastRun) جديدة
+        winners = run_forecasts(years_ahead=years_ahead, months_ahead=months_ahead,
+                                chunk_size=o["chunk_size"], workers=o["workers"])
+        self.stdout.write(f"Published forecast run #{current_run_id()}")
+        for target in ("production", "aqi", "tds", "rehab"):
+            picked = sorted(((n, m) for (t, m), n in winners.items() if t == target), reverse=True)
+            if picked:
+                self.stdout.write(f"  {target}: " + ", ".join(f"{m}={n}" for n, m in picked))
+
+        if recalc_band:
+            self.phase("Recalculating bands")
+            self.stdout.write(f"Changed band of {recalc_all_bands()} site(s)")
+            # الشرائح تغيّرت: خلايا المكعب ومجاميع المضلعات تُعاد بناؤها (استعلامات GROUP BY قليلة)
+            self.phase("Refreshing reporting cube")
+            refresh_cube()
+            self.phase("Refreshing hotspot stats")
+            refresh_hotspot_stats()
 
         self.stdout.write(self.style.SUCCESS("Forecasts updated ✅"))
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0003_forecastenvironment_forecastproduction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteRecomputeQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_touched_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('site', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recompute_entry', to='geoeco.site')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0004_siterecomputequeue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='rule',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=50),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0005_alert_rule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='siterecomputequeue',
+            name='env_since',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='EnvRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('site', 'Site'), ('governorate', 'Governorate'), ('mineral', 'Mineral')], max_length=12)),
+                ('key', models.CharField(max_length=100)),
+                ('period', models.CharField(choices=[('month', 'Month'), ('quarter', 'Quarter')], max_length=8)),
+                ('period_start', models.DateField()),
+                ('readings', models.IntegerField(default=0)),
+                ('aqi_mean', models.FloatField(null=True)),
+                ('aqi_min', models.FloatField(null=True)),
+                ('aqi_max', models.FloatField(null=True)),
+                ('aqi_p95', models.FloatField(null=True)),
+                ('tds_mean', models.FloatField(null=True)),
+                ('tds_min', models.FloatField(null=True)),
+                ('tds_max', models.FloatField(null=True)),
+                ('tds_p95', models.FloatField(null=True)),
+                ('rehab_mean', models.FloatField(null=True)),
+                ('rehab_min', models.FloatField(null=True)),
+                ('rehab_max', models.FloatField(null=True)),
+                ('rehab_p95', models.FloatField(null=True)),
+            ],
+            options={
+                'unique_together': {('scope', 'key', 'period', 'period_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0006_envrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CubeCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('governorate', models.CharField(max_length=100)),
+                ('mineral', models.CharField(max_length=100)),
+                ('year', models.IntegerField()),
+                ('band', models.CharField(max_length=10)),
+                ('sites', models.IntegerField(default=0)),
+                ('production_total', models.FloatField(default=0)),
+                ('env_readings', models.IntegerField(default=0)),
+                ('aqi_sum', models.FloatField(default=0)),
+                ('aqi_n', models.IntegerField(default=0)),
+                ('tds_sum', models.FloatField(default=0)),
+                ('tds_n', models.IntegerField(default=0)),
+                ('rehab_sum', models.FloatField(default=0)),
+                ('rehab_n', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('governorate', 'mineral', 'year', 'band')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0007_cubecell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnvArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('readings', models.IntegerField(default=0)),
+                ('data', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='env_archives', to='geoeco.site')),
+            ],
+            options={
+                'unique_together': {('site', 'year')},
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0009_changecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotspotStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hotspot', models.CharField(max_length=40)),
+                ('mineral', models.CharField(max_length=100)),
+                ('band', models.CharField(max_length=10)),
+                ('sites', models.IntegerField(default=0)),
+                ('production_total', models.FloatField(default=0)),
+                ('production_year', models.IntegerField(null=True)),
+                ('production_latest', models.FloatField(default=0)),
+                ('env_readings', models.IntegerField(default=0)),
+                ('aqi_sum', models.FloatField(default=0)),
+                ('aqi_n', models.IntegerField(default=0)),
+                ('tds_sum', models.FloatField(default=0)),
+                ('tds_n', models.IntegerField(default=0)),
+                ('rehab_sum', models.FloatField(default=0)),
+                ('rehab_n', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('hotspot', 'mineral', 'band')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HotspotMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hotspot', models.CharField(db_index=True, max_length=40)),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hotspot_memberships', to='geoeco.site')),
+            ],
+            options={
+                'unique_together': {('site', 'hotspot')},
+            },
+        ),
+    ]
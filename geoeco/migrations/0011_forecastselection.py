@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0010_hotspots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastSelection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('production', 'Production'), ('aqi', 'AQI'), ('tds', 'TDS'), ('rehab', 'Rehabilitation')], max_length=12)),
+                ('model', models.CharField(max_length=20)),
+                ('mape', models.FloatField(null=True)),
+                ('mase', models.FloatField(null=True)),
+                ('origins', models.IntegerField(default=0)),
+                ('scores', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_selections', to='geoeco.site')),
+            ],
+            options={
+                'unique_together': {('site', 'target')},
+            },
+        ),
+    ]
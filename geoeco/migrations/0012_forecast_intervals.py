@@ -0,0 +1,93 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0011_forecastselection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='aqi_hi80',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='aqi_hi95',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='aqi_lo80',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='aqi_lo95',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='rehab_hi80',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='rehab_hi95',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='rehab_lo80',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='rehab_lo95',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='tds_hi80',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='tds_hi95',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='tds_lo80',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='tds_lo95',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastproduction',
+            name='quantity_hi80',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastproduction',
+            name='quantity_hi95',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastproduction',
+            name='quantity_lo80',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastproduction',
+            name='quantity_lo95',
+            field=models.FloatField(null=True),
+        ),
+    ]
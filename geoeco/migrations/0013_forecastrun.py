@@ -0,0 +1,85 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def adopt_existing_rows(apps, schema_editor):
+    """صفوف التوقع الموجودة تصبح دفعة أولى مكتملة وحالية."""
+    ForecastRun = apps.get_model("geoeco", "ForecastRun")
+    tables = [apps.get_model("geoeco", name)
+              for name in ("ForecastProduction", "ForecastEnvironment", "ForecastSelection")]
+    if not any(m.objects.exists() for m in tables):
+        return
+    now = django.utils.timezone.now()
+    run = ForecastRun.objects.create(
+        status="complete", is_current=True, started_at=now, finished_at=now,
+        sites=tables[0].objects.values("site_id").distinct().count(),
+    )
+    for m in tables:
+        m.objects.update(run=run)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0012_forecast_intervals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('complete', 'Complete'), ('failed', 'Failed')], db_index=True, default='running', max_length=10)),
+                ('is_current', models.BooleanField(db_index=True, default=False)),
+                ('sites', models.IntegerField(default=0)),
+                ('years_ahead', models.IntegerField(default=3)),
+                ('months_ahead', models.IntegerField(default=6)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='forecastproduction',
+            name='run',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='production', to='geoeco.forecastrun'),
+        ),
+        migrations.AddField(
+            model_name='forecastenvironment',
+            name='run',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='environment', to='geoeco.forecastrun'),
+        ),
+        migrations.AddField(
+            model_name='forecastselection',
+            name='run',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='selections', to='geoeco.forecastrun'),
+        ),
+        migrations.RunPython(adopt_existing_rows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='forecastproduction',
+            name='run',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='production', to='geoeco.forecastrun'),
+        ),
+        migrations.AlterField(
+            model_name='forecastenvironment',
+            name='run',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='environment', to='geoeco.forecastrun'),
+        ),
+        migrations.AlterField(
+            model_name='forecastselection',
+            name='run',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='selections', to='geoeco.forecastrun'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='forecastproduction',
+            unique_together={('run', 'site', 'year')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='forecastenvironment',
+            unique_together={('run', 'site', 'date')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='forecastselection',
+            unique_together={('run', 'site', 'target')},
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geoeco', '0013_forecastrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastAccuracy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('production', 'Production'), ('aqi', 'AQI'), ('tds', 'TDS'), ('rehab', 'Rehabilitation')], max_length=12)),
+                ('model', models.CharField(blank=True, max_length=20)),
+                ('through', models.DateField()),
+                ('points', models.IntegerField(default=0)),
+                ('abs_err_sum', models.FloatField(default=0)),
+                ('sq_err_sum', models.FloatField(default=0)),
+                ('err_sum', models.FloatField(default=0)),
+                ('actual_abs_sum', models.FloatField(default=0)),
+                ('ape_sum', models.FloatField(default=0)),
+                ('ape_n', models.IntegerField(default=0)),
+                ('in80', models.IntegerField(default=0)),
+                ('in95', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accuracy', to='geoeco.forecastrun')),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_accuracy', to='geoeco.site')),
+            ],
+            options={
+                'unique_together': {('run', 'site', 'target')},
+            },
+        ),
+    ]
@@ -73,23 +73,198 @@ class Alert(models.Model):
     created_at = models.DateTimeField(default=timezone.now)  # افتراضي لتفادي مشاكل fixtures
     level = models.CharField(max_length=10, choices=[("info","Info"),("warn","Warn"),("critical","Critical")], default="info")
     message = models.TextField()
+    rule = models.CharField(max_length=50, blank=True, default="", db_index=True)  # رمز القاعدة المولِّدة (فارغ = يدوي)
+
+class ForecastRun(models.Model):
+    """
+    دفعة توقعات: صفوف ForecastProduction/ForecastEnvironment/ForecastSelection تُكتب تحت معرّفها،
+    ثم يتحوّل المؤشر is_current إليها في معاملة واحدة فيرى القرّاء لقطة كاملة دائمًا.
+    """
+    STATUSES = [("running", "Running"), ("complete", "Complete"), ("failed", "Failed")]
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default="running", db_index=True)
+    is_current = models.BooleanField(default=False, db_index=True)
+    sites = models.IntegerField(default=0)
+    years_ahead = models.IntegerField(default=3)
+    months_ahead = models.IntegerField(default=6)
 
 class ForecastProduction(models.Model):
+    run = models.ForeignKey(ForecastRun, on_delete=models.CASCADE, related_name='production')
     site = models.ForeignKey('Site', on_delete=models.CASCADE, related_name='prod_forecasts')
     year = models.IntegerField()
     quantity = models.FloatField()  # نفس وحدة إنتاج الموقع (طن أو كغ للذهب)
+    # فترات التنبؤ 80%/95% (تُحسب في دفعة التوقع، لا عند الطلب)
+    quantity_lo80 = models.FloatField(null=True)
+    quantity_hi80 = models.FloatField(null=True)
+    quantity_lo95 = models.FloatField(null=True)
+    quantity_hi95 = models.FloatField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ('site', 'year')
+        unique_together = ('run', 'site', 'year')
 
 class ForecastEnvironment(models.Model):
+    run = models.ForeignKey(ForecastRun, on_delete=models.CASCADE, related_name='environment')
     site = models.ForeignKey('Site', on_delete=models.CASCADE, related_name='env_forecasts')
     date = models.DateField()  # تاريخ شهري متوقع
     air_quality_index = models.FloatField()
     water_tds = models.FloatField()
     rehabilitation_progress = models.FloatField()
+    # فترات التنبؤ 80%/95% لكل مؤشر
+    aqi_lo80 = models.FloatField(null=True)
+    aqi_hi80 = models.FloatField(null=True)
+    aqi_lo95 = models.FloatField(null=True)
+    aqi_hi95 = models.FloatField(null=True)
+    tds_lo80 = models.FloatField(null=True)
+    tds_hi80 = models.FloatField(null=True)
+    tds_lo95 = models.FloatField(null=True)
+    tds_hi95 = models.FloatField(null=True)
+    rehab_lo80 = models.FloatField(null=True)
+    rehab_hi80 = models.FloatField(null=True)
+    rehab_lo95 = models.FloatField(null=True)
+    rehab_hi95 = models.FloatField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ('site', 'date')
+        unique_together = ('run', 'site', 'date')
+
+class ForecastSelection(models.Model):
+    """النموذج الفائز في الاختبار الرجعي لكل (موقع، هدف) مع درجات كل المرشحين."""
+    TARGETS = [("production", "Production"), ("aqi", "AQI"), ("tds", "TDS"), ("rehab", "Rehabilitation")]
+    run = models.ForeignKey(ForecastRun, on_delete=models.CASCADE, related_name="selections")
+    site = models.ForeignKey(Site, on_delete=models.CASCADE, related_name="forecast_selections")
+    target = models.CharField(max_length=12, choices=TARGETS)
+    model = models.CharField(max_length=20)
+    mape = models.FloatField(null=True)     # % على نوافذ الاختبار (None = بلا اختبار)
+    mase = models.FloatField(null=True)
+    origins = models.IntegerField(default=0)  # عدد أصول الاختبار المتدحرج
+    scores = models.JSONField(default=dict)  # {model: [mape, mase]} لكل المرشحين الصالحين
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("run", "site", "target")
+
+class ForecastAccuracy(models.Model):
+    """
+    دقة توقعات دفعة لكل (موقع، هدف) مقابل القيم الفعلية: مجاميع قابلة للدمج تُضاف إليها النقاط
+    التي وردت قيمتها الفعلية بعد through فقط (تحديث تدريجي).
+    """
+    run = models.ForeignKey(ForecastRun, on_delete=models.CASCADE, related_name="accuracy")
+    site = models.ForeignKey(Site, on_delete=models.CASCADE, related_name="forecast_accuracy")
+    target = models.CharField(max_length=12, choices=ForecastSelection.TARGETS)
+    model = models.CharField(max_length=20, blank=True)  # الفائز في ForecastSelection لهذه الدفعة
+    through = models.DateField()  # أول يوم في آخر فترة (سنة/شهر) احتُسبت
+    points = models.IntegerField(default=0)
+    abs_err_sum = models.FloatField(default=0)
+    sq_err_sum = models.FloatField(default=0)
+    err_sum = models.FloatField(default=0)         # توقع − فعلي (الانحياز)
+    actual_abs_sum = models.FloatField(default=0)  # مقام WAPE
+    ape_sum = models.FloatField(default=0)
+    ape_n = models.IntegerField(default=0)         # نقاط بقيمة فعلية غير صفرية
+    in80 = models.IntegerField(default=0)          # القيمة الفعلية داخل فترة 80%
+    in95 = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("run", "site", "target")
+
+class SiteRecomputeQueue(models.Model):
+    """مواقع تغيّرت قياساتها وتنتظر إعادة حساب التوقعات والشريحة."""
+    site = models.OneToOneField('Site', on_delete=models.CASCADE, related_name='recompute_entry')
+    first_queued_at = models.DateTimeField(default=timezone.now)
+    last_touched_at = models.DateTimeField(default=timezone.now, db_index=True)
+    env_since = models.DateField(null=True, blank=True)  # أقدم قراءة بيئية تغيّرت (لتحديث التجميعات)
+
+class EnvRollup(models.Model):
+    """ملخصات مسبقة الحساب لـ EnvironmentalMetric (شهري/ربعي) لكل موقع/محافظة/معدن."""
+    SCOPES = [("site", "Site"), ("governorate", "Governorate"), ("mineral", "Mineral")]
+    PERIODS = [("month", "Month"), ("quarter", "Quarter")]
+
+    scope = models.CharField(max_length=12, choices=SCOPES)
+    key = models.CharField(max_length=100)  # معرّف الموقع أو اسم المحافظة/المعدن
+    period = models.CharField(max_length=8, choices=PERIODS)
+    period_start = models.DateField()
+    readings = models.IntegerField(default=0)
+    aqi_mean = models.FloatField(null=True)
+    aqi_min = models.FloatField(null=True)
+    aqi_max = models.FloatField(null=True)
+    aqi_p95 = models.FloatField(null=True)
+    tds_mean = models.FloatField(null=True)
+    tds_min = models.FloatField(null=True)
+    tds_max = models.FloatField(null=True)
+    tds_p95 = models.FloatField(null=True)
+    rehab_mean = models.FloatField(null=True)
+    rehab_min = models.FloatField(null=True)
+    rehab_max = models.FloatField(null=True)
+    rehab_p95 = models.FloatField(null=True)
+
+    class Meta:
+        unique_together = ("scope", "key", "period", "period_start")
+
+class CubeCell(models.Model):
+    """خلية مكعب التقارير الوطنية: محافظة × معدن × سنة × شريحة (مجاميع قابلة للدمج)."""
+    governorate = models.CharField(max_length=100)
+    mineral = models.CharField(max_length=100)
+    year = models.IntegerField()
+    band = models.CharField(max_length=10)
+    sites = models.IntegerField(default=0)               # مواقع لها إنتاج في تلك السنة
+    production_total = models.FloatField(default=0)
+    env_readings = models.IntegerField(default=0)
+    # مجاميع وعدّادات (لا متوسطات) حتى يصح التجميع الأعلى roll-up
+    aqi_sum = models.FloatField(default=0)
+    aqi_n = models.IntegerField(default=0)
+    tds_sum = models.FloatField(default=0)
+    tds_n = models.IntegerField(default=0)
+    rehab_sum = models.FloatField(default=0)
+    rehab_n = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("governorate", "mineral", "year", "band")
+
+class EnvArchive(models.Model):
+    """قراءات بيئية خام لسنة خارج فترة الاحتفاظ، مضغوطة (npz + zlib) في صف لكل موقع/سنة."""
+    site = models.ForeignKey(Site, on_delete=models.CASCADE, related_name="env_archives")
+    year = models.IntegerField()
+    readings = models.IntegerField(default=0)
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("site", "year")
+
+class ChangeCounter(models.Model):
+    """عدّاد تغييرات باسم (مثل "site_registry"): يُزاد عند كل تعديل لإبطال النسخ المخزّنة في الذاكرة."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+class HotspotMembership(models.Model):
+    """انتماء موقع إلى مضلع من HOTSPOT_POLYGONS (قد ينتمي موقع لأكثر من مضلع متداخل)."""
+    site = models.ForeignKey(Site, on_delete=models.CASCADE, related_name="hotspot_memberships")
+    hotspot = models.CharField(max_length=40, db_index=True)
+
+    class Meta:
+        unique_together = ("site", "hotspot")
+
+class HotspotStat(models.Model):
+    """مجاميع مسبقة لكل مضلع × معدن × شريحة (مجاميع وعدّادات قابلة للدمج كما في CubeCell)."""
+    hotspot = models.CharField(max_length=40)
+    mineral = models.CharField(max_length=100)
+    band = models.CharField(max_length=10)
+    sites = models.IntegerField(default=0)
+    production_total = models.FloatField(default=0)   # كل السنوات
+    production_year = models.IntegerField(null=True)  # أحدث سنة إنتاج في البيانات
+    production_latest = models.FloatField(default=0)  # إنتاج تلك السنة
+    # القراءات البيئية للسنوات الساخنة فقط (ENV_HOT_YEARS)
+    env_readings = models.IntegerField(default=0)
+    aqi_sum = models.FloatField(default=0)
+    aqi_n = models.IntegerField(default=0)
+    tds_sum = models.FloatField(default=0)
+    tds_n = models.IntegerField(default=0)
+    rehab_sum = models.FloatField(default=0)
+    rehab_n = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("hotspot", "mineral", "band")
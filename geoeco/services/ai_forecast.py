@@ -1,103 +1,278 @@
 # geoeco/services/ai_forecast.py
 import datetime
-import numpy as np
-from collections import defaultdict
-from django.db.models import Max
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
 from geoeco.models import (
     Site, ProductionMetric, EnvironmentalMetric,
-    ForecastProduction, ForecastEnvironment
+    ForecastRun, ForecastProduction, ForecastEnvironment, ForecastSelection, ForecastAccuracy
 )
+from geoeco.services.env_partitions import hot_since, partitions
+
+# استجابة api_site_forecast مخزّنة مؤقتًا لكل (موقع، دفعة)؛ نشر دفعة جديدة يغيّر المفاتيح كلها
+FORECAST_CACHE_TTL = 300
+# معرّف الدفعة الحالية مخزّن لثوانٍ: عملية أخرى قد تقرأ الدفعة السابقة لحظيًا (تبقى كاملة حتى التقليم)
+FORECAST_RUN_CACHE_KEY = "geoeco:forecast:run"
+FORECAST_RUN_CACHE_TTL = 30
+
+
+def forecast_cache_key(site_id, run_id=None):
+    return f"geoeco:forecast:site:{site_id}:run:{run_id}"
+
+
+# -------- اختيار النموذج بالاختبار الرجعي (forecast_select) --------
+# لكل موقع: سلسلة الإنتاج السنوية وثلاث سلاسل بيئية شهرية، يُختار لكل منها أفضل مرشح
+# (ETS بأنواعه، خطّي، موسمي ساذج، متوسط) ويُسجَّل الفائز ودرجاته في ForecastSelection.
+# المواقع تُعالج على دفعات: استعلامان للتاريخ، حساب متجه (أو عمليات --workers)، كتابة جماعية.
+# forecast_select (numpy) تُستورد داخل الدوال: لا نريدها في إقلاع عمّال الويب.
+FORECAST_CHUNK = 500
+PROD_MIN_YEARS = 3
+ENV_MIN_READINGS = 6
+ENV_TARGETS = ("aqi", "tds", "rehab")
+# أعمدة فترات التنبؤ 80%/95% كما يعيدها api_site_forecast
+INTERVAL_LEVELS = (80, 95)
+FORECAST_INTERVAL_FIELDS = {
+    "production": tuple(f"quantity_{b}{lv}" for lv in INTERVAL_LEVELS for b in ("lo", "hi")),
+    "environment": tuple(f"{m}_{b}{lv}" for m in ENV_TARGETS for lv in INTERVAL_LEVELS for b in ("lo", "hi")),
+}
+
+
+def _add_months(d, k):
+    m = d.month - 1 + k
+    return datetime.date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def _env_select_readings():
+    """قراءات شهرية تكفي كل نوافذ الاختبار الرجعي للموسمي الساذج (موسم كامل + الأصول)."""
+    from geoeco.services.forecast_select import KINDS, SEASON
+
+    return SEASON + KINDS["monthly"]["origins"]
+
+
+def _load_histories(site_ids):
+    """{site_id: [(year, qty)]} و {site_id: [(date, aqi, tds, rehab)]} لدفعة مواقع."""
+    prod = defaultdict(list)
+    for sid, year, qty in (ProductionMetric.objects.filter(site_id__in=site_ids)
+                           .order_by('site_id', 'year').values_list('site_id', 'year', 'quantity')):
+        prod[sid].append((year, qty))
+
+    fields = ('site_id', 'date', 'air_quality_index', 'water_tds', 'rehabilitation_progress')
+    env = defaultdict(list)
+    # السنوات الساخنة فقط (أقسام قليلة)، وكل التاريخ للمواقع التي لم تكفها (مع جداول الظل في SQLite):
+    # النافذة الساخنة 12–23 شهرًا حسب التاريخ، والموسمي الساذج يحتاج موسمًا كاملًا قبل كل أصل اختبار
+    for row in (EnvironmentalMetric.objects.filter(site_id__in=site_ids, date__gte=hot_since())
+                .order_by('site_id', 'date').values_list(*fields)):
+        env[row[0]].append(row[1:])
+    need = _env_select_readings()
+    short = [sid for sid in site_ids if len(env[sid]) < need]
+    if short:
+        for sid in short:
+            env[sid] = []
+        for row in partitions().read_sites(short):
+            env[row[0]].append(row[1:])
+    return prod, env
+
+
+def _build_task(site_ids, prod, env, years_ahead, months_ahead):
+    """دفعة forecast_select: مصفوفات فقط (قابلة للإرسال لعملية أخرى)."""
+    p_ids = [sid for sid in site_ids if len(prod[sid]) >= PROD_MIN_YEARS]
+    e_ids = [sid for sid in site_ids if len(env[sid]) >= ENV_MIN_READINGS]
+    jobs = {}
+    if p_ids and years_ahead > 0:
+        jobs["production"] = ([[q for _, q in prod[sid]] for sid in p_ids], years_ahead, "annual")
+    if e_ids and months_ahead > 0:
+        for j, target in enumerate(ENV_TARGETS, start=1):
+            jobs[target] = ([[r[j] for r in env[sid]] for sid in e_ids], months_ahead, "monthly")
+    return {"jobs": jobs, "metric": getattr(settings, "FORECAST_SELECTION_METRIC", "mase")}, p_ids, e_ids
+
+
+def _clip(v, lo=0.0, hi=None, digits=1):
+    v = max(lo, v)
+    return round(v if hi is None else min(hi, v), digits)
+
+
+def _interval_fields(r, i, prefix, hi=None, digits=1):
+    """{prefix_lo80, prefix_hi80, prefix_lo95, prefix_hi95} للخطوة i، مقصوصة كالقيمة نفسها."""
+    out = {}
+    for level, (lower, upper) in r["intervals"].items():
+        out[f"{prefix}_lo{level}"] = _clip(lower[i], hi=hi, digits=digits)
+        out[f"{prefix}_hi{level}"] = _clip(upper[i], hi=hi, digits=digits)
+    return out
+
+
+def _picks(p_ids, e_ids, result):
+    """[(site_id, target, نتيجة الاختيار)] بترتيب الأهداف."""
+    out = [dict(r, site_id=sid, target="production") for sid, r in zip(p_ids, result.get("production", ()))]
+    if "aqi" in result:
+        out += [dict(result[t][k], site_id=sid, target=t) for k, sid in enumerate(e_ids) for t in ENV_TARGETS]
+    return out
 
-# -------- إنتاج سنوي (ETS) --------
+
+def _forecast_rows(run_id, prod, env, p_ids, e_ids, result):
+    """نتائج الاختيار -> صفوف ForecastProduction/ForecastEnvironment/ForecastSelection للدفعة run_id."""
+    prod_rows, env_rows = [], []
+    for sid, r in zip(p_ids, result.get("production", ())):
+        max_year = prod[sid][-1][0]
+        prod_rows += [ForecastProduction(run_id=run_id, site_id=sid, year=max_year + i + 1,
+                                         quantity=_clip(q, digits=2), **_interval_fields(r, i, "quantity", digits=2))
+                      for i, q in enumerate(r["forecast"])]
+    if "aqi" in result:
+        for k, sid in enumerate(e_ids):
+            aqi, tds, rehab = (result[t][k] for t in ENV_TARGETS)
+            last_date = env[sid][-1][0]
+            for i in range(len(aqi["forecast"])):
+                env_rows.append(ForecastEnvironment(
+                    run_id=run_id,
+                    site_id=sid,
+                    date=_add_months(last_date, i + 1),
+                    air_quality_index=_clip(aqi["forecast"][i]),
+                    water_tds=_clip(tds["forecast"][i]),
+                    rehabilitation_progress=_clip(rehab["forecast"][i], hi=100.0),
+                    **_interval_fields(aqi, i, "aqi"),
+                    **_interval_fields(tds, i, "tds"),
+                    **_interval_fields(rehab, i, "rehab", hi=100.0),
+                ))
+    selections = [ForecastSelection(run_id=run_id, site_id=r["site_id"], target=r["target"], model=r["model"],
+                                    mape=r["mape"], mase=r["mase"], origins=r["origins"], scores=r["scores"])
+                  for r in _picks(p_ids, e_ids, result)]
+    return prod_rows, env_rows, selections
+
+
+@transaction.atomic
+def _store_forecasts(run_ids, site_ids, rows_for_run):
+    """
+    صفوف المواقع في كل دفعة من run_ids، بعد حذف صفوفها السابقة في نفس المعاملة: التشغيل الكامل
+    قد يصل إلى موقع سبق أن كتبه عامل الطابور في الدفعة الجارية، فيستبدله بدل خرق (run, site, year).
+    """
+    for run_id in run_ids:
+        for model in (ForecastProduction, ForecastEnvironment, ForecastSelection):
+            model.objects.filter(run_id=run_id, site_id__in=site_ids).delete()
+        for model, rows in zip((ForecastProduction, ForecastEnvironment, ForecastSelection), rows_for_run(run_id)):
+            model.objects.bulk_create(rows, batch_size=2000)
+
+
+# -------- الدفعات (ForecastRun) --------
+# التشغيل الكامل يكتب تحت دفعة جديدة ثم يحوّل المؤشر إليها في معاملة واحدة ويقلّم القديمة؛
+# التشغيل الجزئي (عامل الطابور) يستبدل صفوف مواقعه في الدفعة الحالية والجارية فقط؛ الكامل يستبدل
+# صفوف كل دفعة مواقع كذلك، فالأحدث كتابةً هو ما يُنشر.
+
+def current_run_id():
+    return ForecastRun.objects.filter(is_current=True).values_list('id', flat=True).first()
+
+
+@transaction.atomic
+def publish_run(run):
+    """اجعل run الدفعة الحالية: القرّاء يرون السابقة أو الجديدة كاملة، لا مزيجًا."""
+    ForecastRun.objects.filter(is_current=True).exclude(pk=run.pk).update(is_current=False)
+    run.status, run.is_current, run.finished_at = "complete", True, timezone.now()
+    run.save(update_fields=["status", "is_current", "finished_at"])
+    transaction.on_commit(lambda: cache.set(FORECAST_RUN_CACHE_KEY, run.id, FORECAST_RUN_CACHE_TTL))
+
+
+def prune_runs(keep=None, abandoned_after=datetime.timedelta(days=1)):
+    """
+    احذف الدفعات خارج آخر keep دفعات مكتملة (FORECAST_KEEP_RUNS) مع صفوفها؛ الحالية لا تُحذف،
+    والجارية فقط إن تجاوزت abandoned_after (عملية توقفت دون إنهائها). يعيد عدد الدفعات المحذوفة.
+    """
+    keep = max(1, keep if keep is not None else getattr(settings, "FORECAST_KEEP_RUNS", 7))
+    kept = list(ForecastRun.objects.filter(status="complete")
+                .order_by('-finished_at', '-id').values_list('id', flat=True)[:keep])
+    stale = list(ForecastRun.objects
+                 .exclude(Q(pk__in=kept) | Q(is_current=True))
+                 .exclude(status="running", started_at__gte=timezone.now() - abandoned_after)
+                 .values_list('id', flat=True))
+    if stale:
+        # حذف بالدفعة (فهرس run_id) بدل صف بصف
+        for model in (ForecastProduction, ForecastEnvironment, ForecastSelection, ForecastAccuracy):
+            model.objects.filter(run_id__in=stale).delete()
+        ForecastRun.objects.filter(pk__in=stale).delete()
+    return len(stale)
+
+
+def run_forecasts(site_ids=None, years_ahead=3, months_ahead=6, chunk_size=FORECAST_CHUNK, workers=1):
+    """
+    site_ids=None: دفعة جديدة لكل المواقع تُنشر عند اكتمالها ثم تُقلَّم الدفعات القديمة.
+    وإلا: صفوف هذه المواقع تُستبدل في الدفعة الحالية (والجارية إن وُجدت)، معاملة لكل دفعة مواقع.
+    المواقع تُعالج على دفعات من chunk_size؛ workers > 1: كل موجة من workers دفعة تُحسب في
+    عمليات منفصلة (forecast_select.run_batches). يعيد Counter {(target, model): عدد السلاسل}.
+    """
+    from geoeco.services.forecast_select import run_batches
+
+    full = site_ids is None
+    if full:
+        site_ids = Site.objects.order_by('id').values_list('id', flat=True)
+    site_ids = list(site_ids)
+    run_ids = [] if full else list(ForecastRun.objects.filter(Q(is_current=True) | Q(status="running"))
+                                   .values_list('id', flat=True))
+    run = None
+    if not run_ids:  # تشغيل كامل، أو لا دفعة بعد
+        run = ForecastRun.objects.create(sites=len(site_ids), years_ahead=years_ahead, months_ahead=months_ahead)
+        run_ids = [run.id]
+
+    chunks = [site_ids[i:i + chunk_size] for i in range(0, len(site_ids), chunk_size)]
+    winners = Counter()
+    wave = max(1, workers)
+    try:
+        for w in range(0, len(chunks), wave):
+            loaded = []
+            for ids in chunks[w:w + wave]:
+                prod, env = _load_histories(ids)
+                task, p_ids, e_ids = _build_task(ids, prod, env, years_ahead, months_ahead)
+                loaded.append((ids, prod, env, p_ids, e_ids, task))
+            results = run_batches([item[-1] for item in loaded], workers)
+            for (ids, prod, env, p_ids, e_ids, _), result in zip(loaded, results):
+                _store_forecasts(run_ids, ids,
+                                 lambda run_id: _forecast_rows(run_id, prod, env, p_ids, e_ids, result))
+                if run is None:
+                    cache.delete_many([forecast_cache_key(sid, rid) for sid in ids for rid in run_ids])
+                winners.update((r["target"], r["model"]) for r in _picks(p_ids, e_ids, result))
+    except BaseException:
+        if run is not None:
+            ForecastRun.objects.filter(pk=run.pk).update(status="failed", finished_at=timezone.now())
+        raise
+    if run is not None:
+        publish_run(run)
+        if full:
+            prune_runs()
+    return winners
+
+
+def _select_one(series, h, kind):
+    from geoeco.services.forecast_select import select_forecasts
+
+    metric = getattr(settings, "FORECAST_SELECTION_METRIC", "mase")
+    return select_forecasts([series], h, kind, metric)[0]
+
+
+# -------- إنتاج سنوي --------
 def forecast_production_for_site(site, years_ahead=3):
-    hist = (ProductionMetric.objects
-            .filter(site=site)
-            .order_by('year')
-            .values_list('year', 'quantity'))
-    hist = list(hist)
-    if len(hist) < 3:
+    hist = list(ProductionMetric.objects
+                .filter(site=site)
+                .order_by('year')
+                .values_list('year', 'quantity'))
+    if len(hist) < PROD_MIN_YEARS:
         return []  # بيانات غير كافية
 
     years, qty = zip(*hist)
-    qty = np.array(qty, dtype=float)
+    yhat = _select_one(qty, years_ahead, "annual")["forecast"]
+    return [(max(years) + i, float(max(0.0, yhat[i - 1]))) for i in range(1, years_ahead + 1)]
 
-    # ETS بسيط: trend فقط، بدون موسمية (سنوية)
-    try:
-        model = ExponentialSmoothing(qty, trend='add', seasonal=None, initialization_method='estimated')
-        fit = model.fit(optimized=True)
-        yhat = fit.forecast(years_ahead)
-    except Exception:
-        # fallback: متوسط آخر 3 سنوات
-        mean3 = float(np.mean(qty[-3:]))
-        yhat = np.array([mean3] * years_ahead, dtype=float)
-
-    max_year = max(years)
-    results = []
-    for i in range(1, years_ahead+1):
-        results.append((max_year + i, float(max(0.0, yhat[i-1]))))
-    return results
-
-# -------- بيئة شهرية (خطّي بسيط) --------
+# -------- بيئة شهرية --------
 def forecast_env_for_site(site, months_ahead=6):
-    hist = (EnvironmentalMetric.objects
-            .filter(site=site)
-            .order_by('date')
-            .values_list('date', 'air_quality_index', 'water_tds', 'rehabilitation_progress'))
-    hist = list(hist)
-    if len(hist) < 6:
+    _, env = _load_histories([site.id])
+    hist = env[site.id]
+    if len(hist) < ENV_MIN_READINGS:
         return []  # بيانات غير كافية
 
     dates, aqi, tds, rehab = zip(*hist)
-    n = len(dates)
-    x = np.arange(n, dtype=float)
-
-    def lin_forecast(series, h):
-        s = np.array(series, dtype=float)
-        # ملائمة y = a + b x
-        A = np.vstack([np.ones_like(x), x]).T
-        try:
-            coef, _, _, _ = np.linalg.lstsq(A, s, rcond=None)
-            a, b = coef
-            yhat = [a + b*(n+i) for i in range(1, h+1)]
-        except Exception:
-            yhat = [float(np.mean(s[-3:]))] * h
-        return yhat
-
-    aqi_hat  = lin_forecast(aqi,  months_ahead)
-    tds_hat  = lin_forecast(tds,  months_ahead)
-    reh_hat  = lin_forecast(rehab, months_ahead)
-
-    last_date = dates[-1]
-    # توليد شهور قادمة
-    results = []
-    for i in range(1, months_ahead+1):
-        # تقدّم شهرًا
-        if last_date.month + i <= 12:
-            mth = last_date.month + i
-            yr  = last_date.year
-        else:
-            mth = (last_date.month + i) % 12
-            yr  = last_date.year + (last_date.month + i - 1) // 12
-            if mth == 0: mth = 12
-        d = datetime.date(yr, mth, 1)
-        results.append((d, max(0.0, aqi_hat[i-1]), max(0.0, tds_hat[i-1]), max(0.0, reh_hat[i-1])))
-    return results
+    aqi_hat, tds_hat, reh_hat = (_select_one(s, months_ahead, "monthly")["forecast"] for s in (aqi, tds, rehab))
+    return [(_add_months(dates[-1], i), max(0.0, aqi_hat[i - 1]), max(0.0, tds_hat[i - 1]),
+             max(0.0, reh_hat[i - 1])) for i in range(1, months_ahead + 1)]
 
 def run_site_forecasts(site, years_ahead=3, months_ahead=6):
-    # احذف القديم لنفس الآفاق
-    ForecastProduction.objects.filter(site=site).delete()
-    ForecastEnvironment.objects.filter(site=site).delete()
-
-    for y, q in forecast_production_for_site(site, years_ahead):
-        ForecastProduction.objects.create(site=site, year=y, quantity=round(q, 2))
-
-    for d, aqi, tds, rehab in forecast_env_for_site(site, months_ahead):
-        ForecastEnvironment.objects.create(
-            site=site,
-            date=d,
-            air_quality_index=round(aqi, 1),
-            water_tds=round(tds, 1),
-            rehabilitation_progress=round(min(100.0, max(0.0, rehab)), 1),
-        )
+    run_forecasts([site.id], years_ahead=years_ahead, months_ahead=months_ahead)
@@ -0,0 +1,153 @@
+# geoeco/services/alert_rules.py
+# محرك قواعد تنبيه تصريحي: كل القواعد تُقيَّم على كل المواقع في تمريرة واحدة
+# (استعلام واحد لنافذة القراءات الأحدث + عمليات NumPy مجمّعة حسب الموقع).
+import datetime
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from geoeco.models import EnvironmentalMetric, License, Alert
+from geoeco.services.env_partitions import hot_since
+
+# أنواع القواعد:
+#   streak  : الحقل (op) القيمة لآخر n قراءات متتالية
+#   slope   : ميل الاتجاه الخطي لآخر window قراءات أعلى من value (وحدة/قراءة)
+#   license : رخصة تنتهي خلال days يومًا
+ALERT_RULES = [
+    {"code": "aqi_high", "kind": "streak", "field": "air_quality_index", "op": ">", "value": 100, "n": 3,
+     "level": "warn", "message": "مؤشر جودة الهواء أعلى من {value} لآخر {n} قراءات."},
+    {"code": "aqi_critical", "kind": "streak", "field": "air_quality_index", "op": ">", "value": 125, "n": 2,
+     "level": "critical", "message": "مؤشر جودة الهواء أعلى من {value} لآخر {n} قراءات."},
+    {"code": "tds_high", "kind": "streak", "field": "water_tds", "op": ">", "value": 1300, "n": 3,
+     "level": "warn", "message": "TDS أعلى من {value} لآخر {n} قراءات."},
+    {"code": "tds_rising", "kind": "slope", "field": "water_tds", "value": 40, "window": 6,
+     "level": "warn", "message": "اتجاه TDS متصاعد (+{slope:.0f} لكل قراءة)."},
+    {"code": "rehab_stalled", "kind": "streak", "field": "rehabilitation_progress", "op": "<", "value": 10, "n": 4,
+     "level": "info", "message": "تقدم إعادة التأهيل أقل من {value}% لآخر {n} قراءات."},
+    {"code": "license_expiring", "kind": "license", "days": 90,
+     "level": "warn", "message": "الرخصة {license_no} تنتهي في {expires_on} ({days_left} يومًا)."},
+]
+
+_OPS = {
+    ">": np.greater, ">=": np.greater_equal,
+    "<": np.less, "<=": np.less_equal,
+}
+
+ENV_FIELDS = ("air_quality_index", "water_tds", "rehabilitation_progress")
+
+
+def _window_size(rules):
+    sizes = [r.get("n", 0) for r in rules if r["kind"] == "streak"]
+    sizes += [r.get("window", 0) for r in rules if r["kind"] == "slope"]
+    return max(sizes, default=0)
+
+
+def load_env_window(size, site_ids=None):
+    """
+    آخر size قراءة لكل موقع في استعلام واحد (ROW_NUMBER)، كمصفوفات:
+    site (int), rank (1 = الأحدث)، ولكل حقل بيئي مصفوفة float (NaN للقيم الفارغة).
+    """
+    # القراءات الأحدث فقط: أقسام السنوات الساخنة
+    qs = EnvironmentalMetric.objects.filter(date__gte=hot_since())
+    if site_ids is not None:
+        qs = qs.filter(site_id__in=list(site_ids))
+    qs = (qs.annotate(rank=Window(RowNumber(), partition_by=[F("site_id")], order_by=[F("date").desc(), F("id").desc()]))
+            .filter(rank__lte=size)
+            .values_list("site_id", "rank", *ENV_FIELDS))
+    rows = list(qs)
+    if not rows:
+        empty = np.empty(0)
+        return {"site": empty.astype(np.int64), "rank": empty.astype(np.int64), **{f: empty for f in ENV_FIELDS}}
+    cols = list(zip(*rows))
+    data = {
+        "site": np.asarray(cols[0], dtype=np.int64),
+        "rank": np.asarray(cols[1], dtype=np.int64),
+    }
+    for i, f in enumerate(ENV_FIELDS, start=2):
+        data[f] = np.asarray([np.nan if v is None else v for v in cols[i]], dtype=float)
+    return data
+
+
+def _eval_streak(rule, win, uniq, inv):
+    n = rule["n"]
+    in_win = win["rank"] <= n
+    vals = win[rule["field"]]
+    with np.errstate(invalid="ignore"):
+        hit = _OPS[rule["op"]](vals, rule["value"]) & ~np.isnan(vals)
+    hits = np.bincount(inv, weights=(hit & in_win).astype(float), minlength=len(uniq))
+    for sid in uniq[hits >= n]:
+        yield int(sid), rule["message"].format(value=rule["value"], n=n)
+
+
+def _eval_slope(rule, win, uniq, inv):
+    w = rule["window"]
+    vals = win[rule["field"]]
+    m = (win["rank"] <= w) & ~np.isnan(vals)
+    g, y = inv[m], vals[m]
+    x = -win["rank"][m].astype(float)  # الأقدم أصغر
+    k = len(uniq)
+    cnt = np.bincount(g, minlength=k)
+    sx = np.bincount(g, weights=x, minlength=k)
+    sy = np.bincount(g, weights=y, minlength=k)
+    sxx = np.bincount(g, weights=x * x, minlength=k)
+    sxy = np.bincount(g, weights=x * y, minlength=k)
+    denom = cnt * sxx - sx * sx
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where((cnt >= 3) & (denom > 0), (cnt * sxy - sx * sy) / denom, np.nan)
+    ok = ~np.isnan(slope) & (slope > rule["value"])
+    for sid, s in zip(uniq[ok], slope[ok]):
+        yield int(sid), rule["message"].format(value=rule["value"], slope=float(s))
+
+
+def _eval_license(rule, site_ids=None):
+    today = datetime.date.today()
+    qs = License.objects.filter(expires_on__gte=today, expires_on__lte=today + timedelta(days=rule["days"]))
+    if site_ids is not None:
+        qs = qs.filter(site_id__in=list(site_ids))
+    for sid, no, exp in qs.values_list("site_id", "license_no", "expires_on"):
+        yield sid, rule["message"].format(license_no=no, expires_on=exp.isoformat(), days_left=(exp - today).days)
+
+
+def evaluate_alert_rules(rules=None, site_ids=None, dedup_days=7, dry_run=False):
+    """
+    قيّم القواعد وأنشئ تنبيهات جديدة فقط (bulk_create).
+    التكرار: لا يُعاد إنشاء تنبيه لنفس (الموقع، القاعدة) خلال dedup_days.
+    يعيد قائمة كائنات Alert المنشأة.
+    """
+    rules = ALERT_RULES if rules is None else rules
+    env_rules = [r for r in rules if r["kind"] in ("streak", "slope")]
+
+    found = {}  # (site_id, code) -> (level, message)
+    if env_rules:
+        win = load_env_window(_window_size(env_rules), site_ids)
+        uniq, inv = np.unique(win["site"], return_inverse=True)
+        for rule in env_rules:
+            ev = _eval_streak if rule["kind"] == "streak" else _eval_slope
+            for sid, msg in ev(rule, win, uniq, inv):
+                found[(sid, rule["code"])] = (rule["level"], msg)
+    for rule in rules:
+        if rule["kind"] == "license":
+            for sid, msg in _eval_license(rule, site_ids):
+                found.setdefault((sid, rule["code"]), (rule["level"], msg))
+
+    if not found:
+        return []
+
+    cutoff = timezone.now() - timedelta(days=dedup_days)
+    recent = Alert.objects.filter(rule__in={code for _, code in found}, created_at__gte=cutoff)
+    if site_ids is not None:
+        recent = recent.filter(site_id__in=list(site_ids))
+    seen = set(recent.values_list("site_id", "rule"))
+
+    now = timezone.now()
+    new_alerts = [
+        Alert(site_id=sid, rule=code, level=level, message=msg, created_at=now)
+        for (sid, code), (level, msg) in sorted(found.items())
+        if (sid, code) not in seen
+    ]
+    if not dry_run:
+        Alert.objects.bulk_create(new_alerts, batch_size=1000)
+    return new_alerts
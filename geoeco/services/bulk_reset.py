@@ -0,0 +1,110 @@
+# geoeco/services/bulk_reset.py
+# مسح جماعي سريع لجداول كبيرة دون تحميل المفاتيح في بايثون (كما يفعل delete() للتتالي):
+#   - PostgreSQL: TRUNCATE لكل الجداول دفعة واحدة.
+#   - MySQL/MariaDB: TRUNCATE مع تعطيل فحص FOREIGN_KEY_CHECKS مؤقتًا.
+#   - غير ذلك (SQLite): DELETE خام بنطاقات id محدودة، كل نطاق في معاملة قصيرة.
+# الترتيب دائمًا الأبناء قبل الآباء حسب علاقات ForeignKey.
+import time
+
+from django.db import connections, router, transaction
+from django.db.models import Max, Min, SET_NULL
+
+
+def deletion_order(root_models):
+    """
+    الجداول التي يجب مسحها مع root_models (كل من يشير إليها بتتالٍ CASCADE) مرتبةً
+    من الأبناء إلى الآباء. علاقات SET_NULL من جداول لن تُمسح تُعاد كقائمة (model, field).
+    """
+    ordered, set_null, visiting = [], [], set()
+
+    def visit(model):
+        if model in ordered or model in visiting:
+            return
+        visiting.add(model)
+        for rel in model._meta.related_objects:
+            if not (rel.one_to_many or rel.one_to_one):
+                continue
+            if rel.on_delete is SET_NULL and rel.related_model not in root_models:
+                set_null.append((rel.related_model, rel.field))
+            else:
+                visit(rel.related_model)
+        visiting.discard(model)
+        ordered.append(model)
+
+    for m in root_models:
+        visit(m)
+    set_null = [(m, f) for m, f in set_null if m not in ordered]
+    return ordered, set_null
+
+
+class BulkResetter:
+    def __init__(self, using=None, chunk_size=50_000, use_truncate=True, log=None):
+        self.chunk_size = chunk_size
+        self.use_truncate = use_truncate
+        self.log = log or (lambda msg: None)
+        self.using = using
+
+    def _conn(self, model):
+        return connections[self.using or router.db_for_write(model)]
+
+    def reset(self, root_models, extra_models=()):
+        """امسح root_models وتوابعها + extra_models (جداول مشتقة بلا FK). يعيد {جدول: صفوف|None}."""
+        models, set_null = deletion_order(root_models)
+        models = list(extra_models) + [m for m in models if m not in extra_models]
+        for model, field in set_null:
+            self._null_out(model, field)
+
+        vendor = self._conn(models[0]).vendor
+        if self.use_truncate and vendor in ("postgresql", "mysql"):
+            return self._truncate(models, vendor)
+        return {m._meta.db_table: self._chunked_delete(m) for m in models}
+
+    def _null_out(self, model, field):
+        conn = self._conn(model)
+        qn = conn.ops.quote_name
+        self.log(f"  {model._meta.db_table}.{field.column} -> NULL")
+        with transaction.atomic(using=conn.alias), conn.cursor() as cur:
+            cur.execute(f"UPDATE {qn(model._meta.db_table)} SET {qn(field.column)} = NULL "
+                        f"WHERE {qn(field.column)} IS NOT NULL")
+
+    def _truncate(self, models, vendor):
+        conn = self._conn(models[0])
+        qn = conn.ops.quote_name
+        tables = [m._meta.db_table for m in models]
+        t0 = time.monotonic()
+        with conn.cursor() as cur:
+            if vendor == "postgresql":
+                cur.execute("TRUNCATE " + ", ".join(qn(t) for t in tables))
+            else:
+                cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+                try:
+                    for t in tables:
+                        cur.execute(f"TRUNCATE TABLE {qn(t)}")
+                finally:
+                    cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+        self.log(f"  TRUNCATE {', '.join(tables)} ({time.monotonic() - t0:.2f}s)")
+        return dict.fromkeys(tables)
+
+    def _chunked_delete(self, model):
+        conn = self._conn(model)
+        qn = conn.ops.quote_name
+        table, pk = model._meta.db_table, model._meta.pk.column
+        bounds = model._base_manager.using(conn.alias).aggregate(lo=Min("pk"), hi=Max("pk"))
+        if bounds["lo"] is None:
+            self.log(f"  {table}: empty")
+            return 0
+        lo, hi = bounds["lo"], bounds["hi"]
+        sql = f"DELETE FROM {qn(table)} WHERE {qn(pk)} >= %s AND {qn(pk)} < %s"
+        deleted, t0, last_log = 0, time.monotonic(), 0.0
+        for start in range(lo, hi + 1, self.chunk_size):
+            # معاملة قصيرة لكل نطاق: أقفال قصيرة وذاكرة ثابتة
+            with transaction.atomic(using=conn.alias), conn.cursor() as cur:
+                cur.execute(sql, [start, start + self.chunk_size])
+                deleted += max(cur.rowcount, 0)
+            now = time.monotonic()
+            if now - last_log >= 2.0:
+                pct = 100.0 * (start + self.chunk_size - lo) / (hi - lo + 1)
+                self.log(f"  {table}: {deleted:,} rows ({min(pct, 100.0):.0f}%)")
+                last_log = now
+        self.log(f"  {table}: {deleted:,} rows deleted in {time.monotonic() - t0:.2f}s")
+        return deleted
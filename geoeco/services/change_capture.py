@@ -0,0 +1,94 @@
+# geoeco/services/change_capture.py
+# تجميع معرّفات المواقع التي تغيّرت قياساتها ثم كتابتها في طابور إعادة الحساب
+# مرة واحدة عند اكتمال المعاملة (بدل كتابة صف لكل قراءة).
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from geoeco.models import Site, SiteRecomputeQueue
+
+_local = threading.local()
+
+
+def _pending():
+    # site_id -> أقدم تاريخ قراءة بيئية لُمس (أو None إن لم تتغير البيئة)
+    if not hasattr(_local, "sites"):
+        _local.sites = {}
+    return _local.sites
+
+
+def _merge(target, site_ids, env_since):
+    for sid in site_ids:
+        if sid is None:
+            continue
+        d = env_since.get(sid) if env_since else None
+        old = target.get(sid)
+        target[sid] = d if old is None else (old if d is None else min(old, d))
+
+
+def mark_sites_dirty(site_ids, using=None, env_since=None):
+    """
+    سجّل مواقع متأثرة بتغيير. يُستدعى من الإشارات (save) ومن المسارات
+    الجماعية مثل bulk_create التي لا تُطلق إشارات.
+    env_since: {site_id: date} أقدم تاريخ قراءة بيئية جديدة (لتحديث التجميعات).
+    """
+    batch = {}
+    _merge(batch, site_ids, env_since)
+    if not batch:
+        return
+    conn = transaction.get_connection(using)
+    if not conn.in_atomic_block:
+        enqueue_sites(batch)
+        return
+    pending = _pending()
+    # سجّل flush مرة واحدة لكل معاملة؛ إن أُلغيت المعاملة يُحذف التسجيل فنبدأ من جديد
+    if not any(func is flush_pending for _, func, _ in conn.run_on_commit):
+        pending.clear()
+        transaction.on_commit(flush_pending, using=using)
+    _merge(pending, batch, batch)
+
+
+def flush_pending():
+    pending = _pending()
+    sites = dict(pending)
+    pending.clear()
+    if sites:
+        enqueue_sites(sites)
+
+
+def enqueue_sites(sites, chunk_size=1000):
+    """
+    إدراج/تحديث المواقع في الطابور. الإدخال الجديد يحتفظ بـ first_queued_at،
+    والقديم يُحدَّث last_touched_at فقط (debounce) ويُرجَع env_since للأقدم.
+    sites: {site_id: env_since|None} أو أي تكرار لمعرّفات.
+    """
+    if not isinstance(sites, dict):
+        sites = dict.fromkeys(sites)
+    now = timezone.now()
+    site_ids = list(sites)
+    for i in range(0, len(site_ids), chunk_size):
+        chunk = site_ids[i:i + chunk_size]
+        # تجاهل مواقع حُذفت في نفس المعاملة
+        existing_sites = set(Site.objects.filter(id__in=chunk).values_list("id", flat=True))
+        queued = set(SiteRecomputeQueue.objects
+                     .filter(site_id__in=existing_sites)
+                     .values_list("site_id", flat=True))
+        if queued:
+            SiteRecomputeQueue.objects.filter(site_id__in=queued).update(last_touched_at=now)
+            by_date = defaultdict(list)
+            for sid in queued:
+                if sites[sid] is not None:
+                    by_date[sites[sid]].append(sid)
+            for d, sids in by_date.items():
+                (SiteRecomputeQueue.objects
+                 .filter(site_id__in=sids)
+                 .filter(Q(env_since__isnull=True) | Q(env_since__gt=d))
+                 .update(env_since=d))
+        SiteRecomputeQueue.objects.bulk_create(
+            [SiteRecomputeQueue(site_id=sid, first_queued_at=now, last_touched_at=now, env_since=sites[sid])
+             for sid in existing_sites - queued],
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,115 @@
+# geoeco/services/downsample.py
+# تقليص السلاسل الطويلة قبل إرسالها للرسوم (فهارس النقاط المختارة فقط، فالقيم الأصلية تبقى كما هي):
+#   - lttb: Largest-Triangle-Three-Buckets — يحفظ الشكل البصري (القمم والانعطافات) بعدد نقاط ثابت.
+#   - minmax: دلاء زمنية متساوية العرض، أدنى وأعلى قيمة في كل دلو — لا تضيع القيم المتطرفة.
+# كلاهما يُبقي أول نقطة وآخرها؛ x مرتبة تصاعديًا. numpy تُستورد داخل الدوال.
+import datetime
+
+from geoeco.models import ProductionMetric
+from geoeco.services.env_partitions import site_history
+
+METHODS = ("lttb", "minmax")
+
+
+def lttb(x, y, n):
+    """فهارس n نقطة بخوارزمية LTTB (كل الفهارس إن كانت السلسلة أقصر)."""
+    import numpy as np
+
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    size = len(x)
+    if n >= size or size <= 2:
+        return np.arange(size)
+    n = max(n, 3)
+    # n-2 دلوًا للنقاط الوسطى [1, size-1)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    # متوسط كل دلو (نقطة المقارنة "التالية")، والنقطة الأخيرة بعد آخر دلو
+    counts = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[:size - 1], edges[:-1]) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:size - 1], edges[:-1]) / counts, y[-1])
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # ضعف مساحة المثلث (النقطة المختارة السابقة، المرشح، متوسط الدلو التالي)
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax(x, y, n):
+    """فهارس أدنى وأعلى نقطة في n/2 دلوًا زمنيًا متساوي العرض (≤ n نقطة)، بترتيب x."""
+    import numpy as np
+
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    size = len(x)
+    if n >= size or size <= 2:
+        return np.arange(size)
+    if n < 4:  # لا يتسع دلو واحد (أدنى + أعلى) مع الطرفين
+        return lttb(x, y, n)
+    buckets = (n - 2) // 2
+    span = x[-1] - x[0]
+    b = np.zeros(size, dtype=np.int64) if span <= 0 else \
+        np.minimum(((x - x[0]) / span * buckets).astype(np.int64), buckets - 1)
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])  # x مرتبة: كل دلو مقطع متصل
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    seg = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, size]))
+    # أول فهرس يساوي الأدنى/الأعلى في مقطعه
+    i_low = np.flatnonzero(y == lows[seg])
+    i_high = np.flatnonzero(y == highs[seg])
+    i_low = i_low[np.unique(seg[i_low], return_index=True)[1]]
+    i_high = i_high[np.unique(seg[i_high], return_index=True)[1]]
+    return np.unique(np.concatenate(([0, size - 1], i_low, i_high)))
+
+
+def downsample(x, y, n, method="lttb"):
+    """(x, y) بعد إسقاط القيم المفقودة وتقليصها إلى n نقطة تقريبًا بالطريقة المطلوبة."""
+    import numpy as np
+
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    keep = ~np.isnan(y)
+    x, y = x[keep], y[keep]
+    idx = (minmax if method == "minmax" else lttb)(x, y, n)
+    return x[idx], y[idx]
+
+
+# ======= سلاسل رسوم الموقع =======
+
+CHART_KINDS = ("env", "production")
+ENV_SERIES = ("aqi", "tds", "rehab")
+
+
+def site_chart_series(site_id, kind, points, method="lttb", start=None, end=None):
+    """
+    {اسم: {"x": [...], "y": [...], "total": n}} لرسوم الموقع، كل سلسلة مقلّصة إلى points نقطة.
+    env: كل القراءات بين start و end من كل الطبقات (site_history)، x تواريخ ISO؛
+    production: الإنتاج السنوي، x سنوات.
+    """
+    import numpy as np
+
+    if kind == "env":
+        h = site_history(site_id, start, end)
+        x, series = h["date"], {name: h[name] for name in ENV_SERIES}
+        epoch = datetime.date(1970, 1, 1).toordinal()
+
+        def labels(v):
+            return np.datetime_as_string((v - epoch).astype("datetime64[D]")).tolist()
+    else:
+        qs = ProductionMetric.objects.filter(site_id=site_id)
+        if start:
+            qs = qs.filter(year__gte=start.year)
+        if end:
+            qs = qs.filter(year__lte=end.year)
+        rows = np.array(list(qs.order_by("year").values_list("year", "quantity")), dtype=float).reshape(-1, 2)
+        x, series = rows[:, 0].astype(np.int64), {"production": rows[:, 1]}
+
+        def labels(v):
+            return v.tolist()
+
+    out = {}
+    for name, y in series.items():
+        sx, sy = downsample(x, y, points, method)
+        out[name] = {"x": labels(sx), "y": np.round(sy, 2).tolist(), "total": int(np.count_nonzero(~np.isnan(y)))}
+    return out
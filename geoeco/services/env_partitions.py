@@ -0,0 +1,453 @@
+# geoeco/services/env_partitions.py
+# تقسيم EnvironmentalMetric حسب السنة + الاحتفاظ والأرشفة:
+#   - PostgreSQL: جدول مقسّم أصليًا PARTITION BY RANGE (date) بجدول لكل سنة + DEFAULT.
+#   - MySQL/MariaDB: PARTITION BY RANGE (YEAR(date)) بقسم لكل سنة + pmax
+#     (التقسيم في InnoDB لا يدعم المفاتيح الأجنبية: يُحذف قيد site_id ويبقى الفهرس).
+#   - SQLite: جداول ظل لكل سنة (…_y2023): السنوات الأقدم من ENV_HOT_YEARS تُنقل من الجدول الرئيسي.
+# السنوات الأقدم من ENV_RETENTION_YEARS تُضغط في EnvArchive (صف لكل موقع/سنة) ثم يُحذف خامها،
+# بعد التأكد من أن EnvRollup تغطيها. استعلامات التوقع والرسوم تقرأ السنوات "الساخنة" فقط
+# (hot_since) فيقتصر المخطِّط على أقسامها؛ ما يحتاج سنوات أقدم يقرأ عبر partitions()
+# (read_sites/cold_tables) فتبقى النتائج واحدة على كل المحركات رغم جداول الظل.
+import datetime
+import io
+import zlib
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Max
+
+from geoeco.models import EnvironmentalMetric, EnvArchive
+
+TABLE = EnvironmentalMetric._meta.db_table
+ENV_COLUMNS = ("site_id", "date", "air_quality_index", "water_tds", "rehabilitation_progress")
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def hot_since(today=None):
+    """أول يوم في أقدم سنة "ساخنة" (ENV_HOT_YEARS سنوات تشمل السنة الحالية)."""
+    today = today or datetime.date.today()
+    return datetime.date(today.year - getattr(settings, "ENV_HOT_YEARS", 2) + 1, 1, 1)
+
+
+def year_bounds(year):
+    return datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+
+
+def latest_readings(site, n, fields=ENV_COLUMNS[1:]):
+    """
+    آخر n قراءة لموقع (الأحدث أولًا) كقواميس fields (من ENV_COLUMNS): الأقسام الساخنة أولًا،
+    ثم كل التاريخ عبر partitions() إن لم تكفِ.
+    """
+    rows = list(site.env.filter(date__gte=hot_since()).order_by("-date").values(*fields)[:n])
+    if len(rows) < n:
+        history = partitions().read_site(site.pk)[::-1][:n]
+        rows = [{f: r[ENV_COLUMNS.index(f) - 1] for f in fields} for r in history]
+    return rows
+
+
+class PartitionBackend:
+    """بلا تقسيم (محركات أخرى): الأرشفة تحذف بنطاق التاريخ فقط."""
+    native = False
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.qn = connection.ops.quote_name
+
+    def _execute(self, sql, params=None):
+        """نفّذ وأعد عدد الصفوف المتأثرة."""
+        with self.connection.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.rowcount
+
+    def _fetch(self, sql, params=None):
+        with self.connection.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+    def is_partitioned(self):
+        return False
+
+    def partition_years(self):
+        return []
+
+    def cold_years(self):
+        """سنوات ليست في الجدول الرئيسي (جداول الظل في SQLite)."""
+        return []
+
+    def cold_tables(self):
+        """[(سنة، اسم جدول مقتبس)] لقراءات لا يراها EnvironmentalMetric.objects (جداول الظل)."""
+        return []
+
+    def setup(self, years):
+        """حوّل الجدول إلى مقسّم (إن لم يكن) وأنشئ أقسام years."""
+
+    def ensure_years(self, years):
+        pass
+
+    def rotate(self, since):
+        """SQLite: انقل السنوات قبل since إلى جداول الظل. يعيد السنوات المنقولة."""
+        return []
+
+    def read_year(self, year):
+        """قراءات سنة كاملة (ENV_COLUMNS) من موضعها الفعلي."""
+        start, end = year_bounds(year)
+        return list(EnvironmentalMetric.objects.using(self.connection.alias)
+                    .filter(date__gte=start, date__lt=end)
+                    .order_by("site_id", "date").values_list(*ENV_COLUMNS))
+
+    def read_sites(self, site_ids, start=None, end=None):
+        """قراءات مواقع (ENV_COLUMNS) بين start و end (شاملة) من الجدول وأقسامه، مرتبة (موقع، تاريخ)."""
+        qs = EnvironmentalMetric.objects.using(self.connection.alias).filter(site_id__in=list(site_ids))
+        if start:
+            qs = qs.filter(date__gte=start)
+        if end:
+            qs = qs.filter(date__lte=end)
+        return list(qs.order_by("site_id", "date").values_list(*ENV_COLUMNS))
+
+    def read_site(self, site_id, start=None, end=None):
+        """قراءات موقع (date, aqi, tds, rehab) بين start و end (شاملة) مرتبة زمنيًا."""
+        return [r[1:] for r in self.read_sites([site_id], start, end)]
+
+    def drop_year(self, year):
+        start, end = year_bounds(year)
+        return self._execute(f"DELETE FROM {self.qn(TABLE)} WHERE {self.qn('date')} >= %s AND {self.qn('date')} < %s",
+                             [start, end])
+
+    def reset(self):
+        """بعد مسح EnvironmentalMetric (أوامر التوليد): احذف ما خارج الجدول الرئيسي."""
+
+
+class PostgresPartitions(PartitionBackend):
+    native = True
+
+    def _part(self, year):
+        return f"{TABLE}_y{year}"
+
+    def is_partitioned(self):
+        rows = self._fetch("SELECT relkind FROM pg_class WHERE relname = %s AND relkind IN ('r', 'p')", [TABLE])
+        return bool(rows) and rows[0][0] == "p"
+
+    def partition_years(self):
+        rows = self._fetch(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s", [TABLE])
+        prefix = f"{TABLE}_y"
+        return sorted(int(name[len(prefix):]) for (name,) in rows if name.startswith(prefix))
+
+    @transaction.atomic
+    def setup(self, years):
+        if self.is_partitioned():
+            return self.ensure_years(years)
+        qn, legacy, seq = self.qn, f"{TABLE}_legacy", f"{TABLE}_part_id_seq"
+        site_table = EnvironmentalMetric._meta.get_field("site").related_model._meta.db_table
+        for sql in (
+            f"ALTER TABLE {qn(TABLE)} RENAME TO {qn(legacy)}",
+            f"CREATE TABLE {qn(TABLE)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) PARTITION BY RANGE ({qn('date')})",
+            # عمود identity لا يُدعم على الجداول المقسّمة قبل PG 17: تسلسل عادي
+            f"CREATE SEQUENCE {qn(seq)} OWNED BY {qn(TABLE)}.{qn('id')}",
+            f"ALTER TABLE {qn(TABLE)} ALTER COLUMN {qn('id')} SET DEFAULT nextval('{seq}')",
+            f"ALTER TABLE {qn(TABLE)} ADD PRIMARY KEY ({qn('id')}, {qn('date')})",
+            f"CREATE TABLE {qn(TABLE + '_default')} PARTITION OF {qn(TABLE)} DEFAULT",
+        ):
+            self._execute(sql)
+        self.ensure_years(years)
+        self._execute(f"INSERT INTO {qn(TABLE)} SELECT * FROM {qn(legacy)}")
+        self._execute(f"SELECT setval('{seq}', COALESCE((SELECT MAX({qn('id')}) FROM {qn(TABLE)}), 0) + 1, false)")
+        self._execute(f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + '_site_id_fk')} FOREIGN KEY ({qn('site_id')}) "
+                      f"REFERENCES {qn(site_table)} ({qn('id')}) DEFERRABLE INITIALLY DEFERRED")
+        self._execute(f"CREATE INDEX {qn(TABLE + '_site_date')} ON {qn(TABLE)} ({qn('site_id')}, {qn('date')})")
+        self._execute(f"DROP TABLE {qn(legacy)}")
+
+    def ensure_years(self, years):
+        if not self.is_partitioned():
+            return
+        for y in sorted(set(years) - set(self.partition_years())):
+            start, end = year_bounds(y)
+            self._execute(f"CREATE TABLE {self.qn(self._part(y))} PARTITION OF {self.qn(TABLE)} "
+                          f"FOR VALUES FROM ('{start}') TO ('{end}')")
+
+    def drop_year(self, year):
+        if year in self.partition_years():
+            n = self._fetch(f"SELECT COUNT(*) FROM {self.qn(self._part(year))}")[0][0]
+            self._execute(f"DROP TABLE {self.qn(self._part(year))}")
+            return n + super().drop_year(year)  # بقايا في DEFAULT
+        return super().drop_year(year)
+
+
+class MySQLPartitions(PartitionBackend):
+    native = True
+
+    def _partitions(self):
+        return [name for (name,) in self._fetch(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL", [TABLE])]
+
+    def is_partitioned(self):
+        return bool(self._partitions())
+
+    def partition_years(self):
+        return sorted(int(p[1:]) for p in self._partitions() if p[1:].isdigit())
+
+    def _defs(self, years):
+        parts = [f"PARTITION p{y} VALUES LESS THAN ({y + 1})" for y in sorted(years)]
+        return ", ".join(parts + ["PARTITION pmax VALUES LESS THAN MAXVALUE"])
+
+    def setup(self, years):
+        if self.is_partitioned():
+            return self.ensure_years(years)
+        qn = self.qn
+        fks = self._fetch(
+            "SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_TYPE = 'FOREIGN KEY'", [TABLE])
+        for (fk,) in fks:
+            self._execute(f"ALTER TABLE {qn(TABLE)} DROP FOREIGN KEY {qn(fk)}")
+        # كل مفتاح فريد يجب أن يشمل عمود التقسيم
+        self._execute(f"ALTER TABLE {qn(TABLE)} DROP PRIMARY KEY, ADD PRIMARY KEY ({qn('id')}, {qn('date')})")
+        self._execute(f"ALTER TABLE {qn(TABLE)} PARTITION BY RANGE (YEAR({qn('date')})) ({self._defs(years)})")
+
+    def ensure_years(self, years):
+        if not self.is_partitioned():
+            return
+        existing = self.partition_years()
+        # أقسام جديدة بعد آخر سنة فقط (تقسيم pmax)؛ السنوات الأقدم تبقى في أقرب قسم
+        new = sorted(y for y in set(years) if not existing or y > max(existing))
+        if new:
+            self._execute(f"ALTER TABLE {self.qn(TABLE)} REORGANIZE PARTITION pmax INTO ({self._defs(new)})")
+
+    def drop_year(self, year):
+        years = self.partition_years()
+        if year in years and year == min(years):
+            # أقدم قسم يحوي هذه السنة فقط (وما قبلها إن وُجد)
+            n = self._fetch(f"SELECT COUNT(*) FROM {self.qn(TABLE)} PARTITION (p{year})")[0][0]
+            self._execute(f"ALTER TABLE {self.qn(TABLE)} DROP PARTITION p{year}")
+            return n
+        return super().drop_year(year)
+
+
+class ShadowTablePartitions(PartitionBackend):
+    """SQLite: جدول ظل لكل سنة قديمة بنفس الأعمدة، والجدول الرئيسي للسنوات الساخنة."""
+
+    def _shadow(self, year):
+        return f"{TABLE}_y{year}"
+
+    def cold_years(self):
+        prefix = f"{TABLE}_y"
+        rows = self._fetch("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE %s", [prefix + "%"])
+        return sorted(int(name[len(prefix):]) for (name,) in rows if name[len(prefix):].isdigit())
+
+    partition_years = cold_years
+
+    def cold_tables(self):
+        return [(y, self.qn(self._shadow(y))) for y in self.cold_years()]
+
+    def rotate(self, since):
+        qn = self.qn
+        first = EnvironmentalMetric.objects.using(self.connection.alias).filter(date__lt=since).order_by("date") \
+            .values_list("date", flat=True).first()
+        if first is None:
+            return []
+        from geoeco.services.env_rollups import refresh_env_rollups
+
+        moved = []
+        for y in range(first.year, since.year):
+            start, end = year_bounds(y)
+            # بعد النقل لا يُعاد بناء تجميعات هذه السنة من الخام (cold_horizon)
+            refresh_env_rollups(since=start, until=end)
+            shadow = qn(self._shadow(y))
+            with transaction.atomic(using=self.connection.alias):
+                self._execute(f"CREATE TABLE IF NOT EXISTS {shadow} AS SELECT * FROM {qn(TABLE)} WHERE 0")
+                self._execute(f"CREATE INDEX IF NOT EXISTS {qn(self._shadow(y) + '_site_date')} "
+                              f"ON {shadow} ({qn('site_id')}, {qn('date')})")
+                cond = f"{qn('date')} >= %s AND {qn('date')} < %s"
+                self._execute(f"INSERT INTO {shadow} SELECT * FROM {qn(TABLE)} WHERE {cond}", [start, end])
+                if self._execute(f"DELETE FROM {qn(TABLE)} WHERE {cond}", [start, end]):
+                    moved.append(y)
+        return moved
+
+    def read_year(self, year):
+        rows = super().read_year(year)
+        if year in self.cold_years():
+            cols = ", ".join(self.qn(c) for c in ENV_COLUMNS)
+            shadow = self._fetch(f"SELECT {cols} FROM {self.qn(self._shadow(year))} "
+                                 f"ORDER BY {self.qn('site_id')}, {self.qn('date')}")
+            conv = self.connection.ops.convert_datefield_value
+            rows += [(r[0], conv(r[1], None, None), *r[2:]) for r in shadow]
+        return rows
+
+    def read_sites(self, site_ids, start=None, end=None, chunk=500):
+        site_ids = list(site_ids)
+        rows = super().read_sites(site_ids, start, end)
+        tables = [t for y, t in self.cold_tables()
+                  if (start is None or y >= start.year) and (end is None or y <= end.year)]
+        if not tables:
+            return rows
+        cols = ", ".join(self.qn(c) for c in ENV_COLUMNS)
+        conv = self.connection.ops.convert_datefield_value
+        cold = []
+        for i in range(0, len(site_ids), chunk):
+            ids = site_ids[i:i + chunk]
+            marks = ", ".join(["%s"] * len(ids))
+            sql = " UNION ALL ".join(f"SELECT {cols} FROM {t} WHERE {self.qn('site_id')} IN ({marks})" for t in tables)
+            cold += [(r[0], conv(r[1], None, None), *r[2:]) for r in self._fetch(sql, ids * len(tables))]
+        cold = [r for r in cold if (start is None or r[1] >= start) and (end is None or r[1] <= end)]
+        return sorted(cold + rows, key=lambda r: (r[0], r[1]))
+
+    def drop_year(self, year):
+        n = super().drop_year(year)
+        if year in self.cold_years():
+            n += self._fetch(f"SELECT COUNT(*) FROM {self.qn(self._shadow(year))}")[0][0]
+            self._execute(f"DROP TABLE {self.qn(self._shadow(year))}")
+        return n
+
+    def reset(self):
+        for y in self.cold_years():
+            self._execute(f"DROP TABLE {self.qn(self._shadow(y))}")
+
+
+BACKENDS = {
+    "postgresql": PostgresPartitions,
+    "mysql": MySQLPartitions,
+    "sqlite": ShadowTablePartitions,
+}
+
+
+def partitions(using=None):
+    connection = connections[using or router.db_for_write(EnvironmentalMetric)]
+    return BACKENDS.get(connection.vendor, PartitionBackend)(connection)
+
+
+def cold_horizon(using=None):
+    """
+    أول تاريخ ما زالت قراءاته الخام في الجدول الرئيسي: ما قبله مؤرشف أو في جداول الظل،
+    فلا يُعاد بناء تجميعاته من الخام (وإلا ضاعت).
+    """
+    archived = EnvArchive.objects.aggregate(y=Max("year"))["y"]
+    years = [y for y in [archived, *partitions(using).cold_years()] if y is not None]
+    return datetime.date(max(years) + 1, 1, 1) if years else None
+
+
+def site_history(site_id, start=None, end=None, using=None):
+    """
+    كل قراءات موقع بين start و end (شاملة) من الطبقات الثلاث: EnvArchive للسنوات المؤرشفة،
+    ثم الأقسام/جداول الظل والجدول الرئيسي. يعيد مصفوفات date (ordinal)/aqi/tds/rehab مرتبة زمنيًا.
+    """
+    import numpy as np
+
+    using = using or router.db_for_read(EnvironmentalMetric)
+    parts = []
+    archives = EnvArchive.objects.using(using).filter(site_id=site_id)
+    if start:
+        archives = archives.filter(year__gte=start.year)
+    if end:
+        archives = archives.filter(year__lte=end.year)
+    for blob in archives.order_by("year").values_list("data", flat=True):
+        parts.append(unpack_readings(blob))
+    rows = partitions(using).read_site(site_id, start, end)
+    if rows:
+        dates, aqi, tds, rehab = zip(*rows)
+        parts.append({"date": np.array(dates, dtype="datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL,
+                      "aqi": aqi, "tds": tds, "rehab": rehab})
+    out = {k: np.concatenate([np.asarray(p[k], dtype=np.int64 if k == "date" else float) for p in parts])
+           if parts else np.empty(0, dtype=np.int64 if k == "date" else float)
+           for k in ("date", "aqi", "tds", "rehab")}
+    keep = np.ones(len(out["date"]), dtype=bool)
+    if start:
+        keep &= out["date"] >= start.toordinal()
+    if end:
+        keep &= out["date"] <= end.toordinal()
+    order = np.argsort(out["date"][keep], kind="stable")
+    return {k: v[keep][order] for k, v in out.items()}
+
+
+# ======= الأرشفة =======
+
+def pack_readings(rows):
+    """صفوف (date, aqi, tds, rehab) لموقع واحد -> كتلة مضغوطة (npz + zlib)."""
+    import numpy as np
+
+    dates, aqi, tds, rehab = zip(*rows)
+    buf = io.BytesIO()
+    np.savez(
+        buf,
+        date=np.asarray([d.toordinal() for d in dates], dtype=np.int32),
+        aqi=np.asarray([np.nan if v is None else v for v in aqi], dtype=np.float32),
+        tds=np.asarray([np.nan if v is None else v for v in tds], dtype=np.float32),
+        rehab=np.asarray(rehab, dtype=np.float32),
+    )
+    return zlib.compress(buf.getvalue(), 9)
+
+
+def unpack_readings(blob):
+    """عكس pack_readings: قاموس مصفوفات date (ordinal)/aqi/tds/rehab."""
+    import numpy as np
+
+    with np.load(io.BytesIO(zlib.decompress(blob))) as d:
+        return {k: d[k] for k in d.files}
+
+
+def archive_year(year, using=None, dry_run=False):
+    """
+    اضغط قراءات سنة كاملة في EnvArchive ثم احذف خامها (قسم كامل حيث أمكن).
+    التجميعات الشهرية/الربعية لتلك السنة تُحدَّث قبل الحذف إن كان الخام ما زال في الجدول الرئيسي.
+    يعيد (عدد المواقع، عدد القراءات).
+    """
+    from geoeco.services.env_rollups import refresh_env_rollups
+
+    backend = partitions(using)
+    rows = backend.read_year(year)
+    if dry_run or not rows:
+        return len({r[0] for r in rows}), len(rows)
+
+    start, end = year_bounds(year)
+    refresh_env_rollups(since=start, until=end)
+    by_site = {}
+    for site_id, *rest in rows:
+        by_site.setdefault(site_id, []).append(rest)
+    with transaction.atomic(using=backend.connection.alias):
+        # قراءات متأخرة لسنة مؤرشفة سابقًا: تُدمج مع الكتلة الموجودة
+        existing = EnvArchive.objects.filter(year=year, site_id__in=list(by_site))
+        for a in existing:
+            d = unpack_readings(a.data)
+            old = [[datetime.date.fromordinal(int(o)), *(None if v != v else round(float(v), 2) for v in vals)]
+                   for o, *vals in zip(d["date"], d["aqi"], d["tds"], d["rehab"])]
+            by_site[a.site_id] = sorted(old + by_site[a.site_id], key=lambda r: r[0])
+        existing.delete()
+        EnvArchive.objects.bulk_create([
+            EnvArchive(site_id=sid, year=year, readings=len(rs), data=pack_readings(rs))
+            for sid, rs in by_site.items()
+        ], batch_size=500)
+        backend.drop_year(year)
+    return len(by_site), len(rows)
+
+
+def maintain(keep_years=None, setup=False, dry_run=False, log=None):
+    """
+    دورة صيانة كاملة: أقسام السنة الحالية والقادمة، نقل السنوات الباردة إلى جداول الظل (SQLite)،
+    ثم أرشفة السنوات الأقدم من keep_years. يعيد [(سنة، مواقع، قراءات)] المؤرشفة.
+    """
+    log = log or (lambda msg: None)
+    keep_years = keep_years or getattr(settings, "ENV_RETENTION_YEARS", 5)
+    backend = partitions()
+    this_year = datetime.date.today().year
+    first = EnvironmentalMetric.objects.order_by("date").values_list("date", flat=True).first()
+    years = [y for y in [first.year if first else None, *backend.cold_years()] if y is not None]
+    oldest = min(years, default=this_year)
+
+    if not dry_run:
+        if setup:
+            backend.setup(range(oldest, this_year + 2))
+        else:
+            backend.ensure_years([this_year, this_year + 1])
+        if backend.is_partitioned():
+            log(f"  partitions: {backend.partition_years()}")
+        moved = backend.rotate(hot_since())
+        if moved:
+            log(f"  moved to shadow tables: {moved}")
+
+    done = []
+    for y in range(oldest, this_year - keep_years + 1):
+        sites, n = archive_year(y, dry_run=dry_run)
+        if n:
+            log(f"  {y}: {n:,} readings from {sites:,} sites" + (" (dry run)" if dry_run else " archived"))
+            done.append((y, sites, n))
+    return done
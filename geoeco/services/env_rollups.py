@@ -0,0 +1,205 @@
+# geoeco/services/env_rollups.py
+# تجميعات بيئية مسبقة الحساب (شهري/ربعي) لكل موقع ومحافظة ومعدن:
+# المتوسط/الأدنى/الأعلى/المئين 95. تُحدَّث تزايديًا للفترات المتأثرة فقط،
+# وتُقرأ للرسوم طويلة المدى بدل مسح القراءات الخام.
+# numpy تُستورد داخل دوال الحساب فقط: rollup_series تُخدم من الويب دون تحميلها.
+import datetime
+
+from django.db import transaction
+
+from geoeco.models import Site, EnvironmentalMetric, EnvRollup
+from geoeco.services.env_partitions import cold_horizon
+
+SCOPES = ("site", "governorate", "mineral")
+PERIODS = ("month", "quarter")
+
+# حقل القياس -> بادئة أعمدة EnvRollup
+METRICS = {
+    "air_quality_index": "aqi",
+    "water_tds": "tds",
+    "rehabilitation_progress": "rehab",
+}
+
+
+def period_start(d, period):
+    """بداية الشهر/الربع الذي يقع فيه التاريخ d."""
+    month = d.month if period == "month" else 3 * ((d.month - 1) // 3) + 1
+    return datetime.date(d.year, month, 1)
+
+
+def _group_stats(gid, vals, ngroups):
+    """
+    إحصاءات لكل مجموعة دون حلقات بايثون: العدد/المتوسط/الأدنى/الأعلى/p95
+    (p95 باستيفاء خطي مثل numpy.percentile). القيم NaN تُستبعد.
+    """
+    import numpy as np
+
+    m = ~np.isnan(vals)
+    g, v = gid[m], vals[m]
+    order = np.lexsort((v, g))
+    g, v = g[order], v[order]
+    cnt = np.bincount(g, minlength=ngroups)
+    starts = np.concatenate([[0], np.cumsum(cnt)[:-1]])
+    has = cnt > 0
+    out = {k: np.full(ngroups, np.nan) for k in ("mean", "min", "max", "p95")}
+    if not has.any():
+        return out
+    sums = np.bincount(g, weights=v, minlength=ngroups)
+    out["mean"][has] = sums[has] / cnt[has]
+    out["min"][has] = v[starts[has]]
+    out["max"][has] = v[starts[has] + cnt[has] - 1]
+    pos = starts[has] + (cnt[has] - 1) * 0.95
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    out["p95"][has] = v[lo] + (v[hi] - v[lo]) * (pos - lo)
+    return out
+
+
+def _load_raw(site_ids=None, since=None, governorates=None, minerals=None, until=None):
+    import numpy as np
+
+    qs = EnvironmentalMetric.objects.all()
+    if site_ids is not None:
+        qs = qs.filter(site_id__in=list(site_ids))
+    if governorates is not None:
+        qs = qs.filter(site__governorate__in=list(governorates))
+    if minerals is not None:
+        qs = qs.filter(site__mineral__name__in=list(minerals))
+    if since is not None:
+        qs = qs.filter(date__gte=since)
+    if until is not None:
+        qs = qs.filter(date__lt=until)
+    rows = list(qs.values_list("site_id", "site__governorate", "site__mineral__name", "date", *METRICS))
+    if not rows:
+        return None
+    cols = list(zip(*rows))
+    raw = {
+        "site": np.asarray([str(x) for x in cols[0]], dtype=object),
+        "governorate": np.asarray([x or "" for x in cols[1]], dtype=object),
+        "mineral": np.asarray([x or "" for x in cols[2]], dtype=object),
+        "month": np.asarray(cols[3], dtype="datetime64[D]").astype("datetime64[M]").astype(np.int64),
+    }
+    for i, f in enumerate(METRICS, start=4):
+        raw[f] = np.asarray([np.nan if v is None else v for v in cols[i]], dtype=float)
+    return raw
+
+
+def _build_rows(raw, scope, period):
+    import numpy as np
+
+    keys, kidx = np.unique(raw[scope], return_inverse=True)
+    p = raw["month"] if period == "month" else raw["month"] - raw["month"] % 3
+    periods, pidx = np.unique(p, return_inverse=True)
+    gid_full = kidx * len(periods) + pidx
+    gids, gid = np.unique(gid_full, return_inverse=True)
+    n = np.bincount(gid, minlength=len(gids))
+    stats = {f: _group_stats(gid, raw[f], len(gids)) for f in METRICS}
+
+    def f_(x):
+        return None if np.isnan(x) else round(float(x), 2)
+
+    out = []
+    for j, g in enumerate(gids):
+        k, pi = divmod(int(g), len(periods))
+        start = np.datetime64(int(periods[pi]), "M").astype("datetime64[D]").astype(datetime.date)
+        row = EnvRollup(scope=scope, key=keys[k], period=period, period_start=start, readings=int(n[j]))
+        for f, prefix in METRICS.items():
+            for stat in ("mean", "min", "max", "p95"):
+                setattr(row, f"{prefix}_{stat}", f_(stats[f][stat][j]))
+        out.append(row)
+    return out
+
+
+def _rows_for(raw, scope):
+    if raw is None:
+        return []
+    return [r for period in PERIODS for r in _build_rows(raw, scope, period)]
+
+
+@transaction.atomic
+def _replace(scope, keys, since, rows, until=None):
+    qs = EnvRollup.objects.filter(scope=scope)
+    if keys is not None:
+        qs = qs.filter(key__in=list(keys))
+    if since is not None:
+        qs = qs.filter(period_start__gte=period_start(since, "quarter"))
+    if until is not None:
+        qs = qs.filter(period_start__lt=until)
+    qs.delete()
+    EnvRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+def refresh_env_rollups(site_ids=None, since=None, until=None):
+    """
+    أعد حساب التجميعات المتأثرة.
+    - site_ids=None: كل المواقع (إعادة بناء كاملة إن كان since=None أيضًا).
+    - since: أقدم تاريخ تغيّر؛ تُعاد الفترات ابتداءً من ربعه فقط.
+    - until: (بداية ربع) لا تُلمس الفترات من هذا التاريخ فصاعدًا.
+    لا يُعاد بناء ما قبل cold_horizon(): خامه مؤرشف أو في جداول الظل.
+    المحافظات/المعادن المتأثرة تُحسب من القراءات الخام لكل مواقعها في الفترة نفسها
+    (المئين لا يُشتق من ملخصات المواقع).
+    يعيد عدد صفوف التجميع المكتوبة.
+    """
+    since = period_start(since, "quarter") if since is not None else None
+    horizon = cold_horizon()
+    if horizon is not None and (since is None or since < horizon):
+        since = horizon
+    if until is not None and since is not None and since >= until:
+        return 0
+    written = 0
+
+    if site_ids is None:
+        raw = _load_raw(since=since, until=until)
+        for scope in SCOPES:
+            rows = _rows_for(raw, scope)
+            _replace(scope, None, since, rows, until)
+            written += len(rows)
+        return written
+
+    site_ids = list(site_ids)
+    raw = _load_raw(site_ids=site_ids, since=since, until=until)
+    rows = _rows_for(raw, "site")
+    _replace("site", [str(i) for i in site_ids], since, rows, until)
+    written += len(rows)
+
+    meta = list(Site.objects.filter(id__in=site_ids).values_list("governorate", "mineral__name"))
+    govs = {g for g, _ in meta}
+    mins = {m for _, m in meta if m}
+    for scope, keys, filt in (("governorate", govs, {"governorates": govs}),
+                              ("mineral", mins, {"minerals": mins})):
+        if not keys:
+            continue
+        raw = _load_raw(since=since, until=until, **filt)
+        rows = _rows_for(raw, scope)
+        _replace(scope, keys, since, rows, until)
+        written += len(rows)
+    return written
+
+
+def _series_query(scope, key, period, start, end, metrics):
+    qs = EnvRollup.objects.filter(scope=scope, key=str(key), period=period)
+    if start:
+        qs = qs.filter(period_start__gte=start)
+    if end:
+        qs = qs.filter(period_start__lte=end)
+    cols = [f"{m}_{s}" for m in metrics for s in ("mean", "min", "max", "p95")]
+    return qs.order_by("period_start").values_list("period_start", "readings", *cols), cols
+
+
+def _to_series(rows, cols):
+    series = {"dates": [r[0].isoformat() for r in rows], "readings": [r[1] for r in rows]}
+    for i, c in enumerate(cols, start=2):
+        series[c] = [r[i] for r in rows]
+    return series
+
+
+def rollup_series(scope, key, period="month", start=None, end=None, metrics=("aqi", "tds", "rehab")):
+    """سلسلة مضغوطة للرسم: قوائم متوازية (تواريخ + أعمدة) بدل قائمة قواميس."""
+    qs, cols = _series_query(scope, key, period, start, end, metrics)
+    return _to_series(list(qs), cols)
+
+
+async def arollup_series(scope, key, period="month", start=None, end=None, metrics=("aqi", "tds", "rehab")):
+    """نسخة async من rollup_series (async ORM) لواجهات ASGI."""
+    qs, cols = _series_query(scope, key, period, start, end, metrics)
+    return _to_series([r async for r in qs], cols)
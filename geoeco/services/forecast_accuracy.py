@@ -0,0 +1,253 @@
+# geoeco/services/forecast_accuracy.py
+# دقة التوقعات مقابل القيم الفعلية بعد ورودها:
+#   - الإنتاج: ForecastProduction × ProductionMetric لنفس (موقع، سنة)، للسنوات المكتملة فقط.
+#   - البيئة: ForecastEnvironment × متوسط قراءات الشهر نفسه (GROUP BY شهر في SQL)، للأشهر المكتملة فقط.
+#   - ForecastAccuracy صف لكل (دفعة، موقع، هدف) بمجاميع قابلة للدمج و through = آخر فترة احتُسبت:
+#     كل تحديث يضيف النقاط الأحدث فقط، للدفعات المكتملة (المحفوظة حسب FORECAST_KEEP_RUNS).
+#   - المطابقة والتجميع متجهان (مفاتيح مرتبة + searchsorted + bincount)، بلا حلقة لكل نقطة.
+# القراءة (accuracy_summary) تجميع SQL فوق ForecastAccuracy؛ numpy تُستورد داخل دوال الحساب.
+import datetime
+import math
+
+from django.db import transaction
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from geoeco.models import (
+    EnvironmentalMetric, ForecastAccuracy, ForecastEnvironment, ForecastProduction, ForecastRun,
+    ForecastSelection, ProductionMetric, Site,
+)
+from geoeco.services.ai_forecast import ENV_TARGETS, FORECAST_INTERVAL_FIELDS
+from geoeco.services.env_partitions import hot_since
+
+ACCURACY_CHUNK = 2000
+SUMS = ("points", "abs_err_sum", "sq_err_sum", "err_sum", "actual_abs_sum", "ape_sum", "ape_n", "in80", "in95")
+# بُعد التجميع -> مسار الحقل
+DIMENSIONS = {
+    "target": "target",
+    "model": "model",
+    "mineral": "site__mineral__name",
+    "governorate": "site__governorate",
+    "site": "site_id",
+    "run": "run_id",
+}
+
+
+def _code(d):
+    """فترة شهرية كعدد صحيح (السنة × 12 + الشهر − 1)."""
+    return d.year * 12 + d.month - 1
+
+
+def _from_code(code):
+    return datetime.date(int(code) // 12, int(code) % 12 + 1, 1)
+
+
+def _month_codes(dates):
+    """_code لقائمة تواريخ دفعة واحدة (datetime64[M])."""
+    import numpy as np
+    return np.array(dates, dtype="datetime64[M]").astype(np.int64).astype(float) + 1970 * 12
+
+
+def _keys(a, b):
+    """مفتاح int64 مركّب لعمودين صحيحين (b < 2^32)."""
+    import numpy as np
+    return (np.asarray(a, dtype=np.int64) << 32) | np.asarray(b, dtype=np.int64)
+
+
+def _lookup(keys, table_keys, table_values, missing):
+    """قيمة table_values لكل مفتاح في keys (missing إن لم يوجد) عبر بحث ثنائي متجه."""
+    import numpy as np
+    out = np.full(len(keys), missing, dtype=float)
+    if len(table_keys):
+        order = np.argsort(table_keys, kind="stable")
+        sk = table_keys[order]
+        pos = np.minimum(np.searchsorted(sk, keys), len(sk) - 1)
+        hit = sk[pos] == keys
+        out[hit] = np.asarray(table_values, dtype=float)[order][pos[hit]]
+    return out
+
+
+def _production_points(run_ids, site_ids, today):
+    """
+    {"production": (run, site, code, forecast, actual, lo80, hi80, lo95, hi95)} للسنوات قبل today.year:
+    إنتاج السنة الجارية جزئي، و through يمنع إعادة قياسه بعد اكتماله.
+    """
+    import numpy as np
+
+    rows = list(ForecastProduction.objects
+                .filter(run_id__in=run_ids, site_id__in=site_ids, year__lt=today.year)
+                .values_list("run_id", "site_id", "year", "quantity", *FORECAST_INTERVAL_FIELDS["production"]))
+    if not rows:
+        return {}
+    run, site, year, fc, lo80, hi80, lo95, hi95 = np.array(rows, dtype=float).T
+    actual = list(ProductionMetric.objects
+                  .filter(site_id__in=site_ids, year__gte=int(year.min()), year__lt=today.year)
+                  .values_list("site_id", "year", "quantity"))
+    a = np.array(actual, dtype=float).reshape(-1, 3)
+    y = _lookup(_keys(site, year), _keys(a[:, 0], a[:, 1]), a[:, 2], np.nan)
+    return {"production": (run, site, year * 12, fc, y, lo80, hi80, lo95, hi95)}
+
+
+def _environment_points(run_ids, site_ids, today):
+    """{target: (...)} للأشهر المكتملة؛ القيمة الفعلية = متوسط قراءات الشهر."""
+    import numpy as np
+
+    month_start = today.replace(day=1)
+    since = hot_since(today)  # أقدم من ذلك في أقسام باردة/أرشيف: لا يُقاس
+    rows = list(ForecastEnvironment.objects
+                .filter(run_id__in=run_ids, site_id__in=site_ids, date__gte=since, date__lt=month_start)
+                .values_list("run_id", "site_id", "date", "air_quality_index", "water_tds",
+                             "rehabilitation_progress", *FORECAST_INTERVAL_FIELDS["environment"]))
+    if not rows:
+        return {}
+    cols = list(zip(*rows))
+    run, site = np.array(cols[0], dtype=float), np.array(cols[1], dtype=float)
+    code = _month_codes(cols[2])
+    actual = list(EnvironmentalMetric.objects
+                  .filter(site_id__in=site_ids, date__gte=_from_code(code.min()), date__lt=month_start)
+                  .annotate(month=TruncMonth("date"))
+                  .values("site_id", "month")
+                  .annotate(aqi=Avg("air_quality_index"), tds=Avg("water_tds"),
+                            rehab=Avg("rehabilitation_progress"))
+                  .values_list("site_id", "month", "aqi", "tds", "rehab"))
+    a_site = np.array([r[0] for r in actual], dtype=float)
+    a_code = _month_codes([r[1] for r in actual])
+    keys, a_keys = _keys(site, code), _keys(a_site, a_code)
+    out = {}
+    for j, target in enumerate(ENV_TARGETS):
+        fc = np.array(cols[3 + j], dtype=float)
+        bounds = [np.array(cols[6 + 4 * j + b], dtype=float) for b in range(4)]
+        values = np.array([r[2 + j] for r in actual], dtype=float)
+        out[target] = (run, site, code, fc, _lookup(keys, a_keys, values, np.nan), *bounds)
+    return out
+
+
+@transaction.atomic
+def _refresh_chunk(run_ids, site_ids, today):
+    import numpy as np
+
+    points = {**_production_points(run_ids, site_ids, today), **_environment_points(run_ids, site_ids, today)}
+    if not points:
+        return 0
+    existing = {(r.run_id, r.site_id, r.target): r for r in
+                ForecastAccuracy.objects.select_for_update().filter(run_id__in=run_ids, site_id__in=site_ids)}
+    models = {(r, s, t): m for r, s, t, m in
+              ForecastSelection.objects.filter(run_id__in=run_ids, site_id__in=site_ids)
+              .values_list("run_id", "site_id", "target", "model")}
+    now = timezone.now()
+    created, updated, scored = [], [], 0
+    for target, (run, site, code, fc, actual, lo80, hi80, lo95, hi95) in points.items():
+        done = [(k[0], k[1], _code(r.through)) for k, r in existing.items() if k[2] == target]
+        done = np.array(done, dtype=float).reshape(-1, 3)
+        through = _lookup(_keys(run, site), _keys(done[:, 0], done[:, 1]), done[:, 2], -1)
+        new = ~np.isnan(actual) & ~np.isnan(fc) & (code > through)
+        if not new.any():
+            continue
+        run, site, code, fc, actual = run[new], site[new], code[new], fc[new], actual[new]
+        lo80, hi80, lo95, hi95 = lo80[new], hi80[new], lo95[new], hi95[new]
+        err = fc - actual
+        nonzero = actual != 0
+        ape = np.zeros_like(err)
+        ape[nonzero] = np.abs(err[nonzero]) / np.abs(actual[nonzero]) * 100
+        with np.errstate(invalid="ignore"):  # NaN في حدود الفترة = خارجها
+            inside80 = (actual >= lo80) & (actual <= hi80)
+            inside95 = (actual >= lo95) & (actual <= hi95)
+
+        groups, inv = np.unique(_keys(run, site), return_inverse=True)
+        sums = {
+            "points": np.bincount(inv),
+            "abs_err_sum": np.bincount(inv, np.abs(err)),
+            "sq_err_sum": np.bincount(inv, err * err),
+            "err_sum": np.bincount(inv, err),
+            "actual_abs_sum": np.bincount(inv, np.abs(actual)),
+            "ape_sum": np.bincount(inv, ape),
+            "ape_n": np.bincount(inv, nonzero),
+            "in80": np.bincount(inv, inside80),
+            "in95": np.bincount(inv, inside95),
+        }
+        last = np.full(len(groups), -1.0)
+        np.maximum.at(last, inv, code)
+        scored += int(new.sum())
+
+        for g, key in enumerate(groups.tolist()):
+            run_id, site_id = key >> 32, key & 0xFFFFFFFF
+            row = existing.get((run_id, site_id, target))
+            if row is None:
+                row = ForecastAccuracy(run_id=run_id, site_id=site_id, target=target,
+                                       model=models.get((run_id, site_id, target), ""))
+                for name in SUMS:
+                    setattr(row, name, 0)
+                created.append(row)
+            else:
+                updated.append(row)
+            for name, values in sums.items():
+                v = values[g].item()
+                setattr(row, name, getattr(row, name) + (int(v) if name in ("points", "ape_n", "in80", "in95") else v))
+            row.through = _from_code(last[g])
+            row.updated_at = now
+    ForecastAccuracy.objects.bulk_create(created, batch_size=2000)
+    ForecastAccuracy.objects.bulk_update(updated, SUMS + ("through", "updated_at"), batch_size=2000)
+    return scored
+
+
+def refresh_accuracy(site_ids=None, run_ids=None, chunk_size=ACCURACY_CHUNK, today=None):
+    """
+    أضف أخطاء نقاط التوقع التي وردت قيمتها الفعلية منذ آخر تحديث، للدفعات المكتملة
+    (أو run_ids) ولكل المواقع (أو site_ids)، على دفعات من chunk_size موقع. يعيد عدد النقاط الجديدة.
+    """
+    today = today or datetime.date.today()
+    if run_ids is None:
+        run_ids = ForecastRun.objects.filter(status="complete").values_list("id", flat=True)
+    run_ids = list(run_ids)
+    if not run_ids:
+        return 0
+    if site_ids is None:
+        site_ids = Site.objects.order_by("id").values_list("id", flat=True)
+    site_ids = list(site_ids)
+    return sum(_refresh_chunk(run_ids, site_ids[i:i + chunk_size], today)
+               for i in range(0, len(site_ids), chunk_size))
+
+
+def reset_accuracy(run_ids=None):
+    """احذف المجاميع (لإعادة الاحتساب من البداية). يعيد عدد الصفوف."""
+    qs = ForecastAccuracy.objects.all() if run_ids is None else ForecastAccuracy.objects.filter(run_id__in=run_ids)
+    return qs.delete()[0]
+
+
+# ======= القراءة =======
+
+def _ratio(num, den, scale=1.0, digits=2):
+    return round(num / den * scale, digits) if den else None
+
+
+def accuracy_summary(by=("target", "model"), filters=None):
+    """
+    مقاييس الخطأ مجمّعة حسب أبعاد DIMENSIONS (target, model, mineral, governorate, site, run).
+    filters: {بُعد: [قيم]}. كل صف: series, points, mae, rmse, bias, mape, wape, coverage80/95.
+    """
+    qs = ForecastAccuracy.objects.filter(points__gt=0)
+    for dim, vals in (filters or {}).items():
+        if dim in DIMENSIONS and vals:
+            qs = qs.filter(**{f"{DIMENSIONS[dim]}__in": list(vals)})
+    by = [d for d in by if d in DIMENSIONS]
+    paths = [DIMENSIONS[d] for d in by]
+    rows = (qs.values(*paths)
+            .annotate(series=Count("id"), **{name: Sum(name) for name in SUMS})
+            .order_by(*paths))
+    out = []
+    for r in rows:
+        n = r["points"]
+        out.append({
+            **{d: r[p] for d, p in zip(by, paths)},
+            "series": r["series"],
+            "points": n,
+            "mae": _ratio(r["abs_err_sum"], n),
+            "rmse": round(math.sqrt(r["sq_err_sum"] / n), 2),
+            "bias": _ratio(r["err_sum"], n),
+            "mape": _ratio(r["ape_sum"], r["ape_n"]),
+            "wape": _ratio(r["abs_err_sum"], r["actual_abs_sum"], 100),
+            "coverage80": _ratio(r["in80"], n, 100, 1),
+            "coverage95": _ratio(r["in95"], n, 100, 1),
+        })
+    return out
@@ -0,0 +1,261 @@
+# geoeco/services/forecast_select.py
+# اختيار نموذج التنبؤ لكل سلسلة باختبار رجعي متدحرج (rolling origin)، متجه عبر السلاسل:
+#   - المرشحون: mean (متوسط آخر 3)، seasonal_naive (شهري فقط، m=12)، linear، ses،
+#     ets (اتجاه جمعي)، ets_damped (اتجاه مخمَّد).
+#   - ETS بشبكة معاملات (alpha, beta, phi): تمريرة واحدة على السلسلة تعطي لكل أصل o مجموع
+#     مربعات أخطاء الخطوة الواحدة حتى o وحالة (level, trend) عنده، فإعادة الملاءمة عند كل أصل مجانية.
+#   - الفائز بأقل MASE (أو MAPE) على كل نوافذ الاختبار؛ التعادل يفضّل الأبسط (ترتيب CANDIDATES).
+#   - فترات التنبؤ 80%/95%: σ للخطوة الأولى = وسيط (عبر المرشحين) لجذر متوسط e²/k في الاختبار
+#     (أخطاء الفائز وحده متفائلة بسبب الاختيار)، ينمو مع الأفق كـ √k، و z من توزيع t بدرجات
+#     حرية = عدد الأخطاء؛ بلا اختبار: انحراف فروق السلسلة (سير عشوائي).
+# الوحدة لا تستورد Django: دفعاتها مصفوفات فقط، فتُرسل لعمليات منفصلة (run_batches).
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+
+CANDIDATES = ("mean", "seasonal_naive", "linear", "ses", "ets", "ets_damped")
+ETS_MODELS = ("ses", "ets", "ets_damped")
+SEASON = 12
+MEAN_WINDOW = 3
+# مستوى الثقة -> z للتوزيع الطبيعي (فترة متماثلة)
+INTERVALS = {80: 1.2815515655446004, 95: 1.959963984540054}
+
+# kind -> المرشحون، أقل طول تدريب، عدد أصول الاختبار، النموذج عند تعذّر الاختبار (السلوك السابق)
+KINDS = {
+    "annual": {"models": ("mean", "linear", "ses", "ets", "ets_damped"),
+               "min_train": 3, "origins": 3, "default": "ets"},
+    "monthly": {"models": CANDIDATES, "min_train": 6, "origins": 6, "default": "linear"},
+}
+
+ALPHAS = np.linspace(0.1, 0.9, 9)
+BETAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5])
+PHIS = np.array([0.8, 0.9, 0.98])
+
+
+def _ets_grid():
+    """(alpha, beta, phi, model) لكل نقطة شبكة؛ ses = phi 0 (الاتجاه لا يدخل التنبؤ)."""
+    rows = [(a, 0.0, 0.0, "ses") for a in ALPHAS]
+    rows += [(a, b, 1.0, "ets") for a in ALPHAS for b in BETAS]
+    rows += [(a, b, p, "ets_damped") for a in ALPHAS for b in BETAS for p in PHIS]
+    alpha, beta, phi, model = zip(*rows)
+    return np.array(alpha), np.array(beta), np.array(phi), np.array(model)
+
+
+ALPHA, BETA, PHI, GRID_MODEL = _ets_grid()
+
+
+def fill_gaps(Y):
+    """القيم الناقصة (NaN) بآخر قيمة معروفة، والبادئة بأول قيمة؛ سلسلة فارغة كليًا -> 0."""
+    Y = np.array(Y, dtype=float)
+    missing = np.isnan(Y)
+    if not missing.any():
+        return Y
+    idx = np.where(missing, 0, np.arange(Y.shape[1])[None, :])
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    Y = Y[np.arange(len(Y))[:, None], idx]
+    first = np.argmax(~np.isnan(Y), axis=1)
+    lead = np.isnan(Y)
+    Y[lead] = np.broadcast_to(Y[np.arange(len(Y)), first][:, None], Y.shape)[lead]
+    return np.nan_to_num(Y)
+
+
+# ======= المرشحون: (n, T) + أصول -> (len(origins), n, h) =======
+# الأصل o يعني التدريب على Y[:, :o] والتنبؤ بالخطوات o .. o+h-1.
+
+def fc_mean(Y, origins, h):
+    return np.stack([np.repeat(Y[:, max(0, o - MEAN_WINDOW):o].mean(axis=1)[:, None], h, axis=1)
+                     for o in origins])
+
+
+def fc_seasonal_naive(Y, origins, h):
+    """قيمة نفس الشهر من آخر موسم كامل؛ NaN إن لم يتوفر موسم (o < SEASON)."""
+    out = np.full((len(origins), len(Y), h), np.nan)
+    for i, o in enumerate(origins):
+        if o >= SEASON:
+            out[i] = Y[:, o - SEASON + np.arange(h) % SEASON]
+    return out
+
+
+def fc_linear(Y, origins, h):
+    """y = a + b x بالمربعات الصغرى على البادئة (مجاميع مغلقة الصيغة)."""
+    x = np.arange(Y.shape[1], dtype=float)
+    cy, cxy = np.cumsum(Y, axis=1), np.cumsum(Y * x, axis=1)
+    out = []
+    for o in origins:
+        sx, sxx = o * (o - 1) / 2.0, (o - 1) * o * (2 * o - 1) / 6.0
+        sy, sxy = cy[:, o - 1], cxy[:, o - 1]
+        den = o * sxx - sx * sx
+        b = (o * sxy - sx * sy) / den if den else np.zeros(len(Y))
+        a = (sy - b * sx) / o
+        out.append(a[:, None] + b[:, None] * (o + np.arange(h))[None, :])
+    return np.stack(out)
+
+
+def fc_ets(Y, origins, h):
+    """
+    ses/ets/ets_damped دفعة واحدة: {model: (len(origins), n, h)}.
+    عند كل أصل تُختار نقطة الشبكة بأقل SSE لأخطاء الخطوة الواحدة حتى ذلك الأصل،
+    ويُحفظ من الحالة (n, G) عمود الفائز فقط.
+    """
+    n, T = Y.shape
+    level = np.repeat(Y[:, :1], len(ALPHA), axis=1)
+    trend = np.repeat(Y[:, 1:2] - Y[:, :1] if T > 1 else np.zeros((n, 1)), len(ALPHA), axis=1)
+    sse = np.zeros_like(level)
+    err, buf = np.empty_like(level), np.empty_like(level)
+    gain = ALPHA * BETA
+    steps = np.cumsum(PHI[:, None] ** np.arange(1, h + 1)[None, :], axis=1)  # (G, h)
+    cols = {model: np.flatnonzero(GRID_MODEL == model) for model in ETS_MODELS}
+    rows = np.arange(n)
+    out = {model: np.empty((len(origins), n, h)) for model in ETS_MODELS}
+
+    def snapshot(i):
+        for model, c in cols.items():
+            best = c[np.argmin(sse[:, c], axis=1)]
+            out[model][i] = level[rows, best][:, None] + trend[rows, best][:, None] * steps[best]
+
+    want = {o - 1: i for i, o in enumerate(origins)}
+    if 0 in want:
+        snapshot(want[0])
+    for t in range(1, T):
+        # صيغة تصحيح الخطأ: l += phi*b + alpha*e ، b = phi*b + alpha*beta*e (في المكان)
+        np.multiply(trend, PHI, out=trend)
+        np.add(level, trend, out=level)
+        np.subtract(Y[:, t:t + 1], level, out=err)
+        np.multiply(err, err, out=buf)
+        sse += buf
+        np.multiply(err, ALPHA, out=buf)
+        level += buf
+        np.multiply(err, gain, out=buf)
+        trend += buf
+        if t in want:
+            snapshot(want[t])
+    return out
+
+
+# ======= الاختبار والاختيار =======
+
+def _scores(errors, actual, scale):
+    """errors/actual (n, P) (NaN = نموذج غير متاح) -> (mae, mape%, mase) لكل سلسلة."""
+    abs_err = np.abs(errors)
+    mae = abs_err.mean(axis=1)
+    nonzero = np.abs(actual) > 0  # MAPE يتجاهل القيم الفعلية الصفرية
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mape = np.where(nonzero, abs_err / np.where(nonzero, np.abs(actual), 1), 0).sum(axis=1) \
+            / nonzero.sum(axis=1) * 100
+        mase = np.where(scale > 0, mae / scale, np.nan)
+    return mae, mape, mase
+
+
+def evaluate(Y, h, kind="annual", metric="mase"):
+    """
+    Y: (n, T) بطول موحد. يعيد قائمة n قواميس:
+    model, forecast (h قيم)، mape، mase، origins (نوافذ الاختبار)، scores {model: [mape, mase]}،
+    intervals {80: (lower, upper), 95: ...} بطول h.
+    """
+    spec = KINDS[kind]
+    Y = fill_gaps(Y)
+    n, T = Y.shape
+    origins = list(range(max(spec["min_train"], T - spec["origins"]), T))
+    fc = {}
+    for model in spec["models"]:
+        if model in ETS_MODELS:
+            if model not in fc:
+                fc.update({m: v for m, v in fc_ets(Y, origins + [T], h).items() if m in spec["models"]})
+        else:
+            fc[model] = globals()[f"fc_{model}"](Y, origins + [T], h)
+
+    results = [{"model": spec["default"], "forecast": fc[spec["default"]][-1][i], "mape": None,
+                "mase": None, "origins": len(origins), "scores": {}} for i in range(n)]
+    sigma = np.std(np.diff(Y, axis=1), axis=1) if T > 1 else np.zeros(n)
+    if not origins:
+        return _finish(results, sigma, max(T - 2, 1))
+
+    # أزواج (أصل، خطوة) ضمن السلسلة: أخطاء مجمّعة (n, P) لكل نموذج
+    pairs = [(i, o, k) for i, o in enumerate(origins) for k in range(min(h, T - o))]
+    actual = np.stack([Y[:, o + k] for _, o, k in pairs], axis=1)
+    step = np.array([k + 1 for _, _, k in pairs], dtype=float)
+    scale = np.mean(np.abs(np.diff(Y, axis=1)), axis=1) if T > 1 else np.zeros(n)
+    rank, table, spread = [], {}, {}
+    for model in spec["models"]:
+        pred = np.stack([fc[model][i, :, k] for i, o, k in pairs], axis=1)
+        mae, mape, mase = _scores(actual - pred, actual, scale)
+        usable = ~np.isnan(pred).any(axis=1)
+        spread[model] = np.sqrt(np.mean((actual - pred) ** 2 / step, axis=1))  # σ للخطوة الأولى (NaN لغير الصالح)
+        # MASE = MAE / مقياس ثابت للسلسلة: الترتيب بـ MAE نفسه (يعمل حتى لسلسلة ثابتة)
+        key = mape if metric == "mape" else mae
+        rank.append(np.where(usable & ~np.isnan(key), key, np.inf))
+        table[model] = (usable, _nums(mape), _nums(mase))
+    rank = np.stack(rank)
+    winner = np.argmin(rank, axis=0)
+    spreads = np.stack(list(spread.values()))
+    spreads[:, np.isnan(spreads).all(axis=0)] = 0.0  # سلسلة بلا مرشح صالح: تبقى على الافتراضي
+    pooled = np.nanmedian(spreads, axis=0)
+    for i in range(n):
+        if not np.isfinite(rank[winner[i], i]):
+            continue  # لا مرشح صالح: يبقى الافتراضي
+        model = spec["models"][winner[i]]
+        r = results[i]
+        r["model"] = model
+        r["forecast"] = fc[model][-1][i]
+        r["mape"], r["mase"] = table[model][1][i], table[model][2][i]
+        r["scores"] = {m: [mp[i], ms[i]] for m, (ok, mp, ms) in table.items() if ok[i]}
+        sigma[i] = pooled[i]
+    return _finish(results, sigma, len(pairs))
+
+
+def _nums(a, digits=4):
+    """مصفوفة -> قائمة أعداد مقرّبة (None بدل NaN/inf)."""
+    return [v if v == v and abs(v) != float("inf") else None for v in np.round(a, digits).tolist()]
+
+
+def t_quantile(z, df):
+    """كمّية توزيع t المقابلة لكمّية طبيعية z (مفكوك Cornish-Fisher؛ دقيق لـ df >= 3 تقريبًا)."""
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+def _finish(results, sigma, df):
+    """قوائم بايثون + فترات التنبؤ (متجهة لكل السلاسل): forecast ± t σ √k."""
+    if not results:
+        return results
+    F = np.array([r["forecast"] for r in results], dtype=float)
+    growth = sigma[:, None] * np.sqrt(np.arange(1, F.shape[1] + 1))[None, :]
+    bounds = {}
+    for level, z in INTERVALS.items():
+        half = t_quantile(z, df) * growth
+        bounds[level] = ((F - half).tolist(), (F + half).tolist())
+    for i, (r, row) in enumerate(zip(results, F.tolist())):
+        r["forecast"] = row
+        r["intervals"] = {level: (lo[i], hi[i]) for level, (lo, hi) in bounds.items()}
+    return results
+
+
+def select_forecasts(series, h, kind="annual", metric="mase"):
+    """سلاسل بأطوال مختلفة (قائمة تسلسلات) -> نتائج evaluate بنفس الترتيب؛ تُجمَّع حسب الطول."""
+    out = [None] * len(series)
+    by_len = {}
+    for i, s in enumerate(series):
+        by_len.setdefault(len(s), []).append(i)
+    for T, idx in by_len.items():
+        Y = np.array([series[i] for i in idx], dtype=float).reshape(len(idx), T)
+        for i, r in zip(idx, evaluate(Y, h, kind, metric)):
+            out[i] = r
+    return out
+
+
+def select_task(task):
+    """دفعة واحدة {name: (series, h, kind)} + metric (دالة على مستوى الوحدة لتُرسل لعملية أخرى)."""
+    metric = task.get("metric", "mase")
+    return {name: select_forecasts(series, h, kind, metric) for name, (series, h, kind) in task["jobs"].items()}
+
+
+def run_batches(tasks, workers=1):
+    """شغّل الدفعات (بالتوازي إن workers > 1) وأعد نتائجها بنفس الترتيب."""
+    if workers <= 1 or len(tasks) <= 1:
+        return [select_task(t) for t in tasks]
+    # spawn لا fork: العمليات الأبناء لا ترث اتصالات قاعدة البيانات المفتوحة
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks), os.cpu_count() or 1), mp_context=ctx) as pool:
+        return list(pool.map(select_task, tasks))
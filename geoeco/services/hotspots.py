@@ -0,0 +1,222 @@
+# geoeco/services/hotspots.py
+# انتماء المواقع لمضلعات HOTSPOT_POLYGONS ومجاميعها المسبقة:
+#   - HotspotMembership: يُبنى دفعة واحدة (صندوق المضلع + نقطة-داخل-مضلع متجهة)،
+#     ويُحدَّث لموقع واحد عند حفظه (إشارة post_save).
+#   - HotspotStat: خلايا مضلع × معدن × شريحة (مواقع، إنتاج، مجاميع بيئية للسنوات الساخنة)،
+#     تُعاد للمضلعات المتأثرة فقط عند اكتمال المعاملة أو من عامل إعادة الحساب.
+# القراءة (الصفحة والـ API) من HotspotStat فقط؛ numpy تُستورد داخل دوال البناء.
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+
+from geoeco.geo.geocache import geo_cached, poly_fingerprint
+from geoeco.geo.oman_hotspots import HOTSPOT_POLYGONS, point_in_poly
+from geoeco.models import EnvironmentalMetric, HotspotMembership, HotspotStat, ProductionMetric, Site
+from geoeco.services.env_partitions import hot_since
+from geoeco.services.spatial_index import points_in_polygon, polygon_bbox
+
+BANDS = ("green", "yellow", "red")
+
+_BOXES = {key: polygon_bbox(h["poly"]) for key, h in HOTSPOT_POLYGONS.items()}
+
+
+# ======= الانتماء =======
+
+@geo_cached("hotspots_at", version=lambda: poly_fingerprint([(k, h["poly"]) for k, h in HOTSPOT_POLYGONS.items()]))
+def hotspots_at(lat, lon):
+    """مفاتيح المضلعات التي تحوي النقطة."""
+    if lat is None or lon is None:
+        return []
+    return [
+        key for key, h in HOTSPOT_POLYGONS.items()
+        if _BOXES[key][0] <= lat <= _BOXES[key][2] and _BOXES[key][1] <= lon <= _BOXES[key][3]
+        and point_in_poly.uncached(lat, lon, h["poly"])
+    ]
+
+
+def compute_memberships(site_ids, lat, lon):
+    """مصفوفات (n,) -> [(site_id, hotspot)] بتمريرة متجهة واحدة لكل مضلع."""
+    import numpy as np
+
+    site_ids, lat, lon = np.asarray(site_ids), np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    pairs = []
+    for key, h in HOTSPOT_POLYGONS.items():
+        min_lat, min_lon, max_lat, max_lon = _BOXES[key]
+        cand = np.flatnonzero((lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon))
+        inside = cand[points_in_polygon(lat[cand], lon[cand], h["poly"])]
+        pairs.extend((int(sid), key) for sid in site_ids[inside])
+    return pairs
+
+
+@transaction.atomic
+def rebuild_memberships(batch_size=5000):
+    """أعد بناء جدول الانتماء لكل المواقع. يعيد عدد الصفوف."""
+    rows = list(Site.objects.values_list("id", "lat", "lon"))
+    HotspotMembership.objects.all().delete()
+    if not rows:
+        return 0
+    ids, lat, lon = zip(*rows)
+    members = [HotspotMembership(site_id=sid, hotspot=key) for sid, key in compute_memberships(ids, lat, lon)]
+    HotspotMembership.objects.bulk_create(members, batch_size=batch_size)
+    return len(members)
+
+
+def sync_site(site, created=False):
+    """حدّث انتماء موقع واحد؛ يعيد المضلعات المتأثرة (القديمة والجديدة)."""
+    new = set(hotspots_at(site.lat, site.lon))
+    old = set() if created else set(
+        HotspotMembership.objects.filter(site_id=site.pk).values_list("hotspot", flat=True))
+    if old - new:
+        HotspotMembership.objects.filter(site_id=site.pk, hotspot__in=old - new).delete()
+    if new - old:
+        HotspotMembership.objects.bulk_create(
+            [HotspotMembership(site_id=site.pk, hotspot=key) for key in new - old])
+    return old | new
+
+
+# ======= المجاميع =======
+
+def _compute_stats(keys=None):
+    cells = {}
+
+    def cell(hotspot, mineral, band):
+        k = (hotspot, mineral or "", band or "")
+        if k not in cells:
+            cells[k] = HotspotStat(hotspot=k[0], mineral=k[1], band=k[2])
+        return cells[k]
+
+    members = HotspotMembership.objects.all() if keys is None else HotspotMembership.objects.filter(hotspot__in=keys)
+    for r in (members.values("hotspot", mineral=F("site__mineral__name"), band=F("site__sustainability_band"))
+              .annotate(n=Count("site"))):
+        cell(r["hotspot"], r["mineral"], r["band"]).sites = r["n"]
+
+    scope = {} if keys is None else {"site__hotspot_memberships__hotspot__in": keys}
+    dims = dict(h=F("site__hotspot_memberships__hotspot"), mineral=F("site__mineral__name"),
+                band=F("site__sustainability_band"))
+    latest_year = ProductionMetric.objects.aggregate(y=Max("year"))["y"]
+    prod = (ProductionMetric.objects.filter(site__hotspot_memberships__isnull=False, **scope)
+            .values(**dims).annotate(total=Sum("quantity")))
+    for r in prod:
+        cell(r["h"], r["mineral"], r["band"]).production_total = float(r["total"] or 0)
+    latest = (ProductionMetric.objects.filter(site__hotspot_memberships__isnull=False, year=latest_year, **scope)
+              .values(**dims).annotate(total=Sum("quantity")))
+    for r in latest:
+        cell(r["h"], r["mineral"], r["band"]).production_latest = float(r["total"] or 0)
+
+    env = (EnvironmentalMetric.objects
+           .filter(site__hotspot_memberships__isnull=False, date__gte=hot_since(), **scope)
+           .values(**dims)
+           .annotate(
+               n=Count("id"),
+               aqi_sum=Sum("air_quality_index"), aqi_n=Count("air_quality_index"),
+               tds_sum=Sum("water_tds"), tds_n=Count("water_tds"),
+               rehab_sum=Sum("rehabilitation_progress"), rehab_n=Count("rehabilitation_progress"),
+           ))
+    for r in env:
+        c = cell(r["h"], r["mineral"], r["band"])
+        c.env_readings = r["n"]
+        for m in ("aqi", "tds", "rehab"):
+            setattr(c, f"{m}_sum", float(r[f"{m}_sum"] or 0))
+            setattr(c, f"{m}_n", r[f"{m}_n"])
+    for c in cells.values():
+        c.production_year = latest_year
+    return list(cells.values())
+
+
+@transaction.atomic
+def refresh_hotspot_stats(keys=None):
+    """keys=None: إعادة بناء كاملة، وإلا المضلعات المذكورة فقط. يعيد عدد الخلايا."""
+    if keys is not None:
+        keys = sorted(set(keys))
+        if not keys:
+            return 0
+        HotspotStat.objects.filter(hotspot__in=keys).delete()
+    else:
+        HotspotStat.objects.all().delete()
+    cells = _compute_stats(keys)
+    HotspotStat.objects.bulk_create(cells, batch_size=1000)
+    return len(cells)
+
+
+def refresh_sites_hotspots(site_ids):
+    """أعد مجاميع المضلعات التي تضم هذه المواقع (بعد تغيّر قياساتها)."""
+    keys = set(HotspotMembership.objects.filter(site_id__in=list(site_ids)).values_list("hotspot", flat=True))
+    return refresh_hotspot_stats(keys)
+
+
+def rebuild_hotspots():
+    """الانتماء + المجاميع بالكامل. يعيد (صفوف الانتماء، الخلايا)."""
+    return rebuild_memberships(), refresh_hotspot_stats()
+
+
+class _PendingRefresh:
+    """مضلعات معاملة واحدة تنتظر إعادة مجاميعها؛ يعيش في on_commit تلك المعاملة ويُحذف معها عند إلغائها."""
+
+    def __init__(self):
+        self.keys = set()
+
+    def __call__(self):
+        refresh_hotspot_stats(self.keys)
+
+
+def schedule_stats_refresh(keys):
+    """أعد مجاميع keys عند اكتمال المعاملة الحالية (مرة واحدة لكل معاملة)."""
+    if not keys:
+        return
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        refresh_hotspot_stats(set(keys))
+        return
+    # الاتصال خاص بالخيط، فقائمة on_commit خاصة بهذه المعاملة وحدها
+    pending = next((func for _, func, _ in conn.run_on_commit if isinstance(func, _PendingRefresh)), None)
+    if pending is None:
+        pending = _PendingRefresh()
+        transaction.on_commit(pending)
+    pending.keys.update(keys)
+
+
+# ======= القراءة =======
+
+def _mean(s, n):
+    return round(s / n, 2) if n else None
+
+
+def hotspot_overview(keys=None):
+    """ملخص لكل مضلع من HotspotStat فقط: مواقع حسب المعدن والشريحة، الإنتاج، متوسطات البيئة."""
+    acc = {}
+    qs = HotspotStat.objects.all() if keys is None else HotspotStat.objects.filter(hotspot__in=keys)
+    for c in qs.order_by("hotspot", "mineral", "band"):
+        h = acc.get(c.hotspot)
+        if h is None:
+            h = acc[c.hotspot] = {
+                "sites": 0, "by_mineral": defaultdict(int), "by_band": dict.fromkeys(BANDS, 0),
+                "production_total": 0.0, "production_year": c.production_year, "production_latest": 0.0,
+                "env_readings": 0, "sums": [0.0, 0, 0.0, 0, 0.0, 0],
+            }
+        h["sites"] += c.sites
+        if c.sites:
+            h["by_mineral"][c.mineral] += c.sites
+            h["by_band"][c.band] = h["by_band"].get(c.band, 0) + c.sites
+        h["production_total"] += c.production_total
+        h["production_latest"] += c.production_latest
+        h["env_readings"] += c.env_readings
+        for j, v in enumerate((c.aqi_sum, c.aqi_n, c.tds_sum, c.tds_n, c.rehab_sum, c.rehab_n)):
+            h["sums"][j] += v
+
+    out = []
+    for key, meta in HOTSPOT_POLYGONS.items():
+        if keys is not None and key not in keys:
+            continue
+        h = acc.get(key) or {"sites": 0, "by_mineral": {}, "by_band": dict.fromkeys(BANDS, 0),
+                             "production_total": 0.0, "production_year": None, "production_latest": 0.0,
+                             "env_readings": 0, "sums": [0.0, 0, 0.0, 0, 0.0, 0]}
+        s = h.pop("sums")
+        out.append({
+            "hotspot": key, "minerals": meta["minerals"], "weight": meta["weight"],
+            **h, "by_mineral": dict(h["by_mineral"]),
+            "production_total": round(h["production_total"], 2),
+            "production_latest": round(h["production_latest"], 2),
+            "avg_aqi": _mean(s[0], s[1]), "avg_tds": _mean(s[2], s[3]), "avg_rehab": _mean(s[4], s[5]),
+        })
+    return out
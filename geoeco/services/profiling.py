@@ -0,0 +1,209 @@
+# geoeco/services/profiling.py
+# قياس أداء أوامر الإدارة (خيار --profile في geoeco.management.base.ProfiledCommand):
+#   - cProfile لكامل التنفيذ -> ملف .pstats (snakeviz/pstats) وأعلى الدوال في التقرير.
+#   - عيّنات دورية لمكدس الخيط الرئيسي -> ملف .collapsed (flamegraph.pl / speedscope)،
+#     جذر كل مكدس = اسم المرحلة؛ كل عيّنة تُوزن بالزمن المنقضي (استدعاءات C الطويلة لا تضيع).
+#   - tracemalloc: ذروة الذاكرة للتنفيذ ولكل مرحلة (memory=False يعطّله: يبطئ الحلقات كثيفة
+#     التخصيص عدة مرات)، وأقصى RSS للعملية دائمًا.
+#   - عدد استعلامات SQL وزمنها لكل مرحلة (execute_wrapper على كل اتصالات قاعدة البيانات).
+# المراحل متتالية: phase(name) صراحةً، أو mark(msg) لكل سطر مخرجات ينتهي بـ "…"/"...".
+# العمليات الفرعية (--workers) لا تُقاس؛ تظهر زمنَ انتظار في العملية الرئيسية.
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+
+DEFAULT_INTERVAL = 0.005  # ثوانٍ بين عيّنات المكدس
+DEFAULT_TOP = 30
+PHASE_SUFFIXES = ("…", "...")
+
+
+def phase_name(msg):
+    """اسم المرحلة من سطر مخرجات ("Creating sites…" -> "Creating sites")، أو None."""
+    text = str(msg).strip()
+    if not text.endswith(PHASE_SUFFIXES):
+        return None
+    return text.rstrip(".…").strip() or None
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}:{code.co_firstlineno}"
+
+
+def _max_rss():
+    """أقصى RSS للعملية بالبايت (None على Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class CommandProfiler:
+    """with CommandProfiler(name) as p: ...؛ ثم p.report() / p.write(directory)."""
+
+    def __init__(self, name, interval=DEFAULT_INTERVAL, top=DEFAULT_TOP, memory=True):
+        self.name = name
+        self.memory = memory
+        self.interval = interval
+        self.top = top
+        self.phases = []
+        self.current = None
+        self.stacks = Counter()
+        self.samples = 0
+        self.error = None
+        self.profile = cProfile.Profile()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stack = ExitStack()
+
+    # ----- المراحل -----
+    def _close_phase(self, now):
+        p = self.current
+        if p is None:
+            return
+        p["wall_s"] = round(now - p.pop("_t0"), 4)
+        p["cpu_s"] = round(time.process_time() - p.pop("_cpu0"), 4)
+        p["sql_time_s"] = round(p["sql_time_s"], 4)
+        p["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        self.phases.append(p)
+        self.current = None
+
+    def phase(self, name):
+        """ابدأ مرحلة جديدة (تُغلق السابقة)."""
+        now = time.perf_counter()
+        with self._lock:
+            self._close_phase(now)
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            self.current = {"name": name, "start_s": round(now - self.t0, 4), "_t0": now,
+                            "_cpu0": time.process_time(), "sql_queries": 0, "sql_time_s": 0.0, "samples": 0}
+
+    def mark(self, msg):
+        name = phase_name(msg)
+        if name:
+            self.phase(name)
+
+    # ----- SQL -----
+    def _sql(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            dt = time.perf_counter() - t0
+            p = self.current
+            if p is not None:
+                p["sql_queries"] += 1
+                p["sql_time_s"] += dt
+
+    # ----- عيّنات المكدس -----
+    def _sample(self, thread_id):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels = labels[:len(labels) - self._base_depth]  # بلا إطارات manage.py/Django فوق الأمر
+            weight = max(1, round((now - last) / self.interval))
+            last = now
+            p = self.current
+            root = p["name"] if p is not None else self.name
+            self.stacks[";".join([root, *reversed(labels)])] += weight
+            self.samples += weight
+            if p is not None:
+                p["samples"] += weight
+
+    # ----- دورة الحياة -----
+    def __enter__(self):
+        self.started_at = datetime.datetime.now()
+        self.t0 = time.perf_counter()
+        self.cpu0 = time.process_time()
+        if self.memory:
+            tracemalloc.start()
+        for conn in connections.all():
+            self._stack.enter_context(conn.execute_wrapper(self._sql))
+        frame, self._base_depth = sys._getframe(1), 0
+        while frame is not None:
+            self._base_depth += 1
+            frame = frame.f_back
+        self.phase(self.name)
+        self._sampler = threading.Thread(target=self._sample, args=(threading.get_ident(),),
+                                         name="command-profiler", daemon=True)
+        self._sampler.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.disable()
+        self._stop.set()
+        self._sampler.join()
+        self._stack.close()
+        now = time.perf_counter()
+        with self._lock:
+            self._close_phase(now)
+        self.wall_s = round(now - self.t0, 4)
+        self.cpu_s = round(time.process_time() - self.cpu0, 4)
+        self.peak_memory_bytes = max((p["peak_memory_bytes"] or 0 for p in self.phases), default=0)
+        if self.memory:
+            tracemalloc.stop()
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        return False
+
+    # ----- التقرير -----
+    def top_functions(self):
+        stats = pstats.Stats(self.profile).stats
+        rows = sorted(stats.items(), key=lambda kv: -kv[1][3])[:self.top]
+        return [{"function": func, "file": path, "line": line, "calls": nc, "primitive_calls": cc,
+                 "tottime_s": round(tt, 4), "cumtime_s": round(ct, 4)}
+                for (path, line, func), (cc, nc, tt, ct, _) in rows]
+
+    def report(self):
+        return {
+            "command": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "peak_memory_bytes": self.peak_memory_bytes if self.memory else None,
+            "max_rss_bytes": _max_rss(),
+            "sql_queries": sum(p["sql_queries"] for p in self.phases),
+            "sql_time_s": round(sum(p["sql_time_s"] for p in self.phases), 4),
+            "sample_interval_s": self.interval,
+            "samples": self.samples,
+            "phases": self.phases,
+            "top_functions": self.top_functions(),
+        }
+
+    def write(self, directory):
+        """اكتب <command>-<وقت>.json و .pstats و .collapsed في directory. يعيد (report, paths)."""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{self.name}-{self.started_at:%Y%m%d-%H%M%S}")
+        paths = {"json": base + ".json", "pstats": base + ".pstats", "collapsed": base + ".collapsed"}
+        self.profile.dump_stats(paths["pstats"])
+        with open(paths["collapsed"], "w", encoding="utf-8") as fh:
+            for stack, n in sorted(self.stacks.items()):
+                fh.write(f"{stack} {n}\n")
+        report = self.report()
+        report["files"] = paths
+        with open(paths["json"], "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        return report, paths
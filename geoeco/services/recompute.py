@@ -0,0 +1,126 @@
+# geoeco/services/recompute.py
+# إعادة حساب التوقعات والشريحة لمواقع محددة فقط (بدل المرور على كل المواقع).
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from geoeco.models import Site, SiteRecomputeQueue
+from geoeco.services.ai_forecast import run_forecasts
+from geoeco.services.alert_rules import evaluate_alert_rules
+from geoeco.services.band_logic import band_from_env
+from geoeco.services.env_partitions import latest_readings
+from geoeco.services.env_rollups import refresh_env_rollups
+from geoeco.services.forecast_accuracy import refresh_accuracy
+from geoeco.services.hotspots import refresh_sites_hotspots
+from geoeco.services.report_cube import refresh_cube
+from geoeco.services.site_registry import bump_registry_version
+
+BAND_CHUNK = 1000
+
+
+def site_band(site):
+    """شريحة الاستدامة من أحدث قراءة بيئية، أو None إن لم تكن للموقع قراءات."""
+    rows = latest_readings(site, 1, ('air_quality_index', 'water_tds', 'rehabilitation_progress'))
+    if not rows:
+        return None
+    latest = rows[0]
+    score, band = band_from_env(
+        latest["air_quality_index"],
+        latest["water_tds"],
+        latest["rehabilitation_progress"],
+        site.status
+    )
+    return band
+
+
+def recalc_site_band(site):
+    """أعد حساب شريحة الاستدامة من أحدث قراءة بيئية. يعيد True إن تغيّرت."""
+    band = site_band(site)
+    if band is not None and site.sustainability_band != band:
+        site.sustainability_band = band
+        site.save(update_fields=["sustainability_band"])
+        return True
+    return False
+
+
+def recalc_all_bands(chunk_size=BAND_CHUNK):
+    """
+    شرائح كل المواقع على دفعات: bulk_update للمتغيّرة فقط (بلا إشارات) ثم زيادة عدّاد السجل مرة واحدة.
+    المستدعي يعيد المكعب ومجاميع المضلعات. يعيد عدد المواقع التي تغيّرت شريحتها.
+    """
+    changed, batch = 0, []
+    for site in Site.objects.only("id", "status", "sustainability_band").iterator(chunk_size=chunk_size):
+        band = site_band(site)
+        if band is not None and site.sustainability_band != band:
+            site.sustainability_band = band
+            batch.append(site)
+        if len(batch) >= chunk_size:
+            Site.objects.bulk_update(batch, ["sustainability_band"])
+            changed, batch = changed + len(batch), []
+    if batch:
+        Site.objects.bulk_update(batch, ["sustainability_band"])
+        changed += len(batch)
+    if changed:
+        bump_registry_version()
+    return changed
+
+
+def recompute_sites(site_ids, years_ahead=3, months_ahead=6, recalc_band=True):
+    """
+    التوقعات (دفعة واحدة) + الشريحة لمجموعة مواقع. يعيد عدد المواقع المعالجة.
+    حفظ الشريحة لا يعيد مجاميع المضلعات؛ المستدعي يعيدها مرة واحدة للدفعة (refresh_sites_hotspots).
+    """
+    sites = list(Site.objects.filter(id__in=list(site_ids)))
+    run_forecasts([s.id for s in sites], years_ahead=years_ahead, months_ahead=months_ahead)
+    if recalc_band:
+        for s in sites:
+            recalc_site_band(s)
+    return len(sites)
+
+
+def claim_ready_sites(batch_size=200, debounce_seconds=5, max_wait_seconds=60):
+    """
+    اسحب دفعة من الطابور: موقع جاهز إذا هدأت كتاباته debounce_seconds،
+    أو انتظر أكثر من max_wait_seconds (حتى لا يُؤجَّل موقع نشط للأبد).
+    يعيد {site_id: env_since}.
+    """
+    now = timezone.now()
+    quiet_cutoff = now - timedelta(seconds=debounce_seconds)
+    wait_cutoff = now - timedelta(seconds=max_wait_seconds)
+    with transaction.atomic():
+        rows = list(
+            SiteRecomputeQueue.objects
+            .filter(Q(last_touched_at__lte=quiet_cutoff) | Q(first_queued_at__lte=wait_cutoff))
+            .order_by('first_queued_at')
+            .values_list('id', 'site_id', 'env_since')[:batch_size]
+        )
+        # الحذف قبل الحساب: أي كتابة لاحقة تعيد إدراج الموقع للدفعة التالية
+        SiteRecomputeQueue.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+    return {site_id: since for _, site_id, since in rows}
+
+
+def drain_queue(batch_size=200, debounce_seconds=5, max_wait_seconds=60,
+                years_ahead=3, months_ahead=6, recalc_band=True, alerts=True):
+    """
+    عالج دفعات صغيرة حتى يفرغ الجاهز من الطابور. يعيد عدد المواقع.
+    لكل دفعة: دقة التوقعات السابقة، ثم التوقعات والشريحة، ثم التجميعات البيئية للفترات المتأثرة
+    وشرائح مكعب التقارير ومجاميع المضلعات، ثم (alerts=True) قواعد التنبيه لمواقع الدفعة فقط.
+    """
+    total = 0
+    while True:
+        claimed = claim_ready_sites(batch_size, debounce_seconds, max_wait_seconds)
+        if not claimed:
+            return total
+        site_ids = list(claimed)
+        # القيم الفعلية الجديدة تُقاس على التوقعات المنشورة قبل أن تُستبدل
+        refresh_accuracy(site_ids)
+        total += recompute_sites(site_ids, years_ahead, months_ahead, recalc_band)
+        env_sites = [sid for sid, since in claimed.items() if since is not None]
+        if env_sites:
+            refresh_env_rollups(env_sites, since=min(claimed[sid] for sid in env_sites))
+        refresh_cube(site_ids)
+        refresh_sites_hotspots(site_ids)
+        if alerts:
+            evaluate_alert_rules(site_ids=site_ids)
@@ -0,0 +1,216 @@
+# geoeco/services/report_cube.py
+# مكعب تقارير مسبق التجميع (محافظة × معدن × سنة × شريحة) للتقارير الوطنية.
+# يُبنى باستعلامَي GROUP BY، ويُحدَّث تزايديًا لشرائح (محافظة، معدن) المتأثرة،
+# ويُحمَّل في ذاكرة العملية للإجابة عن أي تقاطع (slice/dice/roll-up) دون استعلام تجميعي.
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import ExtractYear
+
+from geoeco.models import Site, Mineral, ProductionMetric, EnvironmentalMetric, CubeCell
+from geoeco.services.env_partitions import partitions
+from geoeco.geo.oman_targets import DEFAULT_TARGETS_TONNES, DEFAULT_TARGETS_KG
+
+DIMENSIONS = ("governorate", "mineral", "year", "band")
+
+_DIM_SOURCES = {
+    "governorate": F("site__governorate"),
+    "mineral": F("site__mineral__name"),
+    "band": F("site__sustainability_band"),
+}
+
+
+def _slice_filter(slices):
+    """Q لشرائح (محافظة، معدن) محددة؛ None = الكل."""
+    if slices is None:
+        return Q()
+    q = Q(pk__in=[])
+    for gov, mineral in slices:
+        q |= Q(site__governorate=gov, site__mineral__name=mineral)
+    return q
+
+
+def _cold_env(slices=None):
+    """
+    نفس تجميع env فوق جداول الظل (SQLite بعد rotate: سنوات لا يراها EnvironmentalMetric.objects)،
+    بنفس مفاتيح صفوف الـ ORM. لا شيء على المحركات ذات التقسيم الأصلي.
+    """
+    backend = partitions()
+    tables = backend.cold_tables()
+    if not tables:
+        return []
+    qn = backend.qn
+    where, params = "", []
+    if slices is not None:
+        conds = []
+        for gov, mineral in slices:
+            conds.append("(s.governorate = %s AND m.name " + ("IS NULL)" if mineral is None else "= %s)"))
+            params += [gov] if mineral is None else [gov, mineral]
+        where = "WHERE " + " OR ".join(conds)
+    cols = ("air_quality_index", "water_tds", "rehabilitation_progress")
+    aggs = ", ".join(f"SUM(e.{qn(c)}), COUNT(e.{qn(c)})" for c in cols)
+    sql = " UNION ALL ".join(
+        f"SELECT {year}, s.governorate, m.name, s.sustainability_band, COUNT(*), {aggs} "
+        f"FROM {table} e JOIN {qn(Site._meta.db_table)} s ON s.id = e.{qn('site_id')} "
+        f"LEFT JOIN {qn(Mineral._meta.db_table)} m ON m.id = s.mineral_id {where} "
+        f"GROUP BY s.governorate, m.name, s.sustainability_band"
+        for year, table in tables)
+    keys = ("y", "governorate", "mineral", "band", "n", "aqi_sum", "aqi_n", "tds_sum", "tds_n", "rehab_sum", "rehab_n")
+    return [dict(zip(keys, r)) for r in backend._fetch(sql, params * len(tables))]
+
+
+def _compute_cells(slices=None):
+    cells = {}
+
+    def cell(gov, mineral, year, band):
+        k = (gov or "", mineral or "", year, band or "")
+        if k not in cells:
+            cells[k] = CubeCell(governorate=k[0], mineral=k[1], year=year, band=k[3])
+        return cells[k]
+
+    prod = (ProductionMetric.objects.filter(_slice_filter(slices))
+            .values(**_DIM_SOURCES, y=F("year"))
+            .annotate(total=Sum("quantity"), n_sites=Count("site", distinct=True)))
+    for r in prod:
+        c = cell(r["governorate"], r["mineral"], r["y"], r["band"])
+        c.production_total = float(r["total"] or 0)
+        c.sites = r["n_sites"]
+
+    env = (EnvironmentalMetric.objects.filter(_slice_filter(slices))
+           .annotate(y=ExtractYear("date"))
+           .values("y", **_DIM_SOURCES)
+           .annotate(
+               n=Count("id"),
+               aqi_sum=Sum("air_quality_index"), aqi_n=Count("air_quality_index"),
+               tds_sum=Sum("water_tds"), tds_n=Count("water_tds"),
+               rehab_sum=Sum("rehabilitation_progress"), rehab_n=Count("rehabilitation_progress"),
+           ))
+    # قراءات متأخرة لسنة نُقلت إلى الظل تبقى في الجدول الرئيسي: الخلية تجمع المصدرين
+    for r in [*env, *_cold_env(slices)]:
+        c = cell(r["governorate"], r["mineral"], r["y"], r["band"])
+        c.env_readings += r["n"]
+        for m in ("aqi", "tds", "rehab"):
+            setattr(c, f"{m}_sum", getattr(c, f"{m}_sum") + float(r[f"{m}_sum"] or 0))
+            setattr(c, f"{m}_n", getattr(c, f"{m}_n") + r[f"{m}_n"])
+    return list(cells.values())
+
+
+@transaction.atomic
+def refresh_cube(site_ids=None):
+    """
+    site_ids=None: إعادة بناء كاملة. وإلا: أعد بناء شرائح (محافظة، معدن)
+    لتلك المواقع فقط (تغيّر الشريحة ينقل المساهمة بين الخلايا داخل الشريحة نفسها).
+    يعيد عدد الخلايا المكتوبة.
+    """
+    if site_ids is None:
+        slices = None
+        CubeCell.objects.all().delete()
+    else:
+        slices = set(Site.objects.filter(id__in=list(site_ids))
+                     .values_list("governorate", "mineral__name"))
+        if not slices:
+            return 0
+        q = Q(pk__in=[])
+        for gov, mineral in slices:
+            q |= Q(governorate=gov or "", mineral=mineral or "")
+        CubeCell.objects.filter(q).delete()
+    cells = _compute_cells(slices)
+    CubeCell.objects.bulk_create(cells, batch_size=1000)
+    return len(cells)
+
+
+# ---------- نسخة الذاكرة ----------
+
+_lock = threading.Lock()
+_cache = {"version": None, "cells": []}
+
+_CELL_FIELDS = DIMENSIONS + ("sites", "production_total", "env_readings",
+                             "aqi_sum", "aqi_n", "tds_sum", "tds_n", "rehab_sum", "rehab_n")
+
+
+def _current_version():
+    agg = CubeCell.objects.aggregate(m=Max("updated_at"), n=Count("id"))
+    return (agg["m"], agg["n"])
+
+
+def load_cells():
+    """خلايا المكعب من الذاكرة؛ يُعاد التحميل فقط إذا تغيّر إصدار الجدول."""
+    version = _current_version()
+    if _cache["version"] != version:
+        with _lock:
+            if _cache["version"] != version:
+                _cache["cells"] = list(CubeCell.objects.values_list(*_CELL_FIELDS))
+                _cache["version"] = version
+    return _cache["cells"]
+
+
+async def aload_cells():
+    """نسخة async من load_cells (async ORM)؛ نفس نسخة الذاكرة المشتركة."""
+    agg = await CubeCell.objects.aaggregate(m=Max("updated_at"), n=Count("id"))
+    version = (agg["m"], agg["n"])
+    if _cache["version"] != version:
+        cells = [c async for c in CubeCell.objects.values_list(*_CELL_FIELDS)]
+        with _lock:
+            _cache["cells"] = cells
+            _cache["version"] = version
+    return _cache["cells"]
+
+
+def national_target(mineral):
+    """الهدف الوطني السنوي (طن، والذهب بالكيلو) أو None."""
+    if mineral in DEFAULT_TARGETS_KG:
+        return float(DEFAULT_TARGETS_KG[mineral])
+    if mineral in DEFAULT_TARGETS_TONNES:
+        return float(DEFAULT_TARGETS_TONNES[mineral])
+    return None
+
+
+def _aggregate(cells, group_by, filters):
+    filters = {k: set(v) for k, v in (filters or {}).items() if k in DIMENSIONS and v}
+    group_by = [d for d in group_by if d in DIMENSIONS]
+    idx = [DIMENSIONS.index(d) for d in group_by]
+    fidx = [(DIMENSIONS.index(d), vals) for d, vals in filters.items()]
+
+    acc = defaultdict(lambda: [0, 0.0, 0, 0.0, 0, 0.0, 0, 0.0, 0])
+    for c in cells:
+        if any(c[i] not in vals for i, vals in fidx):
+            continue
+        a = acc[tuple(c[i] for i in idx)]
+        for j in range(9):
+            a[j] += c[4 + j]
+
+    per_year = "year" in group_by or len(filters.get("year", ())) == 1
+    rows = []
+    for key, a in acc.items():
+        row = dict(zip(group_by, key))
+        row.update({
+            "sites": a[0],
+            "production_total": round(a[1], 2),
+            "env_readings": a[2],
+            "aqi_avg": round(a[3] / a[4], 2) if a[4] else None,
+            "tds_avg": round(a[5] / a[6], 2) if a[6] else None,
+            "rehab_avg": round(a[7] / a[8], 2) if a[8] else None,
+        })
+        if "mineral" in group_by and per_year:
+            target = national_target(row["mineral"])
+            row["target"] = target
+            row["target_ratio"] = round(a[1] / target, 4) if target else None
+        rows.append(row)
+    rows.sort(key=lambda r: tuple(r[d] for d in group_by))
+    return rows
+
+
+def cube_query(group_by=("mineral",), filters=None):
+    """
+    slice/dice: filters = {بُعد: [قيم]}، roll-up: group_by أي مجموعة جزئية من DIMENSIONS.
+    المتوسطات البيئية تُشتق من المجاميع بعد التجميع، وsites عند دمج عدة سنوات = موقع-سنة.
+    عندما يكون المعدن ضمن التجميع والسنة محددة (بالتجميع أو بفلتر سنة واحدة) يُضاف الهدف الوطني ونسبة المعايرة.
+    """
+    return _aggregate(load_cells(), group_by, filters)
+
+
+async def acube_query(group_by=("mineral",), filters=None):
+    """نسخة async من cube_query لواجهات ASGI."""
+    return _aggregate(await aload_cells(), group_by, filters)
@@ -0,0 +1,204 @@
+# geoeco/services/site_registry.py
+# نسخة عمودية من سجل المواقع في ذاكرة العملية: مصفوفات NumPy لـ id/lat/lon،
+# والشريحة/الحالة/المعدن/المحافظة/الشركة كرموز أعداد صغيرة + جداول نصوص للأسماء.
+# النسخة مرقّمة بعدّاد تغييرات في قاعدة البيانات (ChangeCounter "site_registry") يُزاد عند
+# حفظ/حذف Site/Company/Mineral، وتُعاد تلقائيًا عند أول استخدام بعد تغيّره.
+# numpy تُستورد داخل الدوال: الوحدة تُستورد من views دون تحميلها عند الإقلاع.
+import threading
+import time
+
+from django.db import transaction
+from django.db.models import F
+
+from geoeco.models import ChangeCounter, Site
+
+COUNTER = "site_registry"
+CHECK_SECONDS = 1.0  # أقصى تكرار لقراءة العدّاد (استعلام واحد صغير)
+EARTH_RADIUS_KM = 6371.0088
+
+BANDS = ("green", "yellow", "red")
+STATUSES = ("active", "proposed", "closed")
+STATUS_LABELS = dict(Site._meta.get_field("status").choices)
+
+_lock = threading.Lock()
+_cache = {"registry": None, "checked_at": 0.0}
+
+
+# ======= عدّاد التغييرات =======
+
+def registry_version():
+    return ChangeCounter.objects.filter(name=COUNTER).values_list("value", flat=True).first() or 0
+
+
+def _bump():
+    if not ChangeCounter.objects.filter(name=COUNTER).update(value=F("value") + 1):
+        ChangeCounter.objects.get_or_create(name=COUNTER, defaults={"value": 1})
+    _cache["checked_at"] = 0.0  # هذه العملية ترى التغيير فورًا
+
+
+def _bump_on_commit():
+    _bump()
+
+
+def bump_registry_version():
+    """سجّل تغيّر السجل؛ داخل معاملة يُزاد العدّاد مرة واحدة عند اكتمالها."""
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        _bump()
+    elif not any(func is _bump_on_commit for _, func, _ in conn.run_on_commit):
+        transaction.on_commit(_bump_on_commit)
+
+
+# ======= النسخة =======
+
+def _encode(values, table=None):
+    """نصوص -> (رموز int16، جدول). None/"" -> -1."""
+    import numpy as np
+
+    table = list(table) if table is not None else sorted({v for v in values if v})
+    index = {v: i for i, v in enumerate(table)}
+    return np.asarray([index.get(v, -1) for v in values], dtype=np.int16), table
+
+
+class SiteRegistry:
+    """نسخة ثابتة (للقراءة فقط) من كل المواقع، مرتبة حسب id."""
+
+    def __init__(self, rows, version):
+        import numpy as np
+
+        self.version = version
+        (ids, names, lat, lon, band, status, gov, mineral, unit, company) = (
+            list(c) for c in zip(*rows)) if rows else ([],) * 10
+        self.id = np.asarray(ids, dtype=np.int64)
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.names = names
+        self._names_lower = [n.lower() for n in names]
+        self.band, self.bands = _encode(band, BANDS)
+        self.status, self.statuses = _encode(status, STATUSES)
+        self.governorate, self.governorates = _encode(gov)
+        self.mineral, self.minerals = _encode(mineral)
+        self.company, self.companies = _encode(company)
+        self.units = dict(zip(mineral, unit))
+        self._minerals_lower = [m.lower() for m in self.minerals]
+
+    def __len__(self):
+        return len(self.id)
+
+    # ----- فلترة -----
+    def _codes(self, values, table, lower=None):
+        values = [values] if isinstance(values, str) else list(values)
+        if lower is not None:
+            wanted = {v.lower() for v in values}
+            return [i for i, v in enumerate(lower) if v in wanted]
+        return [table.index(v) for v in values if v in table]
+
+    def mask(self, band=None, status=None, mineral=None, governorate=None, q=None, ids=None):
+        """قناع منطقي للمواقع المطابقة. كل شرط نص أو قائمة نصوص؛ mineral بلا حساسية لحالة الأحرف."""
+        import numpy as np
+
+        m = np.ones(len(self), dtype=bool)
+        for col, values, table, lower in (
+            (self.band, band, self.bands, None),
+            (self.status, status, self.statuses, None),
+            (self.governorate, governorate, self.governorates, None),
+            (self.mineral, mineral, self.minerals, self._minerals_lower),
+        ):
+            if values:
+                m &= np.isin(col, self._codes(values, table, lower))
+        if ids is not None:
+            m &= np.isin(self.id, np.asarray(list(ids), dtype=np.int64))
+        if q:
+            q = q.lower()
+            m &= np.fromiter((q in n for n in self._names_lower), dtype=bool, count=len(self))
+        return m
+
+    def filter(self, limit=None, **conditions):
+        """مؤشرات المواقع المطابقة (بترتيب id)."""
+        import numpy as np
+
+        idx = np.flatnonzero(self.mask(**conditions))
+        return idx[:limit] if limit is not None else idx
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon, mask=None):
+        import numpy as np
+
+        m = (self.lat >= min_lat) & (self.lat <= max_lat) & (self.lon >= min_lon) & (self.lon <= max_lon)
+        if mask is not None:
+            m &= mask
+        return np.flatnonzero(m)
+
+    def distances_km(self, lat, lon, idx=None):
+        """مسافة الدائرة الكبرى (كم) من (lat, lon) إلى المواقع (كلها أو idx)."""
+        import numpy as np
+
+        la = self.lat if idx is None else self.lat[idx]
+        lo = self.lon if idx is None else self.lon[idx]
+        p1, p2 = np.radians(lat), np.radians(la)
+        a = (np.sin((p2 - p1) / 2) ** 2
+             + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lo - lon) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def nearest(self, lat, lon, k=1, mask=None):
+        """أقرب k مواقع: [(index, distance_km)] مرتبة تصاعديًا."""
+        import numpy as np
+
+        idx = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if not len(idx):
+            return []
+        d = self.distances_km(lat, lon, idx)
+        k = min(k, len(idx))
+        part = np.argpartition(d, k - 1)[:k]
+        part = part[np.argsort(d[part], kind="stable")]
+        return [(int(idx[j]), float(d[j])) for j in part]
+
+    def index_of(self, site_id):
+        import numpy as np
+
+        i = int(np.searchsorted(self.id, site_id))
+        return i if i < len(self) and self.id[i] == site_id else None
+
+    # ----- صفوف -----
+    def row(self, i):
+        """قاموس بنفس مفاتيح Site.values() المستخدمة في الخريطة."""
+        def name(codes, table):
+            c = int(codes[i])
+            return table[c] if c >= 0 else None
+
+        status = name(self.status, self.statuses)
+        return {
+            "id": int(self.id[i]), "name": self.names[i],
+            "lat": float(self.lat[i]), "lon": float(self.lon[i]),
+            "sustainability_band": name(self.band, self.bands),
+            "status": status, "status_display": STATUS_LABELS.get(status, status),
+            "governorate": name(self.governorate, self.governorates) or "",
+            "mineral__name": name(self.mineral, self.minerals),
+            "company__name": name(self.company, self.companies),
+        }
+
+    def rows(self, idx):
+        return [self.row(int(i)) for i in idx]
+
+
+def _load(version):
+    rows = list(Site.objects.order_by("id").values_list(
+        "id", "name", "lat", "lon", "sustainability_band", "status", "governorate",
+        "mineral__name", "mineral__unit", "company__name"))
+    return SiteRegistry(rows, version)
+
+
+def get_registry():
+    """النسخة الحالية؛ تُعاد بناؤها فقط إذا تغيّر العدّاد (يُفحص كل CHECK_SECONDS على الأكثر)."""
+    reg = _cache["registry"]
+    now = time.monotonic()
+    if reg is not None and now - _cache["checked_at"] < CHECK_SECONDS:
+        return reg
+    version = registry_version()
+    if reg is None or reg.version != version:
+        with _lock:
+            reg = _cache["registry"]
+            if reg is None or reg.version != version:
+                reg = _load(version)
+                _cache["registry"] = reg
+    _cache["checked_at"] = now
+    return reg
@@ -0,0 +1,141 @@
+# geoeco/services/spatial_index.py
+# فهرس مكاني شبكي (خلايا CELL_DEG درجة) فوق نسخة سجل المواقع في الذاكرة:
+# المواقع مرتبة حسب رقم الخلية، فاستعلام مستطيل = بضع شرائح متجاورة (searchsorted).
+#   - radius: مواقع ضمن R كم (مرشّحات الخلايا ثم haversine متجهة).
+#   - nearest: أقرب k بتوسيع نصف القطر حتى يكفي العدد.
+#   - within_polygon: صندوق المضلع ثم نقطة-داخل-مضلع متجهة (ray casting).
+# يتبع الفهرس إصدار السجل (عدّاد التغييرات)، فيُعاد بناؤه مع أي تعديل على Site.
+import math
+import threading
+
+from geoeco.geo.oman_admin import haversine_km
+from geoeco.services.site_registry import EARTH_RADIUS_KM, get_registry
+
+CELL_DEG = 0.25
+KM_PER_DEG_LAT = math.pi * EARTH_RADIUS_KM / 180.0
+MAX_DOUBLINGS = 32  # سقف توسيع nearest (1 كم × 2^32 أبعد من أي نقطة على الأرض)
+
+_lock = threading.Lock()
+_cache = {"index": None}
+
+
+def points_in_polygon(lat, lon, poly):
+    """نقطة-داخل-مضلع لمصفوفات lat/lon دفعة واحدة (نفس قاعدة point_in_poly). poly: [(lat, lon), ...]."""
+    import numpy as np
+
+    inside = np.zeros(len(lat), dtype=bool)
+    n = len(poly)
+    for i in range(n):
+        y1, x1 = poly[i]
+        y2, x2 = poly[(i + 1) % n]
+        crosses = (x1 > lon) != (x2 > lon)
+        lat_at_lon = (y2 - y1) * (lon - x1) / (x2 - x1 + 1e-12) + y1
+        inside ^= crosses & (lat_at_lon > lat)
+    return inside
+
+
+def polygon_bbox(poly):
+    lats = [p[0] for p in poly]
+    lons = [p[1] for p in poly]
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+class GridIndex:
+    def __init__(self, registry, cell_deg=CELL_DEG):
+        import numpy as np
+
+        self.registry = registry
+        self.cell = cell_deg
+        lat, lon = registry.lat, registry.lon
+        if len(registry):
+            self.lat0, self.lon0 = float(lat.min()), float(lon.min())
+            self.ncols = int((lon.max() - self.lon0) // cell_deg) + 1
+            self.nrows = int((lat.max() - self.lat0) // cell_deg) + 1
+        else:
+            self.lat0 = self.lon0 = 0.0
+            self.ncols = self.nrows = 0
+        keys = self._row(lat) * self.ncols + self._col(lon)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def _row(self, lat):
+        import numpy as np
+        return np.floor((np.asarray(lat) - self.lat0) / self.cell).astype(np.int64)
+
+    def _col(self, lon):
+        import numpy as np
+        return np.floor((np.asarray(lon) - self.lon0) / self.cell).astype(np.int64)
+
+    def candidates(self, min_lat, min_lon, max_lat, max_lon):
+        """مؤشرات (في السجل) لكل المواقع في الخلايا التي تمس المستطيل."""
+        import numpy as np
+
+        rows, cols = self._row([min_lat, max_lat]), self._col([min_lon, max_lon])
+        if (not self.nrows or rows[1] < 0 or cols[1] < 0
+                or rows[0] >= self.nrows or cols[0] >= self.ncols):
+            return np.empty(0, dtype=np.int64)
+        r0, r1 = (int(v) for v in np.clip(rows, 0, self.nrows - 1))
+        c0, c1 = (int(v) for v in np.clip(cols, 0, self.ncols - 1))
+        parts = []
+        for r in range(r0, r1 + 1):
+            lo = np.searchsorted(self.keys, r * self.ncols + c0, side="left")
+            hi = np.searchsorted(self.keys, r * self.ncols + c1, side="right")
+            if hi > lo:
+                parts.append(self.order[lo:hi])
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def radius(self, lat, lon, km, mask=None):
+        """[(index, distance_km)] ضمن km مرتبة تصاعديًا؛ ValueError لقيم غير منتهية."""
+        import numpy as np
+
+        if not all(math.isfinite(v) for v in (lat, lon, km)):
+            raise ValueError("lat/lon/km يجب أن تكون أرقامًا منتهية")
+        dlat = km / KM_PER_DEG_LAT
+        dlon = km / (KM_PER_DEG_LAT * max(math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 1e-6))
+        idx = self.candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        if mask is not None:
+            idx = idx[mask[idx]]
+        d = self.registry.distances_km(lat, lon, idx)
+        keep = d <= km
+        idx, d = idx[keep], d[keep]
+        order = np.argsort(d, kind="stable")
+        return [(int(idx[j]), float(d[j])) for j in order]
+
+    def nearest(self, lat, lon, k=1, mask=None):
+        """أقرب k مواقع: نصف قطر يتضاعف حتى يحوي k مرشحين على الأقل."""
+        total = len(self.registry) if mask is None else int(mask.sum())
+        k = min(k, total)
+        if k <= 0:
+            return []
+        area_km2 = max(self.nrows * self.ncols, 1) * (self.cell * KM_PER_DEG_LAT) ** 2
+        km = max(1.0, math.sqrt(k * area_km2 / (math.pi * max(total, 1))))
+        # أبعد نقطة ممكنة في الصندوق الكلي: سقف لنصف القطر
+        far = haversine_km(self.lat0, self.lon0, self.lat0 + self.nrows * self.cell,
+                           self.lon0 + self.ncols * self.cell) + haversine_km(lat, lon, self.lat0, self.lon0)
+        for _ in range(MAX_DOUBLINGS):
+            hits = self.radius(lat, lon, km, mask)
+            if len(hits) >= k or km >= far:
+                break
+            km *= 2
+        return hits[:k]
+
+    def within_polygon(self, poly, mask=None):
+        """مؤشرات المواقع داخل المضلع poly [(lat, lon), ...]."""
+        idx = self.candidates(*polygon_bbox(poly))
+        if mask is not None:
+            idx = idx[mask[idx]]
+        reg = self.registry
+        return idx[points_in_polygon(reg.lat[idx], reg.lon[idx], poly)]
+
+
+def get_spatial_index():
+    """فهرس الإصدار الحالي من السجل (يُبنى مرة لكل إصدار)."""
+    registry = get_registry()
+    index = _cache["index"]
+    if index is None or index.registry is not registry:
+        with _lock:
+            index = _cache["index"]
+            if index is None or index.registry is not registry:
+                index = GridIndex(registry)
+                _cache["index"] = index
+    return index
@@ -0,0 +1,168 @@
+# geoeco/services/synthetic.py
+# مولّد السلاسل الاصطناعية المتجه (NumPy) المشترك بين generate_bulk و reset_and_generate_oman:
+# مصفوفة كاملة (مواقع × سنوات) للإنتاج و(مواقع × أشهر) للقياسات البيئية دفعة واحدة،
+# مع قص القيم (np.clip) وأساسات حسب المعدن وشريحة الاستدامة وحالة الموقع.
+#   - التقسيم إلى شرائح (shards) تعمل في عمليات منفصلة؛ بذرة كل شريحة مشتقة من --seed
+#     عبر SeedSequence.spawn: النتيجة متطابقة بتًا بتًا لنفس البذرة وعدد العمليات.
+#   - العمليات لا تلمس قاعدة البيانات: كل شريحة تكتب ملف .npz والعملية الرئيسية تحمّله.
+# الوحدة لا تستورد Django على مستواها حتى تعمل بسياق spawn دون إعداد settings.
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+
+# ======= الأساسات =======
+
+# (AQI, TDS) حسب نوع الخام — reset_and_generate_oman
+MINERAL_ENV_BASE = {
+    "Limestone": (55, 560), "Gypsum": (55, 560), "Silica": (55, 560), "Dolomite": (55, 560),
+    "Copper": (65, 760), "Chromite": (65, 760), "Manganese": (65, 760),
+}
+DEFAULT_ENV_BASE = (60, 700)  # Gold
+# إزاحة (AQI, TDS) حسب شريحة الاستدامة
+BAND_ENV_OFFSET = {"green": (-5, -40), "yellow": (5, 60), "red": (15, 160)}
+
+# generate_bulk: أساسات حسب الشريحة فقط
+BAND_ENV_BASE = {"green": (55, 550), "yellow": (70, 800), "red": (85, 1050)}
+
+# الانحراف المعياري وحدود القص لكل مؤشر: (sd, low, high)
+OMAN_ENV_SPEC = {"aqi": (8, 20, 135), "tds": (100, 300, 1700), "rehab": (16, 0, 100)}
+BULK_ENV_SPEC = {"aqi": (10, 20, 120), "tds": (120, 300, 1600), "rehab": (20, 0, 100)}
+
+# إنتاج: drift تناقص نسبي لكل سنة للخلف، noise_sd ضجيج نسبي
+OMAN_PRODUCTION_SPEC = {"drift": 0.012, "noise_sd": 0.08, "additive": False}
+BULK_PRODUCTION_SPEC = {"drift": 0.02, "noise_sd": 0.10, "additive": True}
+
+
+def _lookup(keys, table, default):
+    return np.array([table.get(k, default) for k in keys], dtype=float).reshape(-1, 2)
+
+
+def oman_env_baselines(mineral_names, bands, statuses):
+    """أساسات (aqi, tds, rehab) كمصفوفات (n,) حسب الخام + الشريحة + الحالة."""
+    base = _lookup(mineral_names, MINERAL_ENV_BASE, DEFAULT_ENV_BASE)
+    base += _lookup(bands, BAND_ENV_OFFSET, BAND_ENV_OFFSET["red"])
+    rehab = np.where(np.asarray(statuses) == "active", 68.0, 35.0)
+    return base[:, 0], base[:, 1], rehab
+
+
+def bulk_env_baselines(bands, statuses):
+    base = _lookup(bands, BAND_ENV_BASE, BAND_ENV_BASE["red"])
+    rehab = np.where(np.asarray(statuses) == "active", 60.0, 30.0)
+    return base[:, 0], base[:, 1], rehab
+
+
+# ======= المصفوفات =======
+
+def production_series(rng, base_latest, years_n, current_year, drift, noise_sd, additive):
+    """base_latest: (n,) -> (years, quantity) بطول n*years_n مرتبة موقعًا ثم سنة (الأحدث أولًا)."""
+    k = np.arange(years_n)
+    trend = base_latest[:, None] * (1 - drift * k)[None, :]
+    z = rng.standard_normal(size=trend.shape)
+    if additive:
+        qty = trend + base_latest[:, None] * noise_sd * z   # N(trend, base*sd)
+    else:
+        qty = trend * (1.0 + noise_sd * z)                   # trend * N(1, sd)
+    qty = np.maximum(qty, 0)
+    years = np.broadcast_to(current_year - k, qty.shape)
+    return years.ravel(), np.round(qty, 2).ravel()
+
+
+def env_series(rng, aqi_base, tds_base, rehab_base, monthly_n, start_ordinal, spec):
+    """أساسات (n,) -> (ordinal, aqi, tds, rehab) بطول n*monthly_n: قراءة كل ~30 يومًا + 0..5 أيام."""
+    shape = (len(aqi_base), monthly_n)
+    jitter = rng.integers(0, 6, size=shape)
+    ordinals = start_ordinal + 30 * np.arange(monthly_n)[None, :] + jitter
+    out = [ordinals.ravel()]
+    for base, key in ((aqi_base, "aqi"), (tds_base, "tds"), (rehab_base, "rehab")):
+        sd, lo, hi = spec[key]
+        values = np.clip(rng.normal(base[:, None], sd, size=shape), lo, hi)
+        out.append(np.round(values, 1).ravel())
+    return tuple(out)
+
+
+def site_series(rng, site_ids, base_latest, aqi_base, tds_base, rehab_base,
+                years_n, current_year, monthly_n, start_ordinal,
+                production_spec=OMAN_PRODUCTION_SPEC, env_spec=OMAN_ENV_SPEC):
+    """كل سلاسل مجموعة مواقع: قاموس مصفوفات مسطّحة جاهزة للتحميل (store_series)."""
+    site_ids = np.asarray(site_ids, dtype=np.int64)
+    years, qty = production_series(rng, np.asarray(base_latest, dtype=float), years_n, current_year,
+                                   **production_spec)
+    ordinals, aqi, tds, rehab = env_series(
+        rng, np.asarray(aqi_base, dtype=float), np.asarray(tds_base, dtype=float),
+        np.asarray(rehab_base, dtype=float), monthly_n, start_ordinal, env_spec,
+    )
+    return {
+        "prod_site": np.repeat(site_ids, years_n), "prod_year": years, "prod_qty": qty,
+        "env_site": np.repeat(site_ids, monthly_n), "env_date": ordinals,
+        "env_aqi": aqi, "env_tds": tds, "env_rehab": rehab,
+    }
+
+
+def store_series(series, batch_size=5000):
+    """حمّل مصفوفات site_series إلى ProductionMetric و EnvironmentalMetric (COPY / LOAD DATA / executemany)."""
+    from datetime import date
+    from geoeco.models import EnvironmentalMetric, ProductionMetric
+    from geoeco.services.bulk_load import get_loader
+
+    d = {k: v.tolist() for k, v in series.items()}
+    loader = get_loader(ProductionMetric, batch_size=batch_size)
+    n_prod = loader.load(ProductionMetric, ["site", "year", "quantity"],
+                         zip(d["prod_site"], d["prod_year"], d["prod_qty"]))
+    n_env = loader.load(
+        EnvironmentalMetric,
+        ["site", "date", "air_quality_index", "water_tds", "rehabilitation_progress"],
+        zip(d["env_site"], map(date.fromordinal, d["env_date"]), d["env_aqi"], d["env_tds"], d["env_rehab"]),
+    )
+    return n_prod, n_env
+
+
+# ======= الشرائح =======
+
+def shard_bounds(n, workers):
+    """حدود [lo, hi) لشرائح متتالية متقاربة الحجم."""
+    edges = np.linspace(0, n, max(1, workers) + 1).round().astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+def shard_seeds(seed, workers):
+    return np.random.SeedSequence(seed).spawn(max(1, workers))
+
+
+def generate_shard(task):
+    """عمل شريحة واحدة (دالة على مستوى الوحدة حتى تُرسل لعملية أخرى)."""
+    task = dict(task)
+    rng = np.random.default_rng(task.pop("seed"))
+    out = task.pop("out")
+    np.savez(out, **site_series(rng, **task))
+    return out
+
+
+def run_shards(tasks, workers):
+    """شغّل الشرائح بالتوازي وأعد مسارات ملفاتها بنفس ترتيب tasks."""
+    if workers <= 1:
+        return [generate_shard(t) for t in tasks]
+    # spawn لا fork: العمليات الأبناء لا ترث اتصالات قاعدة البيانات المفتوحة
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1), mp_context=ctx) as pool:
+        return list(pool.map(generate_shard, tasks))
+
+
+def build_tasks(seed, workers, site_ids, base_latest, aqi_base, tds_base, rehab_base,
+                out_dir, **common):
+    """common: years_n, current_year, monthly_n, start_ordinal (+ production_spec/env_spec)."""
+    arrays = {
+        "site_ids": np.asarray(site_ids, dtype=np.int64),
+        "base_latest": np.asarray(base_latest, dtype=float),
+        "aqi_base": np.asarray(aqi_base, dtype=float),
+        "tds_base": np.asarray(tds_base, dtype=float),
+        "rehab_base": np.asarray(rehab_base, dtype=float),
+    }
+    tasks = []
+    n = len(arrays["site_ids"])
+    for i, ((lo, hi), ss) in enumerate(zip(shard_bounds(n, workers), shard_seeds(seed, workers))):
+        task = {name: a[lo:hi] for name, a in arrays.items()}
+        task.update(common, seed=ss, out=os.path.join(out_dir, f"shard_{i:04d}.npz"))
+        tasks.append(task)
+    return tasks
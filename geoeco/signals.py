@@ -0,0 +1,60 @@
+# geoeco/signals.py
+# التقاط تغييرات القياسات: كل حفظ لقياس يضع موقعه في طابور إعادة الحساب.
+# ملاحظة: لا نستمع لـ post_delete على القياسات عمدًا حتى يبقى الحذف الجماعي سريعًا (fast delete).
+# تعديلات المواقع/الشركات/المعادن تُبطل نسخة سجل المواقع في الذاكرة.
+# حفظ/حذف موقع يحدّث انتماءه للمضلعات ومجاميعها (عند اكتمال المعاملة)، إلا الحفظ بـ update_fields
+# لا تمس الإحداثيات (مثل recalc_site_band): من يحفظ كذلك يعيد المجاميع بنفسه دفعةً واحدة.
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from geoeco.models import Company, EnvironmentalMetric, Mineral, ProductionMetric, Site
+from geoeco.geo.oman_hotspots import HOTSPOT_POLYGONS
+from geoeco.services.change_capture import mark_sites_dirty
+from geoeco.services.hotspots import hotspots_at, schedule_stats_refresh, sync_site
+from geoeco.services.site_registry import bump_registry_version
+
+SITE_COORD_FIELDS = {"lat", "lon"}
+
+
+@receiver(post_save, sender=EnvironmentalMetric)
+def capture_env_change(sender, instance, raw=False, using=None, **kwargs):
+    if raw:  # loaddata
+        return
+    mark_sites_dirty([instance.site_id], using=using, env_since={instance.site_id: instance.date})
+
+
+@receiver(post_save, sender=ProductionMetric)
+def capture_production_change(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    mark_sites_dirty([instance.site_id], using=using)
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=Mineral)
+@receiver(post_delete, sender=Mineral)
+def capture_registry_change(sender, raw=False, **kwargs):
+    bump_registry_version()
+
+
+@receiver(post_save, sender=Site)
+def capture_site_hotspots(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not SITE_COORD_FIELDS & set(update_fields)):
+        return
+    schedule_stats_refresh(sync_site(instance, created=created))
+
+
+@receiver(post_delete, sender=Site)
+def capture_site_hotspots_delete(sender, instance, **kwargs):
+    # صفوف الانتماء حُذفت بالتتالي؛ المضلعات تُستنتج من الإحداثيات
+    schedule_stats_refresh(hotspots_at(instance.lat, instance.lon))
+
+
+@receiver(post_save, sender=Mineral)
+def capture_mineral_hotspots(sender, created=False, raw=False, **kwargs):
+    # تغيير اسم معدن يغيّر مفاتيح خلايا المجاميع
+    if not (raw or created):
+        schedule_stats_refresh(HOTSPOT_POLYGONS)
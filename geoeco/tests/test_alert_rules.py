@@ -0,0 +1,46 @@
+# geoeco/tests/test_alert_rules.py
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from geoeco.models import Alert, EnvironmentalMetric, License, Mineral, Site
+from geoeco.services.alert_rules import evaluate_alert_rules
+
+TODAY = datetime.date.today()
+
+
+class AlertRuleDedupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mineral = Mineral.objects.create(name="Copper")
+        cls.hot, cls.calm = (Site.objects.create(name=n, mineral=mineral, lat=23.5, lon=57.0) for n in "HC")
+        EnvironmentalMetric.objects.bulk_create(
+            EnvironmentalMetric(site=site, date=TODAY - datetime.timedelta(days=30 * k), air_quality_index=aqi,
+                                water_tds=600, rehabilitation_progress=50)
+            for site, aqi in ((cls.hot, 130), (cls.calm, 60)) for k in range(4))
+        License.objects.create(site=cls.calm, license_no="L-1", issued_on=TODAY - datetime.timedelta(days=3000),
+                               expires_on=TODAY + datetime.timedelta(days=30))
+
+    def codes(self, alerts):
+        return sorted((a.site_id, a.rule) for a in alerts)
+
+    def test_rules_fire_once_within_dedup_window(self):
+        expected = [(self.hot.id, "aqi_critical"), (self.hot.id, "aqi_high"), (self.calm.id, "license_expiring")]
+        self.assertEqual(self.codes(evaluate_alert_rules()), sorted(expected))
+        self.assertEqual(evaluate_alert_rules(), [])
+        self.assertEqual(Alert.objects.count(), 3)
+
+    def test_alert_older_than_window_fires_again(self):
+        evaluate_alert_rules()
+        Alert.objects.filter(rule="aqi_high").update(created_at=timezone.now() - datetime.timedelta(days=8))
+        self.assertEqual(self.codes(evaluate_alert_rules()), [(self.hot.id, "aqi_high")])
+
+    def test_manual_alerts_and_other_sites_do_not_suppress(self):
+        Alert.objects.create(site=self.hot, message="manual")
+        Alert.objects.create(site=self.calm, rule="aqi_high", message="other site")
+        self.assertIn((self.hot.id, "aqi_high"), self.codes(evaluate_alert_rules(site_ids=[self.hot.id])))
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(len(evaluate_alert_rules(dry_run=True)), 3)
+        self.assertFalse(Alert.objects.exists())
@@ -0,0 +1,42 @@
+# geoeco/tests/test_boundaries.py
+import random
+
+from django.test import SimpleTestCase
+
+from geoeco.geo.boundaries import EdgeIndex
+from geoeco.geo.oman_hotspots import HOTSPOT_POLYGONS
+from geoeco.geo.oman_polygon import OMAN_POLYGONS, point_in_poly
+
+HOTSPOTS = [h["poly"] for h in HOTSPOT_POLYGONS.values()]
+
+
+def _points(polys, n, seed):
+    lats = [p[0] for poly in polys for p in poly]
+    lons = [p[1] for poly in polys for p in poly]
+    rng = random.Random(seed)
+    return [(rng.uniform(min(lats) - 0.2, max(lats) + 0.2), rng.uniform(min(lons) - 0.2, max(lons) + 0.2))
+            for _ in range(n)]
+
+
+class EdgeIndexParityTests(SimpleTestCase):
+    def assertParity(self, polys, buckets=None):
+        index = EdgeIndex([[poly] for poly in polys], buckets=buckets)
+        for lat, lon in _points(polys, 3000, seed=len(polys)):
+            expected = {i for i, poly in enumerate(polys) if point_in_poly.uncached(lat, lon, poly)}
+            self.assertEqual(index.polygons_containing(lat, lon), expected, (lat, lon))
+
+    def test_oman_outline(self):
+        for buckets in (None, 1, 64):
+            with self.subTest(buckets=buckets):
+                self.assertParity(OMAN_POLYGONS, buckets)
+
+    def test_hotspots(self):
+        self.assertParity(HOTSPOTS)
+
+    def test_holes_belong_to_their_polygon(self):
+        outer = [(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)]
+        hole = [(4, 4), (4, 6), (6, 6), (6, 4), (4, 4)]
+        index = EdgeIndex([[outer, hole], [hole]])
+        self.assertEqual(index.polygons_containing(2, 2), {0})
+        self.assertEqual(index.polygons_containing(5, 5), {1})
+        self.assertFalse(index.contains(11, 5))
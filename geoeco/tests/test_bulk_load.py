@@ -0,0 +1,47 @@
+# geoeco/tests/test_bulk_load.py
+import datetime
+import io
+
+import numpy as np
+from django.test import TestCase
+
+from geoeco.models import EnvironmentalMetric, Mineral, ProductionMetric, Site
+from geoeco.services.bulk_load import BulkLoader, _write_csv, get_loader
+from geoeco.services.synthetic import site_series, store_series
+
+
+class BulkLoaderRoundTripTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mineral = Mineral.objects.create(name="Copper")
+        cls.sites = [Site.objects.create(name=f"S{i}", mineral=mineral, lat=23.5, lon=57.0) for i in range(3)]
+
+    def test_sqlite_uses_executemany_loader(self):
+        self.assertIs(type(get_loader(EnvironmentalMetric)), BulkLoader)
+
+    def test_rows_round_trip_in_batches(self):
+        rows = [(s.id, datetime.date(2024, m, 1), None if m == 2 else 40.5 + m, 600.0, m)
+                for s in self.sites for m in range(1, 8)]
+        fields = ["site", "date", "air_quality_index", "water_tds", "rehabilitation_progress"]
+        self.assertEqual(get_loader(EnvironmentalMetric, batch_size=4).load(EnvironmentalMetric, fields, iter(rows)),
+                         len(rows))
+        stored = list(EnvironmentalMetric.objects.order_by("site_id", "date")
+                      .values_list("site_id", "date", "air_quality_index", "water_tds", "rehabilitation_progress"))
+        self.assertEqual(stored, rows)
+
+    def test_store_series_loads_generated_arrays(self):
+        ids = [s.id for s in self.sites]
+        series = site_series(np.random.default_rng(1), ids, [1000.0] * 3, [60.0] * 3, [700.0] * 3, [40.0] * 3,
+                             years_n=2, current_year=2024, monthly_n=3,
+                             start_ordinal=datetime.date(2024, 1, 1).toordinal())
+        self.assertEqual(store_series(series, batch_size=2), (6, 9))
+        qty = list(ProductionMetric.objects.order_by("site_id", "year").values_list("quantity", flat=True))
+        order = np.lexsort((series["prod_year"], series["prod_site"]))
+        np.testing.assert_allclose(qty, series["prod_qty"][order])
+        dates = EnvironmentalMetric.objects.filter(site_id=ids[0]).order_by("date").values_list("date", flat=True)
+        self.assertEqual(list(dates), [datetime.date.fromordinal(d) for d in series["env_date"][:3]])
+
+    def test_csv_writer_marks_nulls(self):
+        fh = io.StringIO()
+        self.assertEqual(_write_csv(fh, [(1, None), (2, 3.5)], r"\N"), 2)
+        self.assertEqual(fh.getvalue().splitlines(), [r"1,\N", "2,3.5"])
@@ -0,0 +1,48 @@
+# geoeco/tests/test_bulk_reset.py
+import datetime
+
+from django.db.models import CASCADE
+from django.test import TransactionTestCase
+
+from geoeco.models import Company, EnvironmentalMetric, License, Mineral, ProductionMetric, Site
+from geoeco.services.bulk_reset import BulkResetter, deletion_order
+
+
+class DeletionOrderTests(TransactionTestCase):
+    def test_children_come_before_parents(self):
+        ordered, set_null = deletion_order([Site, Company, Mineral])
+        self.assertEqual(set_null, [])
+        for model in ordered:
+            for field in model._meta.concrete_fields:
+                parent = field.related_model
+                if field.many_to_one and parent in ordered and field.remote_field.on_delete is CASCADE:
+                    with self.subTest(child=model.__name__, parent=parent.__name__):
+                        self.assertLess(ordered.index(model), ordered.index(parent))
+        self.assertTrue({EnvironmentalMetric, ProductionMetric, License} <= set(ordered))
+
+    def test_set_null_from_kept_tables_is_returned(self):
+        ordered, set_null = deletion_order([Mineral])
+        self.assertEqual(ordered, [Mineral])
+        self.assertEqual(set_null, [(Site, Site._meta.get_field("mineral"))])
+
+
+class BulkResetterTests(TransactionTestCase):
+    def setUp(self):
+        company, mineral = Company.objects.create(name="C"), Mineral.objects.create(name="Copper")
+        sites = [Site.objects.create(name=f"S{i}", company=company, mineral=mineral, lat=23.5, lon=57.0)
+                 for i in range(3)]
+        EnvironmentalMetric.objects.bulk_create(
+            EnvironmentalMetric(site=s, date=datetime.date(2024, m, 1), air_quality_index=50, water_tds=500)
+            for s in sites for m in range(1, 6))
+
+    def test_chunked_delete_respects_foreign_keys(self):
+        counts = BulkResetter(chunk_size=4).reset([Site, Company, Mineral])
+        self.assertEqual(counts[EnvironmentalMetric._meta.db_table], 15)
+        self.assertEqual(counts[Site._meta.db_table], 3)
+        for model in (EnvironmentalMetric, Site, Company, Mineral):
+            self.assertFalse(model.objects.exists())
+
+    def test_kept_tables_are_nulled_not_deleted(self):
+        BulkResetter().reset([Mineral])
+        self.assertEqual(list(Site.objects.values_list("mineral", flat=True).distinct()), [None])
+        self.assertEqual(EnvironmentalMetric.objects.count(), 15)
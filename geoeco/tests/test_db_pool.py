@@ -0,0 +1,43 @@
+# geoeco/tests/test_db_pool.py
+import os
+import tempfile
+import threading
+
+from django.db import connections
+from django.test import SimpleTestCase
+
+from geoecotracker.db_backends.pooled_sqlite3.base import DatabaseWrapper
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.settings_dict = {**connections["default"].settings_dict, "NAME": os.path.join(tmp.name, "pool.sqlite3"),
+                              "POOL": {"max_size": 8}, "CONN_MAX_AGE": 0}
+        self.addCleanup(self.drain)
+
+    def drain(self):
+        pool = DatabaseWrapper._pools.pop(("pooltest", self.settings_dict["NAME"]), None)
+        while pool is not None and not pool.empty():
+            pool.get_nowait().close()
+
+    def cycle(self, times):
+        wrapper = DatabaseWrapper(self.settings_dict, alias="pooltest")
+        for _ in range(times):
+            wrapper.ensure_connection()
+            wrapper.close()
+
+    def test_reuses_connections_and_counts_across_threads(self):
+        before = DatabaseWrapper.pool_counters()
+        threads = [threading.Thread(target=self.cycle, args=(50,)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        after = DatabaseWrapper.pool_counters()
+        delta = {k: after[k] - before[k] for k in after}
+        self.assertEqual(delta["created"] + delta["reused"], 400)
+        self.assertEqual(delta["returned"], 400)
+        self.assertLessEqual(delta["created"], 8)
+        self.assertEqual(delta["discarded"], 0)
@@ -0,0 +1,126 @@
+# geoeco/tests/test_db_router.py
+# الأساسية = قاعدة الاختبار، و replica = ملف SQLite ثانٍ مستقل ببيانات مختلفة، فيظهر من أين قُرئ كل صف.
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.db import connections
+from django.http import JsonResponse
+from django.test import RequestFactory, TransactionTestCase
+
+from geoeco.models import Mineral
+from geoecotracker import db_router
+from geoecotracker.db_router import PIN_COOKIE, REPLICA_ALIAS, primary_pinning_middleware, read_replica
+
+
+def _names(request):
+    if request.method == "POST":
+        Mineral.objects.create(name=request.POST["name"])
+    return JsonResponse({"names": sorted(Mineral.objects.values_list("name", flat=True))})
+
+
+analytics_view = primary_pinning_middleware(read_replica(_names))
+plain_view = primary_pinning_middleware(_names)
+
+
+@read_replica
+def _cached_names(request):
+    names = cache.get("test-router-names")
+    if names is None:
+        names = sorted(Mineral.objects.values_list("name", flat=True))
+        cache.set("test-router-names", names)
+    return JsonResponse({"names": names})
+
+
+cached_view = primary_pinning_middleware(_cached_names)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    # replica يُسجَّل بعد إعداد الصنف فلا يطاله فحص قواعد الاختبار ولا حجب الاستعلامات؛ تنظيفه هنا
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.tmp.name, "replica.sqlite3")
+        connections.settings[REPLICA_ALIAS] = {**connections["default"].settings_dict, "NAME": path,
+                                               "TEST": {"NAME": path}}
+        # allow_migrate يمنع الترحيل على replica: الجدول يُنشأ يدويًا
+        with connections[REPLICA_ALIAS].schema_editor() as editor:
+            editor.create_model(Mineral)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        db_router._replica_down_until = 0.0
+        Mineral.objects.bulk_create([Mineral(name="on-primary")])
+        Mineral.objects.using(REPLICA_ALIAS).bulk_create([Mineral(name="on-replica")])
+        self.rf = RequestFactory()
+
+    def tearDown(self):
+        with connections[REPLICA_ALIAS].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {Mineral._meta.db_table}")
+
+    def names(self, response):
+        return json.loads(response.content)["names"]
+
+    def test_decorated_views_read_from_replica(self):
+        self.assertEqual(self.names(analytics_view(self.rf.get("/"))), ["on-replica"])
+        self.assertEqual(self.names(plain_view(self.rf.get("/"))), ["on-primary"])
+
+    def test_read_your_writes_after_post(self):
+        response = analytics_view(self.rf.post("/", {"name": "new"}))
+        # نفس الطلب يقرأ ما كتبه، ثم يُثبَّت العميل على الأساسية بكوكي
+        self.assertEqual(self.names(response), ["new", "on-primary"])
+        self.assertEqual(response.cookies[PIN_COOKIE].value, "1")
+
+        pinned = self.rf.get("/")
+        pinned.COOKIES[PIN_COOKIE] = "1"
+        self.assertEqual(self.names(analytics_view(pinned)), ["new", "on-primary"])
+        self.assertEqual(self.names(analytics_view(self.rf.get("/"))), ["on-replica"])
+
+    def test_get_without_writes_does_not_pin(self):
+        self.assertNotIn(PIN_COOKIE, analytics_view(self.rf.get("/")).cookies)
+
+    def test_filling_the_cache_does_not_pin(self):
+        cache.delete("test-router-names")
+        response = cached_view(self.rf.get("/"))
+        self.assertEqual(self.names(response), ["on-replica"])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(cache.get("test-router-names"), ["on-replica"])  # الكاش على الأساسية
+        self.assertEqual(self.names(analytics_view(self.rf.get("/"))), ["on-replica"])
+        cache.delete("test-router-names")
+
+    def test_failed_replica_query_is_retried_on_primary(self):
+        self.assertEqual(self.names(analytics_view(self.rf.get("/"))), ["on-replica"])  # اتصال مفتوح
+        with connections[REPLICA_ALIAS].schema_editor() as editor:
+            editor.delete_model(Mineral)
+        try:
+            with self.assertLogs("geoecotracker.db_router", "WARNING"):
+                self.assertEqual(self.names(analytics_view(self.rf.get("/"))), ["on-primary"])
+        finally:
+            connections[REPLICA_ALIAS].close()
+            with connections[REPLICA_ALIAS].schema_editor() as editor:
+                editor.create_model(Mineral)
+            db_router._replica_down_until = 0.0
+
+    def test_falls_back_to_primary_when_replica_is_down(self):
+        replica = connections[REPLICA_ALIAS]
+        path = replica.settings_dict["NAME"]
+        replica.close()
+        replica.settings_dict["NAME"] = os.path.join(self.tmp.name, "missing", "replica.sqlite3")
+        try:
+            with self.assertLogs("geoecotracker.db_router", "WARNING"):
+                self.assertEqual(self.names(analytics_view(self.rf.get("/"))), ["on-primary"])
+            self.assertFalse(db_router.replica_available())  # لا إعادة محاولة قبل REPLICA_RETRY_SECONDS
+        finally:
+            replica.close()
+            replica.settings_dict["NAME"] = path
+            db_router._replica_down_until = 0.0
+        self.assertEqual(self.names(analytics_view(self.rf.get("/"))), ["on-replica"])
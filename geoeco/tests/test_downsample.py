@@ -0,0 +1,79 @@
+# geoeco/tests/test_downsample.py
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from geoeco.models import Mineral, ProductionMetric, Site
+from geoeco.services.downsample import downsample, lttb, minmax
+
+
+def noisy(size, seed=3):
+    rng = np.random.default_rng(seed)
+    x = np.arange(size, dtype=float)
+    return x, np.sin(x / 40) * 10 + rng.normal(0, 1, size)
+
+
+class DownsampleTests(SimpleTestCase):
+    def test_point_budget_and_endpoints(self):
+        x, y = noisy(1000)
+        for func in (lttb, minmax):
+            for n in (3, 4, 10, 101, 999):
+                with self.subTest(func=func.__name__, n=n):
+                    idx = func(x, y, n)
+                    self.assertLessEqual(len(idx), n)
+                    self.assertEqual((idx[0], idx[-1]), (0, 999))
+                    self.assertTrue((np.diff(idx) > 0).all())
+        self.assertEqual(len(lttb(x, y, 101)), 101)
+
+    def test_short_series_returned_whole(self):
+        x, y = noisy(50)
+        for func in (lttb, minmax):
+            np.testing.assert_array_equal(func(x, y, 50), np.arange(50))
+            np.testing.assert_array_equal(func(x[:2], y[:2], 1), [0, 1])
+
+    def test_minmax_keeps_extremes(self):
+        x, y = noisy(1000)
+        y[437], y[612] = 99.0, -99.0
+        idx = minmax(x, y, 20)
+        self.assertIn(437, idx)
+        self.assertIn(612, idx)
+
+    def test_lttb_keeps_spike(self):
+        x, y = np.arange(500.0), np.zeros(500)
+        y[250] = 50.0
+        self.assertIn(250, lttb(x, y, 20))
+
+    def test_missing_values_dropped(self):
+        x, y = noisy(300)
+        y[::3] = np.nan
+        for method in ("lttb", "minmax"):
+            sx, sy = downsample(x, y, 300, method)
+            self.assertEqual(len(sx), 200)
+            self.assertFalse(np.isnan(sy).any())
+
+
+class SiteChartEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mineral = Mineral.objects.create(name="Copper")
+        cls.site = Site.objects.create(name="S", mineral=mineral, lat=23.5, lon=57.0)
+        _, y = noisy(200)
+        ProductionMetric.objects.bulk_create(
+            ProductionMetric(site=cls.site, year=1800 + i, quantity=q) for i, q in enumerate(y))
+
+    def chart(self, **params):
+        url = reverse("api_site_chart", args=[self.site.id, "production"])
+        return self.client.get(url, params)
+
+    def test_points_budget(self):
+        for method in ("lttb", "minmax"):
+            data = self.chart(points=20, method=method).json()
+            series = data["series"]["production"]
+            self.assertEqual(series["total"], 200)
+            self.assertLessEqual(len(series["x"]), 20)
+            self.assertEqual((series["x"][0], series["x"][-1]), (1800, 1999))
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.chart(points="many").status_code, 400)
+        self.assertEqual(self.chart(method="mean").status_code, 400)
+        self.assertEqual(self.chart(points=1).json()["points"], 3)
@@ -0,0 +1,38 @@
+# geoeco/tests/test_env_partitions.py
+import datetime
+
+from django.db.models import Sum
+from django.test import TestCase
+
+from geoeco.models import CubeCell, EnvironmentalMetric, Mineral, Site
+from geoeco.services.ai_forecast import _load_histories
+from geoeco.services.env_partitions import hot_since, latest_readings, partitions
+from geoeco.services.report_cube import refresh_cube
+
+
+class ColdYearReadsTests(TestCase):
+    """بعد rotate (جداول الظل في SQLite، لا شيء على غيرها) تبقى النتائج كما قبلها."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = Site.objects.create(name="S", mineral=Mineral.objects.create(name="Copper"), lat=23.5, lon=57.0)
+        cls.old_year = hot_since().year - 2
+        old = [datetime.date(cls.old_year, m, 1) for m in range(1, 13)]
+        recent = [hot_since() + datetime.timedelta(days=31 * k) for k in range(2)]
+        EnvironmentalMetric.objects.bulk_create(
+            EnvironmentalMetric(site=cls.site, date=d, air_quality_index=40 + k, water_tds=500,
+                                rehabilitation_progress=k)
+            for k, d in enumerate(old + recent))
+
+    def snapshot(self):
+        refresh_cube()
+        cube = CubeCell.objects.filter(year=self.old_year).aggregate(n=Sum("env_readings"), aqi=Sum("aqi_sum"))
+        _, env = _load_histories([self.site.id])
+        return cube, env[self.site.id], latest_readings(self.site, 3, ("date", "air_quality_index"))
+
+    def test_rotation_does_not_change_results(self):
+        before = self.snapshot()
+        self.assertEqual(before[0]["n"], 12)
+        self.assertEqual(len(before[1]), 14)
+        partitions().rotate(hot_since())
+        self.assertEqual(self.snapshot(), before)
@@ -0,0 +1,62 @@
+# geoeco/tests/test_env_rollups.py
+import datetime
+
+import numpy as np
+from django.test import TestCase
+
+from geoeco.models import EnvironmentalMetric, EnvRollup, Mineral, Site
+from geoeco.services.env_rollups import _group_stats, refresh_env_rollups
+
+
+class RollupDateParamsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = Site.objects.create(name="S", mineral=Mineral.objects.create(name="Copper"), lat=23.5, lon=57.0)
+
+    def test_malformed_dates_are_rejected(self):
+        urls = [("/api/rollups/env/", {"scope": "site", "key": self.site.id}),
+                (f"/api/sites/{self.site.id}/chart/env/", {})]
+        for url, params in urls:
+            for bad in ({"start": "2024-13-01"}, {"start": "yesterday"}, {"end": "2024/01/31"}):
+                with self.subTest(url=url, bad=bad):
+                    self.assertEqual(self.client.get(url, {**params, **bad}).status_code, 400)
+            self.assertEqual(self.client.get(url, {**params, "start": "2024-01-01"}).status_code, 200)
+
+
+class RollupStatsTests(TestCase):
+    def test_group_stats_match_numpy_per_group(self):
+        rng = np.random.default_rng(7)
+        sizes = [1, 2, 5, 20, 0, 37]
+        gid = np.repeat(np.arange(len(sizes)), sizes)
+        vals = rng.normal(100, 30, len(gid))
+        vals[::7] = np.nan
+        perm = rng.permutation(len(gid))
+        stats = _group_stats(gid[perm], vals[perm], len(sizes))
+        for g in range(len(sizes)):
+            v = vals[(gid == g) & ~np.isnan(vals)]
+            with self.subTest(group=g):
+                if not len(v):
+                    self.assertTrue(all(np.isnan(stats[k][g]) for k in stats))
+                    continue
+                self.assertAlmostEqual(stats["p95"][g], np.percentile(v, 95))
+                self.assertAlmostEqual(stats["mean"][g], v.mean())
+                self.assertEqual((stats["min"][g], stats["max"][g]), (v.min(), v.max()))
+
+    def test_governorate_p95_comes_from_raw_readings(self):
+        mineral = Mineral.objects.create(name="Copper")
+        a, b = (Site.objects.create(name=n, mineral=mineral, lat=23.5, lon=57.0, governorate="Muscat") for n in "AB")
+        year = datetime.date.today().year - 1
+        values = {a: [10, 20, 30, 40], b: [100, 200]}
+        EnvironmentalMetric.objects.bulk_create(
+            EnvironmentalMetric(site=site, date=datetime.date(year, 1, 1 + day), air_quality_index=v,
+                                water_tds=500, rehabilitation_progress=1)
+            for site, vs in values.items() for day, v in enumerate(vs))
+        refresh_env_rollups()
+
+        def row(scope, key):
+            return EnvRollup.objects.get(scope=scope, key=key, period="month", period_start=datetime.date(year, 1, 1))
+
+        self.assertEqual(row("site", str(a.id)).aqi_p95, round(np.percentile(values[a], 95), 2))
+        gov = row("governorate", "Muscat")
+        self.assertEqual((gov.readings, gov.aqi_p95), (6, round(np.percentile(values[a] + values[b], 95), 2)))
+        self.assertEqual(gov.aqi_max, 200)
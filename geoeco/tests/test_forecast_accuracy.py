@@ -0,0 +1,32 @@
+# geoeco/tests/test_forecast_accuracy.py
+import datetime
+
+from django.test import TestCase
+
+from geoeco.models import ForecastAccuracy, ForecastProduction, ForecastRun, Mineral, ProductionMetric, Site
+from geoeco.services.forecast_accuracy import refresh_accuracy
+
+
+class ProductionAccuracyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = Site.objects.create(name="S", mineral=Mineral.objects.create(name="Copper"), lat=23.5, lon=57.0)
+        cls.forecast_run = ForecastRun.objects.create(status="complete", is_current=True)
+        ForecastProduction.objects.bulk_create(
+            ForecastProduction(run=cls.forecast_run, site=cls.site, year=y, quantity=100.0) for y in (2025, 2026))
+        ProductionMetric.objects.create(site=cls.site, year=2025, quantity=110.0)
+        cls.partial = ProductionMetric.objects.create(site=cls.site, year=2026, quantity=40.0)
+
+    def row(self):
+        return ForecastAccuracy.objects.get(run=self.forecast_run, site=self.site, target="production")
+
+    def test_current_year_is_scored_once_complete(self):
+        self.assertEqual(refresh_accuracy(today=datetime.date(2026, 6, 1)), 1)
+        self.assertEqual((self.row().points, self.row().through), (1, datetime.date(2025, 1, 1)))
+
+        self.partial.quantity = 120.0  # السنة اكتملت
+        self.partial.save()
+        self.assertEqual(refresh_accuracy(today=datetime.date(2027, 1, 15)), 1)
+        row = self.row()
+        self.assertEqual((row.points, row.through), (2, datetime.date(2026, 1, 1)))
+        self.assertAlmostEqual(row.abs_err_sum, 10.0 + 20.0)
@@ -0,0 +1,48 @@
+# geoeco/tests/test_forecast_cache.py
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase
+
+from geoeco.models import Mineral, ProductionMetric, Site
+from geoeco.services.ai_forecast import FORECAST_RUN_CACHE_KEY, run_forecasts
+from geoecotracker.db import CACHE_TABLE, cache_config
+
+
+class CacheConfigTests(SimpleTestCase):
+    def backend(self, url):
+        return cache_config({"CACHE_URL": url} if url is not None else {})["default"]
+
+    def test_shared_backends(self):
+        self.assertEqual(self.backend(None), {"BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                                              "LOCATION": CACHE_TABLE})
+        redis = self.backend("rediss://cache:6380/1")
+        self.assertEqual((redis["BACKEND"].rsplit(".", 1)[1], redis["LOCATION"]), ("RedisCache", "rediss://cache:6380/1"))
+        self.assertEqual(self.backend("locmem://")["BACKEND"], "django.core.cache.backends.locmem.LocMemCache")
+
+
+class ForecastEndpointCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.site = Site.objects.create(name="S", mineral=Mineral.objects.create(name="Copper"), lat=23.5, lon=57.0)
+        ProductionMetric.objects.bulk_create(
+            ProductionMetric(site=self.site, year=2015 + y, quantity=1000 + 100 * y) for y in range(6))
+        run_forecasts()
+
+    def get(self):
+        response = self.client.get(f"/forecast/site/{self.site.id}/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_payload_is_cached_until_the_site_is_recomputed(self):
+        first = self.get()
+        self.assertEqual([r["year"] for r in first["production"]], [2021, 2022, 2023])
+        self.assertEqual(cache.get(FORECAST_RUN_CACHE_KEY), first["run"])
+
+        ProductionMetric.objects.filter(site=self.site).update(quantity=50)
+        self.assertEqual(self.get(), first)  # من الكاش
+        run_forecasts([self.site.id])  # يحذف مفاتيح الموقع في الدفعة الحالية
+        second = self.get()
+        self.assertEqual(second["run"], first["run"])
+        self.assertNotEqual(second["production"], first["production"])
+
+    def test_unknown_site_is_404(self):
+        self.assertEqual(self.client.get("/forecast/site/999999/").status_code, 404)
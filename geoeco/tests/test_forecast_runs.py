@@ -0,0 +1,65 @@
+# geoeco/tests/test_forecast_runs.py
+import datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from geoeco.models import EnvironmentalMetric, ForecastProduction, ForecastRun, Mineral, ProductionMetric, Site
+from geoeco.services import forecast_select
+from geoeco.services.ai_forecast import _load_histories, run_forecasts
+
+
+class RunInterleavingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mineral = Mineral.objects.create(name="Copper")
+        cls.sites = [Site.objects.create(name=f"S{i}", mineral=mineral, lat=23.5, lon=57.0 + i / 100)
+                     for i in range(7)]
+        ProductionMetric.objects.bulk_create(
+            ProductionMetric(site=s, year=2015 + y, quantity=1000 + 50 * y + i)
+            for i, s in enumerate(cls.sites) for y in range(6))
+        EnvironmentalMetric.objects.bulk_create(
+            EnvironmentalMetric(site=s, date=datetime.date(2024, m, 1), air_quality_index=40 + m,
+                                water_tds=500 + 3 * m, rehabilitation_progress=2 * m)
+            for s in cls.sites for m in range(1, 13))
+
+    def test_partial_run_inside_running_full_run(self):
+        """عامل الطابور يكتب موقعًا في الدفعة الجارية قبل أن يصل إليه التشغيل الكامل."""
+        real = forecast_select.run_batches
+        last = self.sites[-1].id
+        calls = []
+
+        def interleaved(tasks, workers=1):
+            calls.append(len(tasks))
+            if len(calls) == 1:
+                run_forecasts([last])  # الدفعة الأولى (5 مواقع) قيد الحساب
+            return real(tasks, workers)
+
+        with mock.patch.object(forecast_select, "run_batches", side_effect=interleaved):
+            run_forecasts(None, chunk_size=5)
+
+        run = ForecastRun.objects.get()
+        self.assertEqual((run.status, run.is_current), ("complete", True))
+        years = list(ForecastProduction.objects.filter(run=run, site_id=last)
+                     .order_by("year").values_list("year", flat=True))
+        self.assertEqual(years, [2021, 2022, 2023])
+        self.assertEqual(ForecastProduction.objects.filter(run=run).count(), 3 * len(self.sites))
+
+
+
+@override_settings(ENV_HOT_YEARS=1)
+class HistoryWindowTests(TestCase):
+    def test_short_hot_window_reads_enough_history_for_seasonal_backtests(self):
+        """النافذة الساخنة (هذه السنة فقط) أقصر من موسم + أصول الاختبار: يُقرأ التاريخ كله."""
+        site = Site.objects.create(name="S", mineral=Mineral.objects.create(name="Copper"), lat=23.5, lon=57.0)
+        today = datetime.date.today()
+        months = [(today.year * 12 + today.month - 1 - k) for k in range(30)][::-1]
+        EnvironmentalMetric.objects.bulk_create(
+            EnvironmentalMetric(site=site, date=datetime.date(m // 12, m % 12 + 1, 1), air_quality_index=50 + m % 12,
+                                water_tds=600, rehabilitation_progress=10)
+            for m in months)
+
+        _, env = _load_histories([site.id])
+        self.assertEqual(len(env[site.id]), 30)
+        [pick] = forecast_select.select_forecasts([[r[1] for r in env[site.id]]], 6, "monthly")
+        self.assertIn("seasonal_naive", pick["scores"])
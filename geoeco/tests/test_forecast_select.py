@@ -0,0 +1,62 @@
+# geoeco/tests/test_forecast_select.py
+import numpy as np
+from django.test import SimpleTestCase
+
+from geoeco.services import forecast_select as fs
+
+
+class EvaluateTests(SimpleTestCase):
+    def test_linear_series_picks_linear(self):
+        Y = 5 + 2.0 * np.arange(24)[None, :]
+        (r,) = fs.evaluate(Y, 3, "monthly")
+        self.assertEqual(r["model"], "linear")
+        self.assertEqual(r["origins"], 6)
+        np.testing.assert_allclose(r["forecast"], [53, 55, 57])
+
+    def test_seasonal_series_picks_seasonal_naive(self):
+        season = [3, 5, 9, 14, 20, 24, 25, 23, 18, 12, 7, 4]
+        Y = np.array([season * 3], dtype=float)
+        (r,) = fs.evaluate(Y, 4, "monthly")
+        self.assertEqual(r["model"], "seasonal_naive")
+        self.assertEqual(r["forecast"], season[:4])
+        self.assertEqual(r["mase"], 0.0)
+
+    def test_short_series_falls_back_to_default(self):
+        for kind, T in (("annual", 3), ("monthly", 6)):
+            with self.subTest(kind=kind):
+                (r,) = fs.evaluate(np.arange(1.0, T + 1)[None, :], 2, kind)
+                self.assertEqual(r["model"], fs.KINDS[kind]["default"])
+                self.assertEqual((r["origins"], r["mape"], r["scores"]), (0, None, {}))
+                self.assertEqual(set(r["intervals"]), set(fs.INTERVALS))
+
+    def test_intervals_nest_and_widen_with_horizon(self):
+        rng = np.random.default_rng(7)
+        Y = 50 + np.cumsum(rng.normal(0, 2, size=(3, 30)), axis=1)
+        for r in fs.evaluate(Y, 5, "monthly"):
+            width = {level: np.subtract(hi, lo) for level, (lo, hi) in r["intervals"].items()}
+            self.assertTrue((width[95] > width[80]).all())
+            self.assertTrue((np.diff(width[80]) > 0).all())
+            lo, hi = r["intervals"][80]
+            self.assertTrue((np.array(lo) < r["forecast"]).all() and (np.array(r["forecast"]) < hi).all())
+
+    def test_constant_series_has_zero_width_intervals(self):
+        for Y in (np.full((1, 20), 7.0), np.full((1, 2), 7.0)):  # مع اختبار وبدونه
+            (r,) = fs.evaluate(Y, 3, "monthly")
+            self.assertEqual(r["forecast"], [7.0] * 3)
+            for lo, hi in r["intervals"].values():
+                self.assertEqual((lo, hi), ([7.0] * 3, [7.0] * 3))
+
+    def test_gaps_are_forward_filled(self):
+        Y = np.array([[np.nan, 2, np.nan, 4], [np.nan] * 4])
+        np.testing.assert_array_equal(fs.fill_gaps(Y), [[2, 2, 2, 4], [0, 0, 0, 0]])
+
+    def test_select_forecasts_keeps_order_across_lengths(self):
+        series = [list(range(10)), [4.0] * 5, list(range(0, 20, 2))]
+        out = fs.select_forecasts(series, 2, "annual")
+        np.testing.assert_allclose(out[0]["forecast"], [10, 11])
+        np.testing.assert_allclose(out[1]["forecast"], [4, 4])
+        np.testing.assert_allclose(out[2]["forecast"], [20, 22])
+
+    def test_t_quantile(self):
+        self.assertAlmostEqual(fs.t_quantile(fs.INTERVALS[95], 10), 2.228, places=2)
+        self.assertAlmostEqual(fs.t_quantile(fs.INTERVALS[95], 10_000), fs.INTERVALS[95], places=3)
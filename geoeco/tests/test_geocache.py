@@ -0,0 +1,71 @@
+# geoeco/tests/test_geocache.py
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from geoeco.geo import geocache
+from geoeco.geo.geocache import GeoCache, geo_cached
+
+
+class GeoCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "geo.sqlite3")
+        self.calls = []
+
+    def cache(self, version="v1", **kwargs):
+        cache = GeoCache("test", version=lambda: version, **kwargs)
+        cache._setup()
+        return cache
+
+    def compute(self, key):
+        def run():
+            self.calls.append(key)
+            return list(key)  # كما تعود القيم من JSON
+        return run
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = self.cache(maxsize=2)
+        for key in ((1, 1), (2, 2), (1, 1), (3, 3)):
+            cache.lookup(key, self.compute(key))
+        self.assertEqual(list(cache.data), [(1, 1), (3, 3)])
+        cache.lookup((2, 2), self.compute((2, 2)))
+        self.assertEqual(self.calls, [(1, 1), (2, 2), (3, 3), (2, 2)])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"], stats["size"]), (1, 4, 2, 2))
+
+    def test_disk_entries_reload_in_a_new_process(self):
+        with override_settings(GEO_CACHE_PATH=self.path):
+            first = self.cache(maxsize=10, decode=tuple)
+            with mock.patch.object(geocache.time, "time", side_effect=[100.0, 200.0]):
+                for batch in (((1, 2),), ((3, 4), (5, 6))):
+                    for key in batch:
+                        first.lookup(key, self.compute(key))
+                    self.assertEqual(first.flush(), len(batch))
+
+            second = self.cache(maxsize=2, decode=tuple)  # الأحدث استخدامًا فقط يتسع
+            self.assertEqual(second.disk_loaded, 2)
+            self.assertEqual(set(second.data), {(3, 4), (5, 6)})  # (1, 2) الأقدم على القرص لا يُحمَّل
+            self.assertEqual(second.lookup((5, 6), self.compute((5, 6))), (5, 6))  # decode=tuple
+            self.assertEqual(second.stats()["hits"], 1)
+
+            stale = self.cache(version="v2", maxsize=10)  # مصدر تغيّر: مساحة أسماء أخرى
+            self.assertEqual(stale.disk_loaded, 0)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_decorator_rounds_coordinates_before_computing(self):
+        seen = []
+
+        @geo_cached("test.rounding", precision=2)
+        def where(lat, lon):
+            seen.append((lat, lon))
+            return lat > 22
+
+        self.addCleanup(geocache._registry.pop, "test.rounding")
+        with override_settings(GEO_CACHE_PATH=""):
+            self.assertTrue(where(23.004, 57.0))
+            self.assertTrue(where(23.0049, 57.001))
+        self.assertEqual(seen, [(23.0, 57.0)])
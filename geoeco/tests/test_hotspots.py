@@ -0,0 +1,82 @@
+# geoeco/tests/test_hotspots.py
+import threading
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from geoeco.geo.oman_hotspots import HOTSPOT_POLYGONS
+from geoeco.models import HotspotMembership, Mineral, Site
+from geoeco.services.hotspots import hotspot_overview, refresh_sites_hotspots, schedule_stats_refresh
+
+KEY, HOTSPOT = next(iter(HOTSPOT_POLYGONS.items()))
+LAT = sum(p[0] for p in HOTSPOT["poly"]) / len(HOTSPOT["poly"])
+LON = sum(p[1] for p in HOTSPOT["poly"]) / len(HOTSPOT["poly"])
+
+
+class SiteHotspotSignalTests(TransactionTestCase):
+    # خارج أي معاملة: المجاميع تُعاد فور الحفظ (schedule_stats_refresh)
+
+    def setUp(self):
+        self.site = Site.objects.create(name="S", mineral=Mineral.objects.create(name="Copper"),
+                                        lat=LAT, lon=LON, sustainability_band="green")
+
+    def by_band(self):
+        return hotspot_overview([KEY])[0]["by_band"]
+
+    def test_save_syncs_membership_and_stats(self):
+        self.assertTrue(HotspotMembership.objects.filter(site=self.site, hotspot=KEY).exists())
+        self.assertEqual(self.by_band()["green"], 1)
+
+    def test_band_only_save_defers_stats_to_caller(self):
+        self.site.sustainability_band = "red"
+        with self.assertNumQueries(2):  # UPDATE الموقع + عدّاد السجل، لا انتماء ولا مجاميع
+            self.site.save(update_fields=["sustainability_band"])
+        self.assertEqual(self.by_band()["green"], 1)
+        refresh_sites_hotspots([self.site.id])
+        self.assertEqual((self.by_band()["green"], self.by_band()["red"]), (0, 1))
+
+    def test_coordinate_update_moves_membership(self):
+        self.site.lat, self.site.lon = 17.0, 54.0
+        self.site.save(update_fields=["lat", "lon"])
+        self.assertFalse(HotspotMembership.objects.filter(site=self.site, hotspot=KEY).exists())
+        self.assertEqual(self.by_band()["green"], 0)
+
+
+@mock.patch("geoeco.services.hotspots.refresh_hotspot_stats")
+class ScheduleStatsRefreshTests(TransactionTestCase):
+    # المضلعات المنتظرة خاصة بكل معاملة: لا تُفرَّغ بمعاملة غيرها ولا تبقى بعد الإلغاء
+
+    def refreshed(self, refresh):
+        return [set(c.args[0]) for c in refresh.call_args_list]
+
+    def test_concurrent_transactions_refresh_their_own_keys(self, refresh):
+        scheduled, committed = threading.Event(), threading.Event()
+
+        def other():
+            try:
+                with transaction.atomic():
+                    schedule_stats_refresh(["A"])
+                    scheduled.set()
+                    committed.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        scheduled.wait(5)
+        with transaction.atomic():
+            schedule_stats_refresh(["B"])
+        self.assertEqual(self.refreshed(refresh), [{"B"}])
+        committed.set()
+        thread.join(5)
+        self.assertEqual(self.refreshed(refresh), [{"B"}, {"A"}])
+
+    def test_rolled_back_keys_are_dropped(self, refresh):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            schedule_stats_refresh(["A"])
+            raise RuntimeError
+        with transaction.atomic():
+            schedule_stats_refresh(["B"])
+            schedule_stats_refresh(["C"])
+        self.assertEqual(self.refreshed(refresh), [{"B", "C"}])
@@ -0,0 +1,60 @@
+# geoeco/tests/test_profiling.py
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from geoeco.services.profiling import CommandProfiler, phase_name
+
+REPORT_KEYS = {"command", "started_at", "status", "error", "wall_s", "cpu_s", "peak_memory_bytes",
+               "max_rss_bytes", "sql_queries", "sql_time_s", "sample_interval_s", "samples", "phases",
+               "top_functions", "files"}
+PHASE_KEYS = {"name", "start_s", "wall_s", "cpu_s", "sql_queries", "sql_time_s", "samples", "peak_memory_bytes"}
+
+
+class ProfileReportTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def test_phase_name(self):
+        self.assertEqual(phase_name("Creating sites…"), "Creating sites")
+        self.assertEqual(phase_name("  Loading readings...\n"), "Loading readings")
+        self.assertIsNone(phase_name("Done ✅"))
+        self.assertIsNone(phase_name("…"))
+
+    def test_command_profile_writes_report_and_files(self):
+        out = io.StringIO()
+        call_command("rebuild_cube", profile=self.dir, stdout=out)
+        self.assertIn("Profile written to", out.getvalue())
+        (path,) = [os.path.join(self.dir, f) for f in os.listdir(self.dir) if f.endswith(".json")]
+        with open(path, encoding="utf-8") as fh:
+            report = json.load(fh)
+        self.assertEqual(set(report), REPORT_KEYS)
+        self.assertEqual((report["command"], report["status"], report["error"]), ("rebuild_cube", "ok", None))
+        self.assertEqual([p["name"] for p in report["phases"]], ["rebuild_cube", "Rebuilding reporting cube"])
+        for p in report["phases"]:
+            self.assertEqual(set(p), PHASE_KEYS)
+        self.assertEqual(report["sql_queries"], sum(p["sql_queries"] for p in report["phases"]))
+        self.assertGreater(report["phases"][-1]["sql_queries"], 0)
+        for kind, file in report["files"].items():
+            self.assertTrue(file.endswith("." + kind) and os.path.exists(file), file)
+
+    def test_explicit_phases_and_errors(self):
+        profiler = CommandProfiler("job", memory=False)
+        with self.assertRaises(ValueError):
+            with profiler:
+                profiler.phase("query")
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                raise ValueError("boom")
+        report, paths = profiler.write(self.dir)
+        self.assertEqual((report["status"], report["error"]), ("error", "ValueError: boom"))
+        self.assertIsNone(report["peak_memory_bytes"])
+        self.assertEqual([(p["name"], p["sql_queries"]) for p in report["phases"]], [("job", 0), ("query", 1)])
+        self.assertEqual(set(paths), {"json", "pstats", "collapsed"})
@@ -0,0 +1,77 @@
+# geoeco/tests/test_recompute.py
+import datetime
+
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from geoeco.models import EnvironmentalMetric, ForecastEnvironment, Mineral, Site, SiteRecomputeQueue
+from geoeco.services.recompute import claim_ready_sites, drain_queue, recalc_all_bands
+from geoeco.services.site_registry import registry_version
+
+TODAY = datetime.date.today()
+
+
+class RecalcAllBandsTests(TransactionTestCase):
+    def setUp(self):
+        mineral = Mineral.objects.create(name="Copper")
+        self.good, self.bad, self.silent = (
+            Site.objects.create(name=n, mineral=mineral, lat=23.5, lon=57.0, status="active") for n in "GBS")
+        EnvironmentalMetric.objects.create(site=self.good, date=TODAY, air_quality_index=30, water_tds=300,
+                                           rehabilitation_progress=90)
+        EnvironmentalMetric.objects.create(site=self.bad, date=TODAY, air_quality_index=150, water_tds=2000,
+                                           rehabilitation_progress=5)
+
+    def bands(self):
+        return dict(Site.objects.values_list("name", "sustainability_band"))
+
+    def test_bulk_updates_changed_bands_and_bumps_registry_once(self):
+        version = registry_version()
+        self.assertEqual(recalc_all_bands(chunk_size=1), 2)
+        self.assertEqual(self.bands(), {"G": "green", "B": "red", "S": "yellow"})
+        self.assertEqual(registry_version(), version + 1)
+        self.assertEqual(recalc_all_bands(), 0)
+        self.assertEqual(registry_version(), version + 1)
+
+
+class RecomputeQueueTests(TransactionTestCase):
+    def setUp(self):
+        mineral = Mineral.objects.create(name="Copper")
+        self.sites = [Site.objects.create(name=f"S{i}", mineral=mineral, lat=23.5, lon=57.0) for i in range(2)]
+
+    def add_readings(self, site, months):
+        for m in months:
+            EnvironmentalMetric.objects.create(site=site, date=datetime.date(TODAY.year - 1, m, 1),
+                                               air_quality_index=150, water_tds=2000, rehabilitation_progress=5)
+
+    def age(self, seconds, field="last_touched_at"):
+        SiteRecomputeQueue.objects.update(**{field: timezone.now() - datetime.timedelta(seconds=seconds)})
+
+    def test_writes_in_one_transaction_queue_each_site_once_with_oldest_date(self):
+        with transaction.atomic():
+            self.add_readings(self.sites[0], [5, 3, 9])
+            self.assertFalse(SiteRecomputeQueue.objects.exists())  # يُكتب عند اكتمال المعاملة
+        self.add_readings(self.sites[0], [1])
+        entry = SiteRecomputeQueue.objects.get()
+        self.assertEqual((entry.site_id, entry.env_since), (self.sites[0].id, datetime.date(TODAY.year - 1, 1, 1)))
+
+    def test_claim_waits_for_quiet_period_but_not_forever(self):
+        self.add_readings(self.sites[0], [1])
+        self.assertEqual(claim_ready_sites(debounce_seconds=5, max_wait_seconds=60), {})
+        self.age(10)
+        self.assertEqual(list(claim_ready_sites(debounce_seconds=5)), [self.sites[0].id])
+        self.assertFalse(SiteRecomputeQueue.objects.exists())
+
+        self.add_readings(self.sites[1], [1])
+        self.age(120, "first_queued_at")  # ما زال يُكتب باستمرار لكنه انتظر أكثر من max_wait
+        self.assertEqual(list(claim_ready_sites(debounce_seconds=5, max_wait_seconds=60)), [self.sites[1].id])
+
+    def test_drain_recomputes_queued_sites_and_empties_queue(self):
+        for site in self.sites:
+            self.add_readings(site, range(1, 13))
+        self.assertEqual(drain_queue(debounce_seconds=0, alerts=False), 2)
+        self.assertFalse(SiteRecomputeQueue.objects.exists())
+        self.assertEqual(set(ForecastEnvironment.objects.values_list("site_id", flat=True)),
+                         {s.id for s in self.sites})
+        self.assertEqual(set(Site.objects.values_list("sustainability_band", flat=True)), {"red"})
+        self.assertEqual(drain_queue(debounce_seconds=0), 0)
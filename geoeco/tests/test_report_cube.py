@@ -0,0 +1,39 @@
+# geoeco/tests/test_report_cube.py
+from django.test import TestCase
+
+from geoeco.geo.oman_targets import DEFAULT_TARGETS_TONNES
+from geoeco.models import Mineral, ProductionMetric, Site
+from geoeco.services import report_cube
+from geoeco.services.report_cube import cube_query, refresh_cube
+
+
+class CubeVersionTests(TestCase):
+    def setUp(self):
+        report_cube._cache.update(version=None, cells=[])
+        self.mineral = next(iter(DEFAULT_TARGETS_TONNES))
+        m = Mineral.objects.create(name=self.mineral)
+        self.a, self.b = (Site.objects.create(name=n, mineral=m, lat=23.5, lon=57.0, governorate="Muscat",
+                                              sustainability_band="green") for n in "AB")
+        ProductionMetric.objects.bulk_create(
+            ProductionMetric(site=s, year=2023, quantity=q) for s, q in ((self.a, 1000), (self.b, 3000)))
+        refresh_cube()
+
+    def bands(self):
+        return {r["band"]: r["production_total"] for r in cube_query(["band"])}
+
+    def test_unchanged_table_is_served_from_memory(self):
+        self.assertEqual(self.bands(), {"green": 4000})
+        with self.assertNumQueries(1):  # فحص الإصدار فقط
+            self.assertEqual(self.bands(), {"green": 4000})
+
+    def test_partial_refresh_changes_version_and_reloads(self):
+        self.assertEqual(self.bands(), {"green": 4000})
+        Site.objects.filter(pk=self.b.pk).update(sustainability_band="red")
+        self.assertEqual(self.bands(), {"green": 4000})  # الجدول لم يتغيّر بعد
+        refresh_cube([self.b.id])
+        self.assertEqual(self.bands(), {"green": 1000, "red": 3000})
+
+    def test_target_ratio_for_single_year(self):
+        [row] = cube_query(["mineral"], {"year": [2023]})
+        target = float(DEFAULT_TARGETS_TONNES[self.mineral])
+        self.assertEqual((row["target"], row["target_ratio"]), (target, round(4000 / target, 4)))
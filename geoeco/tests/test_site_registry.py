@@ -0,0 +1,51 @@
+# geoeco/tests/test_site_registry.py
+from django.db import transaction
+from django.db.models import F
+from django.test import TransactionTestCase
+
+from geoeco.models import ChangeCounter, Mineral, Site
+from geoeco.services import site_registry
+from geoeco.services.site_registry import COUNTER, bump_registry_version, get_registry, registry_version
+
+
+class RegistryInvalidationTests(TransactionTestCase):
+    def setUp(self):
+        site_registry._cache.update(registry=None, checked_at=0.0)
+        self.mineral = Mineral.objects.create(name="Copper")
+        self.site = Site.objects.create(name="A", mineral=self.mineral, lat=23.5, lon=57.0)
+
+    def names(self):
+        reg = get_registry()
+        return [(r["name"], r["mineral__name"]) for r in reg.rows(range(len(reg)))]
+
+    def test_saves_and_deletes_reload_the_snapshot(self):
+        self.assertEqual(self.names(), [("A", "Copper")])
+        self.mineral.name = "Gold"
+        self.mineral.save()
+        self.assertEqual(self.names(), [("A", "Gold")])
+        Site.objects.create(name="B", mineral=self.mineral, lat=23.6, lon=57.1)
+        self.site.delete()
+        self.assertEqual(self.names(), [("B", "Gold")])
+
+    def test_raw_updates_need_an_explicit_bump(self):
+        get_registry()
+        Site.objects.filter(pk=self.site.pk).update(name="A2")  # بلا إشارات
+        site_registry._cache["checked_at"] = 0.0
+        self.assertEqual(self.names(), [("A", "Copper")])
+        bump_registry_version()
+        self.assertEqual(self.names(), [("A2", "Copper")])
+
+    def test_other_process_changes_are_seen_after_check_interval(self):
+        reg = get_registry()
+        ChangeCounter.objects.filter(name=COUNTER).update(value=F("value") + 1)  # عملية أخرى
+        self.assertIs(get_registry(), reg)
+        site_registry._cache["checked_at"] = 0.0  # مرّت CHECK_SECONDS
+        self.assertEqual(get_registry().version, reg.version + 1)
+
+    def test_transaction_bumps_once_on_commit(self):
+        version = registry_version()
+        with transaction.atomic():
+            for i in range(3):
+                Site.objects.create(name=f"T{i}", lat=23.5, lon=57.0)
+            self.assertEqual(registry_version(), version)
+        self.assertEqual(registry_version(), version + 1)
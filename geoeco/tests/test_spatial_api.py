@@ -0,0 +1,37 @@
+# geoeco/tests/test_spatial_api.py
+from django.test import TestCase
+
+from geoeco.models import Mineral, Site
+
+
+class SpatialParamsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mineral = Mineral.objects.create(name="Copper")
+        for i in range(5):
+            Site.objects.create(name=f"S{i}", mineral=mineral, lat=23.5 + i / 10, lon=57.0)
+
+    def test_nearest(self):
+        r = self.client.get("/api/sites/nearest/", {"lat": 23.5, "lon": 57, "k": 3})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()["sites"]), 3)
+
+    def test_rejects_non_finite_and_out_of_range(self):
+        cases = [
+            ("/api/sites/nearest/", {"lat": "nan", "lon": 57, "k": 3}),
+            ("/api/sites/nearest/", {"lat": "inf", "lon": 57}),
+            ("/api/sites/nearest/", {"lat": 91, "lon": 57}),
+            ("/api/sites/radius/", {"lat": 23.5, "lon": 57, "km": "inf"}),
+            ("/api/sites/radius/", {"lat": 23.5, "lon": "-Infinity", "km": 10}),
+            ("/api/sites/radius/", {"lat": 23.5, "lon": 57, "km": 10, "limit": -1}),
+            ("/api/sites/polygon/", {"poly": "23,56;nan,58;24,58"}),
+            ("/api/sites/polygon/", {"hotspot": "", "poly": "23,56;24,57;24,58", "limit": -1}),
+        ]
+        for url, params in cases:
+            with self.subTest(url=url, params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+    def test_limit_zero_returns_count_only(self):
+        r = self.client.get("/api/sites/radius/", {"lat": 23.5, "lon": 57, "km": 100, "limit": 0})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual((r.json()["count"], r.json()["sites"]), (5, []))
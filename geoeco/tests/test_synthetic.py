@@ -0,0 +1,49 @@
+# geoeco/tests/test_synthetic.py
+import datetime
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from geoeco.services.synthetic import OMAN_ENV_SPEC, build_tasks, run_shards, shard_bounds
+
+SITES = 50
+COMMON = {"years_n": 4, "current_year": 2024, "monthly_n": 12,
+          "start_ordinal": datetime.date(2023, 1, 1).toordinal()}
+
+
+class ShardDeterminismTests(SimpleTestCase):
+    def generate(self, seed, workers, processes):
+        with tempfile.TemporaryDirectory() as out:
+            tasks = build_tasks(seed, workers, np.arange(1, SITES + 1), np.full(SITES, 1000.0),
+                                np.full(SITES, 60.0), np.full(SITES, 700.0), np.full(SITES, 40.0), out, **COMMON)
+            paths = run_shards(tasks, processes)
+            shards = [dict(np.load(p)) for p in paths]
+        return {k: np.concatenate([s[k] for s in shards]) for k in shards[0]}
+
+    def assertSameSeries(self, a, b):
+        self.assertEqual(a.keys(), b.keys())
+        for k in a:
+            np.testing.assert_array_equal(a[k], b[k], err_msg=k)
+
+    def test_same_seed_and_workers_is_bit_identical_in_or_out_of_process(self):
+        self.assertSameSeries(self.generate(42, 3, 1), self.generate(42, 3, 1))
+        self.assertSameSeries(self.generate(42, 2, 1), self.generate(42, 2, 2))
+
+    def test_seed_changes_output(self):
+        a, b = self.generate(1, 2, 1), self.generate(2, 2, 1)
+        self.assertFalse(np.array_equal(a["env_aqi"], b["env_aqi"]))
+
+    def test_shapes_and_clipping(self):
+        s = self.generate(7, 4, 1)
+        self.assertEqual(len(s["prod_qty"]), SITES * COMMON["years_n"])
+        self.assertEqual(len(s["env_date"]), SITES * COMMON["monthly_n"])
+        np.testing.assert_array_equal(s["env_site"], np.repeat(np.arange(1, SITES + 1), COMMON["monthly_n"]))
+        for name, (_, low, high) in OMAN_ENV_SPEC.items():
+            self.assertTrue(((s[f"env_{name}"] >= low) & (s[f"env_{name}"] <= high)).all(), name)
+
+    def test_shard_bounds_cover_range(self):
+        bounds = shard_bounds(10, 3)
+        self.assertEqual((bounds[0][0], bounds[-1][1]), (0, 10))
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(bounds, bounds[1:])))
+        self.assertEqual(shard_bounds(5, 0), [(0, 5)])
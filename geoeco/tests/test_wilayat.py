@@ -0,0 +1,58 @@
+# geoeco/tests/test_wilayat.py
+import json
+import os
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from geoeco.geo import wilayat
+from geoeco.geo.oman_admin import assign_wilaya_from_point
+from geoeco.geo.wilayat import WilayaIndex, assign_many, wilaya_index
+
+
+def _square(lat, lon, size):
+    ring = [(lon, lat), (lon + size, lat), (lon + size, lat + size), (lon, lat + size), (lon, lat)]
+    return {"type": "Polygon", "coordinates": [[list(p) for p in ring]]}
+
+
+FEATURES = [
+    {"type": "Feature", "properties": {"NAME_1": "Ad Dakhiliyah", "NAME_2": "Nizwa"}, "geometry": _square(22.8, 57.4, 0.4)},
+    # يمتد على عدة خلايا شبكة، ومجاور للأول
+    {"type": "Feature", "properties": {"governorate": "Ad Dakhiliyah", "wilaya": "Bahla"},
+     "geometry": _square(22.8, 56.6, 0.8)},
+]
+
+
+class WilayaIndexTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "wilayat.geojson")
+        with open(self.path, "w", encoding="utf-8") as fh:
+            json.dump({"type": "FeatureCollection", "features": FEATURES}, fh)
+        wilayat._cache.update(index=None, path=None)
+        self.addCleanup(wilayat._cache.update, index=None, path=None)
+
+    def test_lookup_inside_polygons(self):
+        with override_settings(WILAYA_BOUNDARY_FILE=self.path):
+            index = wilaya_index()
+        self.assertIsInstance(index, WilayaIndex)
+        self.assertEqual(index.lookup(23.0, 57.6), ("Ad Dakhiliyah", "Nizwa"))
+        self.assertEqual(index.lookup(23.5, 57.3), ("Ad Dakhiliyah", "Bahla"))  # خلية بعيدة عن ركن الصندوق
+        self.assertIsNone(index.lookup(23.0, 57.9))
+        self.assertIsNone(index.lookup(17.0, 54.1))
+
+    def test_assign_many_falls_back_to_nearest_centroid(self):
+        points = [(23.0, 57.6), (17.02, 54.1), (23.6, 58.4)]
+        with override_settings(WILAYA_BOUNDARY_FILE=self.path):
+            labels, matched = assign_many(points)
+        self.assertEqual(matched, 1)
+        self.assertEqual(labels[0], ("Ad Dakhiliyah", "Nizwa"))
+        self.assertEqual(labels[1:], [assign_wilaya_from_point(*p) for p in points[1:]])
+
+    def test_without_file_every_point_uses_centroids(self):
+        points = [(23.0, 57.6), (17.02, 54.1)]
+        with override_settings(WILAYA_BOUNDARY_FILE=""):
+            self.assertIsNone(wilaya_index())
+            labels, matched = assign_many(points)
+        self.assertEqual((labels, matched), ([assign_wilaya_from_point(*p) for p in points], 0))
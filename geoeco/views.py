@@ -1,8 +1,26 @@
 
 from django.shortcuts import render, get_object_or_404
 from django.db.models import Sum, Avg
-from .models import Site, Company, Mineral, ProductionMetric, EnvironmentalMetric, Alert,ForecastProduction, ForecastEnvironment
-from django.http import JsonResponse, Http404
+from .models import Site, Company, Mineral, ProductionMetric, EnvironmentalMetric, Alert,ForecastRun, ForecastProduction, ForecastEnvironment, ForecastSelection
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, Http404
+import gzip
+import math
+from geoecotracker.db_router import read_replica
+from django.utils.dateparse import parse_date
+from django.core.cache import cache
+from .services.ai_forecast import (
+    forecast_cache_key, FORECAST_CACHE_TTL, FORECAST_INTERVAL_FIELDS, FORECAST_RUN_CACHE_KEY, FORECAST_RUN_CACHE_TTL,
+)
+from .services.env_rollups import arollup_series, SCOPES as ROLLUP_SCOPES, PERIODS as ROLLUP_PERIODS
+from .services.report_cube import acube_query, DIMENSIONS as CUBE_DIMENSIONS
+from .services.site_registry import EARTH_RADIUS_KM, get_registry
+from .services.spatial_index import get_spatial_index
+from .services.hotspots import hotspot_overview
+from .services.forecast_accuracy import accuracy_summary, DIMENSIONS as ACCURACY_DIMENSIONS
+from .services.downsample import site_chart_series, CHART_KINDS, METHODS as DOWNSAMPLE_METHODS
+from geoeco.geo.oman_hotspots import HOTSPOT_POLYGONS
+from geoeco.geo.boundaries import LAYER_SOURCES, get_layer
+from geoeco.geo.geocache import cache_stats
 def home(request):
     # Login/landing page (static for prototype)
     kpis = {
@@ -11,6 +29,7 @@ def home(request):
     }
     return render(request, "geoeco/home.html", {"kpis": kpis})
 
+@read_replica
 def dashboard(request):
     total_sites = Site.objects.count()
     green = Site.objects.filter(sustainability_band="green").count()
@@ -30,6 +49,9 @@ def dashboard(request):
 
     alerts = Alert.objects.order_by("-created_at")[:5]
 
+    # دقة التوقعات السابقة لكل هدف × نموذج (مجاميع ForecastAccuracy)
+    forecast_accuracy = accuracy_summary(("target", "model"))
+
     return render(
         request,
         "geoeco/dashboard.html",
@@ -42,19 +64,13 @@ def dashboard(request):
             "prod_by_mineral": list(prod_by_mineral),
             "company_scores": list(company_scores),
             "alerts": alerts,
+            "forecast_accuracy": forecast_accuracy,
         },
     )
 def map_view(request):
-    # أعِدّ بيانات نظيفة للواجهة
-    qs = (
-        Site.objects.select_related("mineral", "company")
-        .values(
-            "id", "name", "lat", "lon",
-            "sustainability_band", "status",
-            "mineral__name", "company__name"
-        )
-    )
-    sites_data = list(qs)
+    # أعِدّ بيانات نظيفة للواجهة (من نسخة السجل في الذاكرة، بلا ORM)
+    reg = get_registry()
+    sites_data = reg.rows(range(len(reg)))
     return render(request, "geoeco/map.html", {"sites_data": sites_data})
 
 from django.shortcuts import render, get_object_or_404
@@ -68,19 +84,7 @@ def site_detail(request, site_id):
     production_qs = site.production.order_by("year").values("year", "quantity")
     prod_data = list(production_qs)
 
-    # آخر 12 قراءة بيئية: حوّل التاريخ إلى نص ISO لتعمل مع JSON/Chart.js
-    env_qs = site.env.order_by("-date").values("date", "air_quality_index", "water_tds", "rehabilitation_progress")[:12]
-    env_data = [
-        {
-            "date": e["date"].isoformat(),
-            "air_quality_index": e["air_quality_index"],
-            "water_tds": e["water_tds"],
-            "rehabilitation_progress": e["rehabilitation_progress"],
-        }
-        for e in env_qs
-    ]
-    # اعرضها زمنياً من الأقدم إلى الأحدث
-    env_data = list(reversed(env_data))
+    # السلاسل البيئية تُجلب من api_site_chart (كل التاريخ، مقلّصة على الخادم)
 
     alerts = site.alerts.order_by("-created_at")[:10]
 
@@ -90,11 +94,11 @@ def site_detail(request, site_id):
         {
             "site": site,
             "prod_data": prod_data,
-            "env_data": env_data,
             "alerts": alerts,
         },
     )
 
+@read_replica
 def investors(request):
     # Simple list sorted by sustainability & last production
     latest_year = ProductionMetric.objects.order_by("-year").values_list("year", flat=True).first()
@@ -111,31 +115,311 @@ def search_view(request):
     band = request.GET.get("band","")
     mineral = request.GET.get("mineral","")
 
-    qs = Site.objects.all()
-    if q:
-        qs = qs.filter(name__icontains=q)
-    if status:
-        qs = qs.filter(status=status)
-    if band:
-        qs = qs.filter(sustainability_band=band)
-    if mineral:
-        qs = qs.filter(mineral__name__iexact=mineral)
+    reg = get_registry()
+    sites = reg.rows(reg.filter(q=q, status=status, band=band, mineral=mineral, limit=200))
 
     minerals = Mineral.objects.values_list("name", flat=True).order_by("name")
-    return render(request, "geoeco/search.html", {"sites": qs[:200], "q": q, "status": status, "band": band, "mineral": mineral, "minerals": minerals})
+    return render(request, "geoeco/search.html", {"sites": sites, "q": q, "status": status, "band": band, "mineral": mineral, "minerals": minerals})
+
+
+
+async def api_site_forecast(request, site_id):
+    # async ORM + كاش async: لا يُحجز عامل كامل أثناء انتظار قاعدة البيانات
+    # كل القراءات من الدفعة الحالية (ForecastRun.is_current): لقطة كاملة حتى أثناء تشغيل جديد
+    run_id = await cache.aget(FORECAST_RUN_CACHE_KEY)
+    if run_id is None:
+        run_id = await ForecastRun.objects.filter(is_current=True).values_list('id', flat=True).afirst()
+        await cache.aset(FORECAST_RUN_CACHE_KEY, run_id, FORECAST_RUN_CACHE_TTL)
+    key = forecast_cache_key(site_id, run_id)
+    payload = await cache.aget(key)
+    if payload is None:
+        s = await Site.objects.filter(pk=site_id).only('id').afirst()
+        if s is None:
+            raise Http404("Site not found")
+
+        # الفترات محسوبة ومخزّنة في دفعة التوقع: قراءة أعمدة فقط
+        prod = [r async for r in ForecastProduction.objects.filter(run_id=run_id, site_id=s.id).order_by('year')
+                .values('year', 'quantity', *FORECAST_INTERVAL_FIELDS["production"])]
+        env  = [r async for r in ForecastEnvironment.objects.filter(run_id=run_id, site_id=s.id).order_by('date')
+                .values('date','air_quality_index','water_tds','rehabilitation_progress',
+                        *FORECAST_INTERVAL_FIELDS["environment"])]
+        models = {r["target"]: r["model"] async for r in ForecastSelection.objects.filter(run_id=run_id, site_id=s.id)
+                  .values('target', 'model')}
+        payload = {"site": s.id, "run": run_id, "production": prod, "environment": env, "models": models}
+        await cache.aset(key, payload, FORECAST_CACHE_TTL)
+
+    return JsonResponse(payload, safe=False)
+
+def _date_param(request, name):
+    """تاريخ YYYY-MM-DD من GET أو None إن غاب؛ ValueError إن كان مشوّهًا."""
+    raw = request.GET.get(name)
+    if not raw:
+        return None
+    value = parse_date(raw)  # None للصيغة الخاطئة، ValueError للتاريخ المستحيل
+    if value is None:
+        raise ValueError(f"{name} غير صالح")
+    return value
+
+
+@read_replica
+async def api_env_rollups(request):
+    """
+    سلاسل بيئية مجمّعة مسبقًا للرسوم طويلة المدى.
+    ?scope=site|governorate|mineral&key=...&period=month|quarter&start=YYYY-MM-DD&end=YYYY-MM-DD
+    """
+    scope = request.GET.get("scope", "site")
+    key = request.GET.get("key", "").strip()
+    period = request.GET.get("period", "month")
+    if scope not in ROLLUP_SCOPES or period not in ROLLUP_PERIODS or not key:
+        return JsonResponse({"error": "scope/key/period غير صالحة"}, status=400)
+    try:
+        start, end = _date_param(request, "start"), _date_param(request, "end")
+    except ValueError:
+        return JsonResponse({"error": "تاريخ غير صالح"}, status=400)
+
+    series = await arollup_series(scope, key, period, start, end)
+    return JsonResponse({"scope": scope, "key": key, "period": period, **series})
+@read_replica
+async def api_report_cube(request):
+    """
+    مكعب التقارير الوطنية من الذاكرة.
+    ?by=governorate,mineral  (roll-up)  &year=2024&band=green,yellow&mineral=Copper  (slice/dice)
+    """
+    group_by = [d for d in request.GET.get("by", "mineral").split(",") if d]
+    bad = [d for d in group_by if d not in CUBE_DIMENSIONS]
+    if bad:
+        return JsonResponse({"error": f"أبعاد غير معروفة: {', '.join(bad)}"}, status=400)
+
+    filters = {}
+    for dim in CUBE_DIMENSIONS:
+        raw = request.GET.get(dim, "")
+        if not raw:
+            continue
+        vals = [v.strip() for v in raw.split(",") if v.strip()]
+        if dim == "year":
+            try:
+                vals = [int(v) for v in vals]
+            except ValueError:
+                return JsonResponse({"error": "year غير صالح"}, status=400)
+        filters[dim] = vals
+
+    rows = await acube_query(group_by, filters)
+    return JsonResponse({"by": group_by, "filters": filters, "rows": rows})
+
+
+CHART_POINTS = 500
+CHART_MAX_POINTS = 5000
+
+
+@read_replica
+def api_site_chart(request, site_id, kind):
+    """
+    سلاسل رسم موقع مقلّصة على الخادم (كل سلسلة ≤ points نقطة).
+    kind=env|production  ?points=500&method=lttb|minmax&start=YYYY-MM-DD&end=YYYY-MM-DD
+    """
+    if kind not in CHART_KINDS or not Site.objects.filter(pk=site_id).exists():
+        raise Http404("Unknown site or series")
+    method = request.GET.get("method", "lttb")
+    if method not in DOWNSAMPLE_METHODS:
+        return JsonResponse({"error": "method غير صالحة"}, status=400)
+    try:
+        points = min(max(int(request.GET.get("points", CHART_POINTS)), 3), CHART_MAX_POINTS)
+    except ValueError:
+        return JsonResponse({"error": "points غير صالح"}, status=400)
+    try:
+        start, end = _date_param(request, "start"), _date_param(request, "end")
+    except ValueError:
+        return JsonResponse({"error": "تاريخ غير صالح"}, status=400)
+
+    series = site_chart_series(site_id, kind, points, method, start, end)
+    return JsonResponse({
+        "site": site_id, "kind": kind, "method": method, "points": points,
+        "start": start.isoformat() if start else None, "end": end.isoformat() if end else None,
+        "series": series,
+    })
+
+
+@read_replica
+def api_forecast_accuracy(request):
+    """
+    دقة التوقعات السابقة مقابل القيم الفعلية.
+    ?by=model,mineral (target, model, mineral, governorate, site, run)  &target=aqi&run=12&mineral=Copper
+    """
+    group_by = [d for d in request.GET.get("by", "target,model").split(",") if d]
+    bad = [d for d in group_by if d not in ACCURACY_DIMENSIONS]
+    if bad:
+        return JsonResponse({"error": f"أبعاد غير معروفة: {', '.join(bad)}"}, status=400)
+    filters = {}
+    for dim in ACCURACY_DIMENSIONS:
+        vals = [v.strip() for v in request.GET.get(dim, "").split(",") if v.strip()]
+        if vals and dim in ("site", "run"):
+            try:
+                vals = [int(v) for v in vals]
+            except ValueError:
+                return JsonResponse({"error": f"{dim} غير صالح"}, status=400)
+        if vals:
+            filters[dim] = vals
+    return JsonResponse({"by": group_by, "filters": filters, "rows": accuracy_summary(group_by, filters)})
+
+
+# ======= بحث مكاني (فهرس شبكي فوق سجل المواقع، بلا استعلامات) =======
 
+SPATIAL_MAX_RESULTS = 1000
+# مدى كل معامل (float("nan")/"inf" تُرفض أيضًا)؛ km حتى نصف محيط الأرض
+SPATIAL_RANGES = {"lat": (-90.0, 90.0), "lon": (-180.0, 180.0), "km": (0.0, math.pi * EARTH_RADIUS_KM)}
 
 
-def api_site_forecast(request, site_id):
+def _spatial_value(name, raw):
+    v = float(raw)
+    lo, hi = SPATIAL_RANGES[name]
+    if not (math.isfinite(v) and lo <= v <= hi):
+        raise ValueError(f"{name} خارج المدى")
+    return v
+
+
+def _spatial_params(request, *names):
+    """قيم float من GET؛ ValueError إن غاب أحدها أو لم يكن رقمًا منتهيًا ضمن SPATIAL_RANGES."""
+    return [_spatial_value(n, request.GET[n]) for n in names]
+
+
+def _spatial_point(text):
+    """نقطة "lat,lon" -> (lat, lon) ضمن المدى؛ ValueError غير ذلك."""
+    lat, lon = text.split(",")
+    return _spatial_value("lat", lat), _spatial_value("lon", lon)
+
+
+def _spatial_limit(request):
+    """limit من GET (الافتراضي SPATIAL_MAX_RESULTS)؛ ValueError إن لم يكن عددًا غير سالب."""
+    limit = int(request.GET.get("limit", SPATIAL_MAX_RESULTS))
+    if limit < 0:
+        raise ValueError("limit سالب")
+    return limit
+
+
+def _spatial_mask(request, reg):
+    filters = {k: [v.strip() for v in request.GET.get(k, "").split(",") if v.strip()]
+               for k in ("mineral", "band", "status", "governorate")}
+    return reg.mask(**filters) if any(filters.values()) else None
+
+
+def _spatial_response(reg, hits, **extra):
+    limit = min(int(extra.pop("limit", SPATIAL_MAX_RESULTS)), SPATIAL_MAX_RESULTS)
+    sites = []
+    for i, dist in hits[:limit]:
+        row = reg.row(i)
+        if dist is not None:
+            row["distance_km"] = round(dist, 3)
+        sites.append(row)
+    return JsonResponse({**extra, "count": len(hits), "sites": sites})
+
+
+@read_replica
+def api_sites_radius(request):
+    """?lat=&lon=&km=  [&mineral=Copper&band=green,yellow&status=&governorate=&limit=]"""
+    try:
+        lat, lon, km = _spatial_params(request, "lat", "lon", "km")
+        limit = _spatial_limit(request)
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "lat/lon/km مطلوبة وأرقام ضمن المدى، limit عدد غير سالب"}, status=400)
+    if km <= 0:
+        return JsonResponse({"error": "km يجب أن يكون موجبًا"}, status=400)
+    index = get_spatial_index()
+    reg = index.registry
+    hits = index.radius(lat, lon, km, _spatial_mask(request, reg))
+    return _spatial_response(reg, hits, lat=lat, lon=lon, km=km, limit=limit)
+
+
+@read_replica
+def api_sites_nearest(request):
+    """?lat=&lon=&k=5  [&mineral=Copper&band=&status=&governorate=]"""
     try:
-        s = Site.objects.get(pk=site_id)
-    except Site.DoesNotExist:
-        raise Http404("Site not found")
+        lat, lon = _spatial_params(request, "lat", "lon")
+        k = int(request.GET.get("k", 5))
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "lat/lon مطلوبة وأرقام ضمن المدى، k عدد صحيح"}, status=400)
+    if not 0 < k <= SPATIAL_MAX_RESULTS:
+        return JsonResponse({"error": f"k بين 1 و {SPATIAL_MAX_RESULTS}"}, status=400)
+    index = get_spatial_index()
+    reg = index.registry
+    hits = index.nearest(lat, lon, k, _spatial_mask(request, reg))
+    return _spatial_response(reg, hits, lat=lat, lon=lon, k=k)
+
+
+@read_replica
+def api_sites_polygon(request):
+    """
+    ?hotspot=SEMAIL_OPHIOLITE  أو  ?poly=lat,lon;lat,lon;lat,lon  [&mineral=&band=&status=&limit=]
+    """
+    key = request.GET.get("hotspot", "").strip()
+    if key:
+        if key not in HOTSPOT_POLYGONS:
+            return JsonResponse({"error": f"hotspot غير معروف: {key}"}, status=400)
+        poly = HOTSPOT_POLYGONS[key]["poly"]
+    else:
+        try:
+            poly = [_spatial_point(p) for p in request.GET.get("poly", "").split(";") if p]
+        except ValueError:
+            poly = []
+        if len(poly) < 3:
+            return JsonResponse({"error": "poly: ثلاث نقاط lat,lon على الأقل مفصولة بـ ;"}, status=400)
+    try:
+        limit = _spatial_limit(request)
+    except ValueError:
+        return JsonResponse({"error": "limit غير صالح"}, status=400)
+    index = get_spatial_index()
+    reg = index.registry
+    idx = index.within_polygon(poly, _spatial_mask(request, reg))
+    hits = [(i, None) for i in sorted(idx.tolist())]  # السجل مرتب حسب id
+    return _spatial_response(reg, hits, hotspot=key or None, limit=limit)
+
+
+# ======= المضلعات (من الجداول المسبقة HotspotStat فقط) =======
 
-    prod = list(ForecastProduction.objects.filter(site=s).order_by('year')
-                .values('year','quantity'))
-    env  = list(ForecastEnvironment.objects.filter(site=s).order_by('date')
-                .values('date','air_quality_index','water_tds','rehabilitation_progress'))
+@read_replica
+def hotspots_view(request):
+    rows = hotspot_overview()
+    for r in rows:
+        r["by_mineral_sorted"] = sorted(r["by_mineral"].items(), key=lambda kv: -kv[1])
+    return render(request, "geoeco/hotspots.html", {"rows": rows})
+
+
+@read_replica
+def api_hotspots(request):
+    """?hotspot=SEMAIL_OPHIOLITE,IBRA_CHROMITE (اختياري؛ الافتراضي الكل)"""
+    keys = [k.strip() for k in request.GET.get("hotspot", "").split(",") if k.strip()] or None
+    bad = [k for k in keys or () if k not in HOTSPOT_POLYGONS]
+    if bad:
+        return JsonResponse({"error": f"hotspot غير معروف: {', '.join(bad)}"}, status=400)
+    return JsonResponse({"hotspots": hotspot_overview(keys)})
+
+
+# ======= طبقات الحدود (GeoJSON مبسط لكل مستوى تكبير، مضغوط مسبقًا) =======
+
+def geo_layer(request, layer):
+    """?zoom=4..12 (الأقرب)؛ gzip كما هو إن قبله العميل، وETag للتخزين المؤقت."""
+    if layer not in LAYER_SOURCES:
+        raise Http404("Unknown layer")
+    try:
+        zoom = int(request.GET.get("zoom", 6))
+    except ValueError:
+        return JsonResponse({"error": "zoom غير صالح"}, status=400)
+    lyr = get_layer(layer)
+    zoom = lyr.nearest_zoom(zoom)
+    etag = lyr.etags[zoom]
+    if request.headers.get("If-None-Match") == etag:
+        return HttpResponseNotModified()
+    body = lyr.gzipped(zoom)
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = HttpResponse(body, content_type="application/geo+json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(gzip.decompress(body), content_type="application/geo+json")
+    response["ETag"] = etag
+    response["Vary"] = "Accept-Encoding"
+    response["Cache-Control"] = "public, max-age=86400"
+    return response
 
-    return JsonResponse({"site": s.id, "production": prod, "environment": env}, safe=False)
 
+def api_geo_cache(request):
+    """عدّادات ذاكرة دوال الجغرافيا في هذه العملية (hits/misses/evictions لكل دالة)."""
+    return JsonResponse({"caches": cache_stats()})
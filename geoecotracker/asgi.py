@@ -0,0 +1,8 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'geoecotracker.settings')
+# يُقرأ في settings: اتصالات قاعدة البيانات غير دائمة تحت ASGI
+os.environ.setdefault('GEOECO_ASGI', '1')
+
+application = get_asgi_application()
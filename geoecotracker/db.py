@@ -0,0 +1,89 @@
+# geoecotracker/db.py
+# طبقة إعداد قواعد البيانات: اتصالات دائمة مع فحص صحة، تجميع اختياري،
+# ونسخة قراءة (replica) اختيارية. كل شيء من متغيرات البيئة:
+#   DB_NAME/DB_USER/DB_PASSWORD/DB_HOST/DB_PORT  MySQL (كما في السابق)
+#   DATABASE_URL                                 غير ذلك (الافتراضي sqlite:///db.sqlite3)
+#   DB_CONN_MAX_AGE=60                           عمر الاتصال الدائم بالثواني (0 = اتصال لكل طلب)
+#   DB_POOL=pool|pgbouncer                       pool: مجمّع داخل العملية (Postgres/SQLite)
+#                                                pgbouncer: مجمّع خارجي بوضع transaction
+#   DB_POOL_SIZE=10
+#   DB_REPLICA_URL                               نسخة قراءة باسم "replica"
+#   GEOECO_ASGI=1                                (يضبطه asgi.py) اتصالات غير دائمة
+#   CACHE_URL                                    الكاش المشترك: redis://host:6379/0، أو locmem://
+#                                                (عملية واحدة فقط)؛ الافتراضي جدول CACHE_TABLE في القاعدة
+import os
+
+import dj_database_url
+
+CACHE_TABLE = "geoeco_cache"  # يُنشأ بالترحيل 0015 (createcachetable)
+
+POOLED_ENGINES = {
+    "django.db.backends.postgresql": "geoecotracker.db_backends.pooled_postgresql",
+    "django.db.backends.sqlite3": "geoecotracker.db_backends.pooled_sqlite3",
+}
+
+
+def _primary_from_env(env):
+    if env.get("DB_NAME"):
+        return {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': env.get('DB_NAME'),
+            'USER': env.get('DB_USER', 'root'),
+            'PASSWORD': env.get('DB_PASSWORD', ''),
+            'HOST': env.get('DB_HOST', '127.0.0.1'),
+            'PORT': env.get('DB_PORT', '3306'),
+            'OPTIONS': {
+                # Ensure MariaDB >= 10.5 for Django 5+ compatibility.
+                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+                # LOAD DATA LOCAL INFILE في التحميل الجماعي (geoeco/services/bulk_load.py)
+                'local_infile': 1,
+            },
+        }
+    url = env.get("DATABASE_URL", "sqlite:///db.sqlite3")
+    return dj_database_url.parse(url)
+
+
+def _tune(db, env):
+    db["CONN_MAX_AGE"] = int(env.get("DB_CONN_MAX_AGE", "60"))
+    db["CONN_HEALTH_CHECKS"] = True  # يُفحص الاتصال الدائم مرة في بداية كل طلب
+
+    pool = env.get("DB_POOL", "")
+    if pool == "pool" and db["ENGINE"] in POOLED_ENGINES:
+        db["ENGINE"] = POOLED_ENGINES[db["ENGINE"]]
+        db["POOL"] = {"max_size": int(env.get("DB_POOL_SIZE", "10"))}
+    elif pool == "pgbouncer":
+        # وضع transaction في pgbouncer لا يدعم المؤشرات من جهة الخادم
+        db["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+    # ASGI: استعلامات الـ async ORM تُنفَّذ في خيوط sync_to_async، والاتصال الدائم هناك
+    # لا يُغلق بشكل موثوق بين الطلبات؛ لذا يُفتح ويُغلق لكل طلب (ويعيد المجمّع استخدامه).
+    if env.get("GEOECO_ASGI") == "1":
+        db["CONN_MAX_AGE"] = 0
+    return db
+
+
+def database_config(env=None):
+    """قاموس DATABASES جاهز لـ settings."""
+    env = os.environ if env is None else env
+    databases = {"default": _tune(_primary_from_env(env), env)}
+    if env.get("DB_REPLICA_URL"):
+        replica = _tune(dj_database_url.parse(env["DB_REPLICA_URL"]), env)
+        replica["TEST"] = {"MIRROR": "default"}
+        databases["replica"] = replica
+    return databases
+
+
+def cache_config(env=None):
+    """
+    قاموس CACHES. الكاش مشترك بين العمليات: عامل إعادة الحساب يحذف مفاتيح التوقع بعد الكتابة
+    وعمّال الويب يجب أن يروا الحذف فورًا، فلا LocMemCache إلا صراحةً (locmem://).
+    """
+    env = os.environ if env is None else env
+    url = env.get("CACHE_URL", "")
+    if url.startswith(("redis://", "rediss://")):
+        default = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": url}
+    elif url.startswith("locmem://"):
+        default = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    else:
+        default = {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": CACHE_TABLE}
+    return {"default": default}
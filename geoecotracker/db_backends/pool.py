@@ -0,0 +1,84 @@
+# geoecotracker/db_backends/pool.py
+# تجميع اتصالات داخل العملية: close() يعيد الاتصال الفعلي إلى طابور مشترك بدل
+# إغلاقه، وconnect() يأخذ منه أولًا. مفيد تحت ASGI (CONN_MAX_AGE=0) ومع تبدّل الخيوط.
+import queue
+import threading
+
+
+class ConnectionPoolMixin:
+    """
+    يُمزج قبل DatabaseWrapper الخاص بالمحرك. الإعداد من settings_dict["POOL"]:
+    {"max_size": 10}. الاتصال المعاد استخدامه يُفحص بـ SELECT 1 قبل تسليمه.
+    """
+    _pools = {}
+    _pools_lock = threading.Lock()
+    # عدّادات العملية كلها (كل الخيوط والاتصالات)؛ تُعدَّل وتُقرأ تحت _stats_lock فقط
+    _pool_stats = {"created": 0, "reused": 0, "returned": 0, "discarded": 0}
+    _stats_lock = threading.Lock()
+
+    @classmethod
+    def pool_counters(cls):
+        """نسخة متسقة من عدّادات الطابور."""
+        with cls._stats_lock:
+            return dict(cls._pool_stats)
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._pool_stats[key] += 1
+
+    def _pool(self):
+        key = (self.alias, self.settings_dict.get("NAME"))
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._pools_lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    size = int((self.settings_dict.get("POOL") or {}).get("max_size", 10))
+                    pool = self._pools[key] = queue.LifoQueue(maxsize=size)
+        return pool
+
+    @staticmethod
+    def _pooled_is_usable(conn):
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            return True
+        except Exception:
+            return False
+
+    def get_new_connection(self, conn_params):
+        pool = self._pool()
+        while True:
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                break
+            if self._pooled_is_usable(conn):
+                self._count("reused")
+                return conn
+            self._count("discarded")
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._count("created")
+        return super().get_new_connection(conn_params)
+
+    def _close(self):
+        conn = self.connection
+        if conn is None:
+            return
+        # اتصال في حالة غير معروفة (خطأ أو داخل معاملة) لا يعود للطابور
+        if self.errors_occurred or self.in_atomic_block:
+            self._count("discarded")
+            return super()._close()
+        try:
+            conn.rollback()  # لا معاملة معلّقة لمستخدم الاتصال التالي
+            self._pool().put_nowait(conn)
+            self._count("returned")
+        except queue.Full:
+            return super()._close()
+        except Exception:
+            self._count("discarded")
+            return super()._close()
@@ -0,0 +1,7 @@
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+
+from geoecotracker.db_backends.pool import ConnectionPoolMixin
+
+
+class DatabaseWrapper(ConnectionPoolMixin, PostgresDatabaseWrapper):
+    pass
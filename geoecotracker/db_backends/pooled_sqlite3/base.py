@@ -0,0 +1,8 @@
+# بديل محلي لـ pgbouncer/مجمّع Postgres: نفس آلية التجميع فوق SQLite للتطوير والاختبار.
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from geoecotracker.db_backends.pool import ConnectionPoolMixin
+
+
+class DatabaseWrapper(ConnectionPoolMixin, SQLiteDatabaseWrapper):
+    pass
@@ -0,0 +1,147 @@
+# geoecotracker/db_router.py
+# توجيه قراءات العروض التحليلية إلى نسخة القراءة "replica" (إن وُجدت)،
+# وكل الكتابات وبقية القراءات إلى "default".
+#   - @read_replica على العرض: قراءاته تذهب إلى replica.
+#   - read-your-writes: بعد أي كتابة (أو طلب غير آمن كـ POST) يُثبَّت العميل على
+#     الأساسي لمدة REPLICA_STICKY_SECONDS عبر كوكي، وكذلك بقية الطلب نفسه.
+#   - إن تعذّر الاتصال بـ replica، أو فشل استعلام عليها أثناء العرض (فيُعاد العرض على الأساسية)،
+#     تُستخدم الأساسية ويُعاد المحاولة بعد REPLICA_RETRY_SECONDS.
+#   - جدول الكاش (DatabaseCache) على الأساسية دائمًا ولا تثبّت كتاباته العميل: ملء الكاش في GET
+#     ليس كتابة يجب أن يقرأها العميل بعدها.
+import functools
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = "replica"
+PIN_COOKIE = "geoeco_pin_primary"
+CACHE_APP_LABEL = "django_cache"  # app_label لنموذج DatabaseCache
+
+_use_replica = ContextVar("geoeco_use_replica", default=False)
+_pinned = ContextVar("geoeco_pinned_primary", default=False)
+# قائمة قابلة للتعديل لكل طلب: تُعلَّم عند أول كتابة
+_request_writes = ContextVar("geoeco_request_writes", default=None)
+
+_replica_down_until = 0.0
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_available():
+    """هل replica قابلة للاستخدام الآن؟ (فشل الاتصال يعطّلها مؤقتًا)"""
+    if not replica_configured() or time.monotonic() < _replica_down_until:
+        return False
+    try:
+        connections[REPLICA_ALIAS].ensure_connection()  # لا شيء إن كان الاتصال قائمًا
+        return True
+    except DatabaseError:
+        _mark_replica_down()
+        return False
+
+
+def _mark_replica_down():
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + getattr(settings, "REPLICA_RETRY_SECONDS", 30)
+    logger.warning("Read replica unavailable; falling back to primary")
+
+
+def _replica_failed():
+    """بعد OperationalError في عرض @read_replica: هل فشل اتصال replica؟ (يعطّلها مؤقتًا)"""
+    if not replica_configured() or not connections[REPLICA_ALIAS].errors_occurred:
+        return False
+    _mark_replica_down()  # الاتصال المعطوب يُغلق في نهاية الطلب (close_if_unusable_or_obsolete)
+    return True
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return "default"
+        if _use_replica.get() and not _pinned.get() and replica_available():
+            return REPLICA_ALIAS
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return "default"
+        writes = _request_writes.get()
+        if writes is not None and not writes:
+            writes.append(True)
+        _pinned.set(True)  # ما تبقى من السياق يقرأ ما كتبه
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # نفس البيانات على الطرفين
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+def read_replica(view):
+    """
+    مزخرف عرض للقراءة فقط: استعلاماته تُقرأ من replica (sync أو async).
+    إن فشل استعلام على replica بـ OperationalError يُعاد العرض مرة واحدة على الأساسية.
+    """
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            token = _use_replica.set(True)
+            try:
+                return await view(request, *args, **kwargs)
+            except OperationalError:
+                if not await sync_to_async(_replica_failed)():
+                    raise
+            finally:
+                _use_replica.reset(token)
+            return await view(request, *args, **kwargs)
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = _use_replica.set(True)
+            try:
+                return view(request, *args, **kwargs)
+            except OperationalError:
+                if not _replica_failed():
+                    raise
+            finally:
+                _use_replica.reset(token)
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _begin(request):
+    pinned = request.COOKIES.get(PIN_COOKIE) == "1"
+    return _pinned.set(pinned), _request_writes.set([])
+
+
+def _finish(request, response, tokens):
+    wrote = bool(_request_writes.get())
+    _pinned.reset(tokens[0])
+    _request_writes.reset(tokens[1])
+    if wrote or request.method not in ("GET", "HEAD", "OPTIONS"):
+        response.set_cookie(PIN_COOKIE, "1", max_age=getattr(settings, "REPLICA_STICKY_SECONDS", 10),
+                            httponly=True, samesite="Lax")
+    return response
+
+
+@sync_and_async_middleware
+def primary_pinning_middleware(get_response):
+    """read-your-writes: يثبّت العميل على الأساسية بعد الكتابة."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            tokens = _begin(request)
+            return _finish(request, await get_response(request), tokens)
+    else:
+        def middleware(request):
+            tokens = _begin(request)
+            return _finish(request, get_response(request), tokens)
+    return middleware
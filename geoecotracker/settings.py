@@ -1,7 +1,7 @@
 
 import os
 from pathlib import Path
-import dj_database_url
+from geoecotracker.db import cache_config, database_config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -31,6 +31,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "geoecotracker.db_router.primary_pinning_middleware",
 ]
 
 
@@ -54,27 +55,35 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'geoecotracker.wsgi.application'
-
-# Database: MySQL (MariaDB 10.5+). Falls back to SQLite if env vars not set.
-if os.getenv("DB_NAME"):
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.mysql',
-            'NAME': os.getenv('DB_NAME'),
-            'USER': os.getenv('DB_USER', 'root'),
-            'PASSWORD': os.getenv('DB_PASSWORD', ''),
-            'HOST': os.getenv('DB_HOST', '127.0.0.1'),
-            'PORT': os.getenv('DB_PORT', '3306'),
-            'OPTIONS': {
-                # Ensure MariaDB >= 10.5 for Django 5+ compatibility.
-                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-            },
-        }
-    }
-else:
-    DATABASES = {
-    'default': dj_database_url.config(default='sqlite:///db.sqlite3')
-}
+ASGI_APPLICATION = 'geoecotracker.asgi.application'
+
+# Database: MySQL (MariaDB 10.5+) عبر DB_*، أو DATABASE_URL، والافتراضي SQLite.
+# الاتصالات الدائمة/التجميع/نسخة القراءة: انظر geoecotracker/db.py
+DATABASES = database_config()
+DATABASE_ROUTERS = ['geoecotracker.db_router.PrimaryReplicaRouter']
+
+# كاش مشترك بين عمّال الويب وعامل إعادة الحساب (CACHE_URL، الافتراضي جدول في القاعدة)
+CACHES = cache_config()
+
+# العروض المزخرفة بـ @read_replica تقرأ من "replica" عند ضبط DB_REPLICA_URL
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))  # read-your-writes بعد الكتابة
+REPLICA_RETRY_SECONDS = 30  # مدة الرجوع للأساسية بعد فشل الاتصال بـ replica
+
+# تقسيم القراءات البيئية حسب السنة (geoeco/services/env_partitions.py)
+ENV_HOT_YEARS = int(os.getenv("ENV_HOT_YEARS", "2"))              # سنوات تقرؤها استعلامات التوقع والرسوم
+ENV_RETENTION_YEARS = int(os.getenv("ENV_RETENTION_YEARS", "5"))  # ما قبلها يُضغط في EnvArchive
+
+# حدود عمان عالية الدقة (GeoJSON محلي) للتحقق وطبقات /api/geo/؛ فارغ = المضلعات التقريبية المدمجة
+OMAN_BOUNDARY_FILE = os.getenv("OMAN_BOUNDARY_FILE", "")
+# مضلعات الولايات (خصائص governorate/wilaya أو NAME_1/NAME_2)؛ فارغ = أقرب مركز ولاية
+WILAYA_BOUNDARY_FILE = os.getenv("WILAYA_BOUNDARY_FILE", "")
+# نتائج دوال الجغرافيا النقطية (geoeco/geo/geocache.py): LRU بالذاكرة + ملف SQLite اختياري
+GEO_CACHE_SIZE = int(os.getenv("GEO_CACHE_SIZE", "100000"))  # إدخالات لكل دالة
+GEO_CACHE_PATH = os.getenv("GEO_CACHE_PATH", "")              # فارغ = الذاكرة فقط
+
+# اختيار نموذج التنبؤ بالاختبار الرجعي: "mase" أو "mape"
+FORECAST_SELECTION_METRIC = os.getenv("FORECAST_SELECTION_METRIC", "mase")
+FORECAST_KEEP_RUNS = int(os.getenv("FORECAST_KEEP_RUNS", "7"))  # دفعات توقع مكتملة تُحفظ للمقارنة
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
@@ -13,5 +13,16 @@ urlpatterns = [
     path('investors/', views.investors, name='investors'),
     path('search/', views.search_view, name='search'),
     path('forecast/site/<int:site_id>/', api_site_forecast, name='api_site_forecast'),
+    path('api/rollups/env/', views.api_env_rollups, name='api_env_rollups'),
+    path('api/cube/', views.api_report_cube, name='api_report_cube'),
+    path('api/forecast/accuracy/', views.api_forecast_accuracy, name='api_forecast_accuracy'),
+    path('api/sites/radius/', views.api_sites_radius, name='api_sites_radius'),
+    path('api/sites/nearest/', views.api_sites_nearest, name='api_sites_nearest'),
+    path('api/sites/polygon/', views.api_sites_polygon, name='api_sites_polygon'),
+    path('api/sites/<int:site_id>/chart/<slug:kind>/', views.api_site_chart, name='api_site_chart'),
+    path('hotspots/', views.hotspots_view, name='hotspots'),
+    path('api/hotspots/', views.api_hotspots, name='api_hotspots'),
+    path('api/geo/cache/', views.api_geo_cache, name='api_geo_cache'),
+    path('api/geo/<slug:layer>/', views.geo_layer, name='geo_layer'),
     
 ]